@@ -0,0 +1,329 @@
+import email.message
+import queue
+import ssl
+import threading
+import urllib.request
+import zlib
+from typing import Callable, Optional
+from urllib.parse import urljoin, urlsplit
+
+import h11
+import trio
+from requests.cookies import RequestsCookieJar
+
+from extractor import PRODUCT_URL, status_result
+from http_extractor import BROWSER_HEADERS, SessionExpiredError, load_session_cookies, parse_product_page
+
+MAX_REDIRECTS = 5
+
+
+class _HostRateLimiter:
+    """Espaça as requisições de um host para no máximo `rate` por segundo."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_slot = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = trio.current_time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await trio.sleep_until(slot)
+
+
+class _CookieResponse:
+    """O mínimo de uma resposta urllib para o CookieJar ler os Set-Cookie."""
+
+    def __init__(self, set_cookie_headers: list):
+        self._headers = email.message.Message()
+        for value in set_cookie_headers:
+            self._headers["Set-Cookie"] = value
+
+    def info(self):
+        return self._headers
+
+
+class _Connection:
+    """Uma conexão HTTP/1.1 keep-alive (h11 sobre um stream trio)."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.conn = h11.Connection(our_role=h11.CLIENT)
+
+    async def request(self, method: str, target: str, headers: list):
+        await self.stream.send_all(self.conn.send(h11.Request(method=method, target=target, headers=headers)))
+        await self.stream.send_all(self.conn.send(h11.EndOfMessage()))
+
+        response = None
+        body = bytearray()
+        while True:
+            event = self.conn.next_event()
+            if event is h11.NEED_DATA:
+                data = await self.stream.receive_some(65536)
+                self.conn.receive_data(data)
+                continue
+            if isinstance(event, h11.Response):
+                response = event
+            elif isinstance(event, h11.Data):
+                body += event.data
+            elif isinstance(event, (h11.EndOfMessage, h11.ConnectionClosed)):
+                break
+
+        if response is None:
+            # Servidor fechou a conexão antes dos cabeçalhos: erro de conexão, não de parsing
+            raise h11.RemoteProtocolError("Conexão encerrada antes da resposta")
+        headers = {}
+        cookies = []
+        for name, value in response.headers:
+            name = name.decode("latin-1").lower()
+            value = value.decode("latin-1")
+            if name == "set-cookie":
+                cookies.append(value)
+            else:
+                headers[name] = value
+        return response.status_code, headers, cookies, bytes(body)
+
+    @property
+    def reusable(self) -> bool:
+        return self.conn.our_state is h11.DONE and self.conn.their_state is h11.DONE
+
+    def start_next_cycle(self):
+        self.conn.start_next_cycle()
+
+    async def aclose(self):
+        with trio.move_on_after(1) as scope:
+            scope.shield = True
+            await self.stream.aclose()
+
+
+class AsyncProductFetcher:
+    """
+    Escalonador assíncrono (trio) do motor HTTP: centenas de buscas de produto
+    em voo numa única thread, com limite global de concorrência e limite de
+    requisições por segundo por host.
+
+    Consome `tasks_queue` (tuplas (code, row_num, tentativa)) e publica os dicionários de
+    produto em `results_queue`, alimentando o mesmo pipeline de save_data.
+    Produtos cuja página não pode ser interpretada sem navegador são passados
+    a `fallback` (executado em thread, um por vez). Com `cache` (ProductCache),
+    cada resultado também é gravado no cache de produtos.
+    """
+
+    def __init__(self, session: dict, tasks_queue: queue.Queue, results_queue: queue.Queue,
+                 stop_event: threading.Event, max_in_flight: int = 200, per_host_rate: float = 50,
+                 timeout: float = 30, fallback: Optional[Callable] = None,
+                 refresh_session: Optional[Callable] = None, cache=None, log_queue: Optional[queue.Queue] = None):
+        self.tasks_queue = tasks_queue
+        self.results_queue = results_queue
+        self.stop_event = stop_event
+        self.max_in_flight = max_in_flight
+        self.per_host_rate = per_host_rate
+        self.timeout = timeout
+        self.fallback = fallback
+        self.refresh_session = refresh_session
+        self.cache = cache
+        self.log_queue = log_queue
+        self.in_flight = 0
+        self.completed = 0
+        # Mesmo jar e mesmas regras de domínio/path/expiração do http_extractor
+        self._cookies = RequestsCookieJar()
+        load_session_cookies(self._cookies, session)
+        self._pools = {}
+        self._rate_limiters = {}
+        self._ssl_context = ssl.create_default_context()
+        self._ssl_context.set_alpn_protocols(["http/1.1"])
+
+    def _log(self, message: str):
+        if self.log_queue:
+            self.log_queue.put(message)
+        else:
+            print(message)
+
+    def run(self):
+        """Executa o escalonador até a fila esvaziar ou a parada ser sinalizada."""
+        trio.run(self._main)
+
+    async def _main(self):
+        slots = trio.Semaphore(self.max_in_flight)
+        self._session_lock = trio.Lock()
+        self._session_generation = 0
+        self._fallback_limiter = trio.CapacityLimiter(1)
+        try:
+            async with trio.open_nursery() as nursery:
+                while not self.stop_event.is_set():
+                    try:
+                        task = self.tasks_queue.get_nowait()
+                    except queue.Empty:
+                        if self.in_flight == 0:
+                            break
+                        await trio.sleep(0.1)
+                        continue
+                    await slots.acquire()
+                    self.in_flight += 1
+                    nursery.start_soon(self._process, task, slots)
+
+                if self.stop_event.is_set():
+                    nursery.cancel_scope.cancel()
+        finally:
+            for pool in self._pools.values():
+                for connection in pool:
+                    await connection.aclose()
+            self._pools.clear()
+
+    async def _process(self, task, slots):
+        code, row_num = task[:2]
+        # Geração lida antes da requisição: buscas que expiraram com os mesmos
+        # cookies renovam a sessão uma única vez
+        generation = self._session_generation
+        try:
+            data = await self._search(code, row_num)
+            if data is None and self.fallback:
+                data = await trio.to_thread.run_sync(self.fallback, code, row_num, limiter=self._fallback_limiter)
+            if data is None:
+                data = status_result(code, "ERRO GRAVE: página não interpretável", row_num)
+            if self.cache:
+                self.cache.store(data)
+            self.results_queue.put(data)
+            self.tasks_queue.task_done()
+            self.completed += 1
+        except SessionExpiredError:
+            self.tasks_queue.put(task)
+            self.tasks_queue.task_done()
+            await self._refresh_session(generation)
+        except Exception as e:
+            self._log(f"[Async] linha {row_num}: ❌ ERRO GRAVE: {str(e)}")
+            self.results_queue.put(status_result(code, f"ERRO GRAVE: {str(e)}", row_num))
+            self.tasks_queue.task_done()
+        finally:
+            self.in_flight -= 1
+            slots.release()
+
+    async def _refresh_session(self, generation: int):
+        """Renova os cookies uma única vez, mesmo com várias buscas expirando juntas."""
+        async with self._session_lock:
+            if generation != self._session_generation or not self.refresh_session:
+                return
+            self._log("Sessão HTTP expirada. Renovando cookies...")
+            session = await trio.to_thread.run_sync(self.refresh_session)
+            if session:
+                load_session_cookies(self._cookies, session)
+            self._session_generation += 1
+
+    async def _search(self, code, row_num) -> Optional[dict]:
+        try:
+            status, charset, body = await self._get(PRODUCT_URL.format(code=code))
+        except trio.TooSlowError:
+            self._log(f"[Async] linha {row_num}: ❌ Timeout (HTTP): {code}")
+            return status_result(code, "Tempo Esgotado", row_num)
+        except (OSError, trio.BrokenResourceError, h11.ProtocolError) as e:
+            self._log(f"[Async] linha {row_num}: ⚠️ Falha de conexão ({type(e).__name__}): {code}")
+            return None
+
+        if status == 404:
+            self._log(f"[Async] linha {row_num}: ❌ Não encontrado: {code}")
+            return status_result(code, "Não Encontrado", row_num)
+        if status >= 400:
+            self._log(f"[Async] linha {row_num}: ⚠️ HTTP {status}: {code}")
+            return None
+
+        html = body.decode(charset, errors="replace")
+        product = parse_product_page(html, code, row_num)
+        if product is not None:
+            self._log(f"[Async] linha {row_num}: ✅ Sucesso (HTTP): {code}")
+        return product
+
+    async def _get(self, url: str):
+        """
+        GET seguindo redirecionamentos. O prazo (self.timeout) vale para o
+        tempo de rede somado dos saltos; a espera pelo limite por host fica
+        fora dele, então uma fila longa no limitador não vira timeout.
+        """
+        remaining = self.timeout
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            if "/login" in parts.path:
+                raise SessionExpiredError(url)
+            target = parts.path + (f"?{parts.query}" if parts.query else "")
+            headers = [("Host", parts.netloc), *BROWSER_HEADERS.items(), ("Accept-Encoding", "gzip, deflate")]
+            cookie_request = urllib.request.Request(url)
+            self._cookies.add_cookie_header(cookie_request)
+            if cookie_request.has_header("Cookie"):
+                headers.append(("Cookie", cookie_request.get_header("Cookie")))
+
+            await self._rate_limiter(parts.netloc).wait()
+            started = trio.current_time()
+            with trio.fail_after(max(0.0, remaining)):
+                status, response_headers, set_cookies, body = await self._request(parts, target, headers)
+            remaining -= trio.current_time() - started
+            self._cookies.extract_cookies(_CookieResponse(set_cookies), cookie_request)
+
+            if status in (301, 302, 303, 307, 308) and "location" in response_headers:
+                url = urljoin(url, response_headers["location"])
+                continue
+            return status, self._charset(response_headers), self._decode_body(response_headers, body)
+        raise h11.ProtocolError("Redirecionamentos demais")
+
+    def _rate_limiter(self, netloc: str) -> _HostRateLimiter:
+        if netloc not in self._rate_limiters:
+            self._rate_limiters[netloc] = _HostRateLimiter(self.per_host_rate)
+        return self._rate_limiters[netloc]
+
+    async def _request(self, parts, target, headers):
+        key = (parts.scheme, parts.hostname, parts.port)
+        pool = self._pools.setdefault(key, [])
+        reused = bool(pool)
+        connection = pool.pop() if pool else await self._connect(parts)
+        try:
+            result = await connection.request("GET", target, headers)
+        except (trio.BrokenResourceError, h11.ProtocolError, OSError):
+            await connection.aclose()
+            if not reused:
+                raise
+            # O servidor pode ter fechado a conexão ociosa: tenta uma nova
+            connection = await self._connect(parts)
+            try:
+                result = await connection.request("GET", target, headers)
+            except BaseException:
+                await connection.aclose()
+                raise
+        except BaseException:
+            await connection.aclose()
+            raise
+        if connection.reusable:
+            connection.start_next_cycle()
+            pool.append(connection)
+        else:
+            await connection.aclose()
+        return result
+
+    async def _connect(self, parts) -> _Connection:
+        if parts.scheme == "https":
+            stream = await trio.open_ssl_over_tcp_stream(
+                parts.hostname, parts.port or 443,
+                ssl_context=self._ssl_context, https_compatible=True,
+            )
+        else:
+            stream = await trio.open_tcp_stream(parts.hostname, parts.port or 80)
+        return _Connection(stream)
+
+    @staticmethod
+    def _decode_body(headers: dict, body: bytes) -> bytes:
+        encoding = headers.get("content-encoding", "").lower()
+        if encoding == "gzip":
+            return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        if encoding == "deflate":
+            # "deflate" deveria vir com o envelope zlib, mas há servidores que mandam o fluxo cru
+            try:
+                return zlib.decompress(body)
+            except zlib.error:
+                return zlib.decompress(body, -zlib.MAX_WBITS)
+        return body
+
+    @staticmethod
+    def _charset(headers: dict) -> str:
+        message = email.message.Message()
+        message["Content-Type"] = headers.get("content-type", "text/html")
+        return message.get_content_charset() or "utf-8"
@@ -0,0 +1,267 @@
+"""
+Benchmark de ponta a ponta contra a loja falsa (fixture_server.py), sem
+rede nem conta real:
+
+    python benchmark.py extractor --items 200 --latency-ms 300 --tab-latency-ms 150
+    python benchmark.py pipeline --items 1000 --workers 5 --engine selenium --error-rate 0.01
+
+"extractor" mede search_product num único navegador; "pipeline" gera uma
+planilha e roda o ScrapingEngine completo (login, workers, checkpoint e
+exportação). O relatório (JSON) traz itens/min, latência por fase
+(p50/p95/p99, ver timing.SpanRecorder), status dos itens, pico de memória
+(RSS deste processo somado ao de todos os filhos: workers, chromedriver e
+Chrome) e as contagens da loja falsa.
+"""
+import argparse
+import json
+import os
+import queue
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import openpyxl
+import psutil
+
+# Opções de fixture_server.DEFAULT_FIXTURE repassadas pela linha de comando
+FIXTURE_ARGS = ("latency_ms", "jitter_ms", "tab_latency_ms", "not_found_rate", "unavailable_rate",
+                "cannot_add_rate", "error_rate", "hang_rate", "hang_seconds", "session_ttl", "seed")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class MemorySampler(threading.Thread):
+    """Amostra, a cada `interval` s, o RSS somado deste processo e de todos os descendentes."""
+
+    def __init__(self, interval: float = 0.5):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._samples = []
+        self._stop_event = threading.Event()
+        self._root = psutil.Process()
+
+    def sample(self) -> float:
+        rss = 0
+        for proc in [self._root, *self._root.children(recursive=True)]:
+            try:
+                rss += proc.memory_info().rss
+            except psutil.Error:
+                pass
+        return rss / (1024 * 1024)
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            mb = self.sample()
+            self._samples.append(mb)
+            self.peak_mb = max(self.peak_mb, mb)
+
+    def stop(self) -> dict:
+        self._stop_event.set()
+        self.join(timeout=5)
+        mean = sum(self._samples) / len(self._samples) if self._samples else 0.0
+        return {"peak_rss_mb": round(self.peak_mb, 1), "mean_rss_mb": round(mean, 1)}
+
+
+def _drain(log_queue, verbose: bool, until: threading.Event = None):
+    """Esvazia a fila de log (imprimindo com --verbose); com `until`, repete até o evento."""
+    while until is not None and not until.wait(0.5):
+        _drain(log_queue, verbose)
+    while True:
+        try:
+            message = log_queue.get_nowait()
+        except queue.Empty:
+            return
+        if verbose:
+            print(message, flush=True)
+
+
+def write_input(path: str, items: int, first_code: int = 1) -> str:
+    """Planilha de entrada com `items` códigos sequenciais na coluna A."""
+    wb = openpyxl.Workbook(write_only=True)
+    sheet = wb.create_sheet()
+    sheet.append(["Código", "Nome"])
+    for index in range(items):
+        sheet.append([str(first_code + index).zfill(10), ""])
+    wb.save(path)
+    return path
+
+
+def _round_phases(summary: dict) -> dict:
+    return {phase: {key: round(value, 4) if isinstance(value, float) else value for key, value in stats.items()}
+            for phase, stats in summary.items()}
+
+
+def run_extractor(args) -> dict:
+    """search_product em sequência, num navegador logado na loja falsa."""
+    from extractor import search_product, SECTIONS
+    from login import AtlasCopcoLogin
+    from engine import load_config
+    from timing import SpanRecorder
+    from waits import AdaptiveTimeouts
+
+    config = load_config(os.path.join(_base_path(), "config.json"))
+    log_queue = queue.Queue()
+    spans = SpanRecorder()
+    timeouts = AdaptiveTimeouts.from_config(config)
+    login = AtlasCopcoLogin(headless=True, log_queue=log_queue, config=config)
+    with spans.span("login"):
+        driver = login.login()
+    _drain(log_queue, args.verbose)
+    if not driver:
+        raise RuntimeError("Login na loja falsa falhou")
+
+    statuses = Counter()
+    started = time.perf_counter()
+    try:
+        for index in range(args.items):
+            code = str(args.first_code + index).zfill(10)
+            with spans.span("item", code=code):
+                result = search_product(driver, code, worker_id=1, row_num=index + 2, log_queue=log_queue,
+                                        extraction_mode=args.extraction_mode, sections=SECTIONS,
+                                        timeouts=timeouts, spans=spans)
+            statuses[result.get("status", "")] += 1
+            _drain(log_queue, args.verbose)
+    finally:
+        elapsed = time.perf_counter() - started
+        login.logout()
+    return {
+        "items": args.items,
+        "elapsed_s": round(elapsed, 2),
+        "items_per_min": round(args.items / elapsed * 60, 1) if elapsed > 0 else 0.0,
+        "statuses": dict(statuses),
+        "phases": _round_phases(spans.summary()),
+        "waits": timeouts.stats(),
+    }
+
+
+def run_pipeline(args) -> dict:
+    """ScrapingEngine completo sobre uma planilha gerada, numa pasta temporária."""
+    from engine import ScrapingEngine, load_config
+
+    config = load_config(os.path.join(_base_path(), "config.json"))
+    settings = config.setdefault("scraping_settings", {})
+    settings["engine"] = args.engine
+    settings["extraction_mode"] = args.extraction_mode
+    if args.workers:
+        settings["num_workers"] = args.workers
+    # Cada execução mede a loja, não o cache de uma execução anterior
+    config.setdefault("cache_settings", {})["enabled"] = False
+    config.setdefault("system", {})["timing"] = {"enabled": True, "format": "jsonl"}
+    config["system"]["log_file"] = {"enabled": False}
+
+    with tempfile.TemporaryDirectory(prefix="benchmark_") as workdir:
+        input_file = write_input(os.path.join(workdir, "entrada.xlsx"), args.items, args.first_code)
+
+        log_queue = queue.Queue()
+        engine = ScrapingEngine(config, workdir, login_log_queue=log_queue, scraper_log_queue=log_queue)
+        engine.headless = True
+        if args.execution_mode:
+            engine.execution_mode = args.execution_mode
+        engine.set_input(input_file)
+        engine.output_file = ScrapingEngine.default_output_for(input_file)
+        if not engine.prepare():
+            raise RuntimeError("O motor recusou a execução")
+
+        done = threading.Event()
+        drain = threading.Thread(target=_drain, args=(log_queue, args.verbose, done), daemon=True)
+        drain.start()
+        started = time.perf_counter()
+        try:
+            success = engine.run()
+        finally:
+            elapsed = time.perf_counter() - started
+            done.set()
+            drain.join(timeout=5)
+            _drain(log_queue, args.verbose)
+
+        statuses = Counter()
+        if os.path.exists(engine.output_file):
+            wb = openpyxl.load_workbook(engine.output_file, read_only=True)
+            rows = wb.worksheets[0].iter_rows(values_only=True)
+            status_column = list(next(rows)).index("Status")
+            statuses.update(row[status_column] for row in rows)
+            wb.close()
+
+    processed = engine.saved_items_count - engine.session_start_count
+    return {
+        "success": success,
+        "items": processed,
+        "workers": engine.num_workers,
+        "engine": args.engine,
+        "execution_mode": engine.execution_mode,
+        "elapsed_s": round(elapsed, 2),
+        "items_per_min": round(processed / elapsed * 60, 1) if elapsed > 0 else 0.0,
+        "statuses": dict(statuses),
+        "phases": _round_phases(engine.timing_summary()),
+        "waits": engine.wait_stats(),
+    }
+
+
+def _base_path():
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de ponta a ponta contra a loja falsa local.")
+    parser.add_argument("mode", choices=("extractor", "pipeline"))
+    parser.add_argument("--items", type=int, default=100, help="Quantidade de códigos a buscar")
+    parser.add_argument("--first-code", type=int, default=1, help="Primeiro código (os demais são sequenciais)")
+    parser.add_argument("--workers", type=int, help="Workers do pipeline (padrão: scraping_settings.num_workers)")
+    parser.add_argument("--engine", choices=("selenium", "http", "async"), default="selenium")
+    parser.add_argument("--execution-mode", choices=("threads", "processes"))
+    parser.add_argument("--extraction-mode", choices=("standard", "script"), default="standard")
+    parser.add_argument("--ssr", action="store_true", help="Tabelas também no HTML (engines http/async)")
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--tab-latency-ms", type=float, default=100)
+    parser.add_argument("--not-found-rate", type=float, default=0.05)
+    parser.add_argument("--unavailable-rate", type=float, default=0.03)
+    parser.add_argument("--cannot-add-rate", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang-seconds", type=float, default=60)
+    parser.add_argument("--session-ttl", type=float)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json-out", help="Também grava o relatório neste arquivo")
+    parser.add_argument("--verbose", action="store_true", help="Mostra o log do motor")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # A URL da loja é lida na importação de login/extractor: definir antes de importá-los
+    port = _free_port()
+    os.environ["SHOP_BASE_URL"] = f"http://127.0.0.1:{port}"
+    from fixture_server import FixtureShop
+
+    shop = FixtureShop(port=port, ssr=args.ssr, **{name: getattr(args, name) for name in FIXTURE_ARGS}).start()
+    memory = MemorySampler()
+    memory.start()
+    try:
+        runner = run_extractor if args.mode == "extractor" else run_pipeline
+        report = {"mode": args.mode, **runner(args)}
+    finally:
+        report_memory = memory.stop()
+        shop.stop()
+    report.update(report_memory)
+    report["fixture"] = {"base_url": shop.base_url, **{name: getattr(args, name) for name in FIXTURE_ARGS},
+                         "ssr": args.ssr, "requests": shop.counts}
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 0 if report.get("success", True) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Execução em lote, sem interface gráfica (servidores, cron):
+
+    python cli.py entrada.xlsx --sheet Planilha1 --output saida.xlsx --workers 5 --resume resume
+
+Códigos de saída: 0 concluído, 1 erro, 3 não iniciado (política de retomada
+ou saída existente), 130 interrompido.
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+
+from engine import ScrapingEngine, ConfigError, load_config, FIELD_PRESETS
+from log_file import RotatingLog
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_NOT_STARTED = 3
+EXIT_INTERRUPTED = 130
+
+
+def _base_path():
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def _print_logs(log_queue, stop_event, quiet, log_file=None):
+    """Despeja o log do motor no stdout (e no arquivo de log) até o fim da execução, em lotes."""
+    while not stop_event.is_set() or not log_queue.empty():
+        try:
+            batch = [log_queue.get(timeout=0.5)]
+        except queue.Empty:
+            continue
+        try:
+            while True:
+                batch.append(log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if log_file:
+            log_file.write("motor", batch)
+        if not quiet:
+            print("\n".join(batch), flush=True)
+
+
+class _ProgressPrinter:
+    """Imprime o andamento no stdout, no máximo a cada `interval` segundos."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._last = 0.0
+        # Com --health: função que devolve o retrato por worker do motor
+        self.health = None
+
+    def __call__(self, stats, force=False):
+        now = time.time()
+        if not force and now - self._last < self.interval:
+            return
+        self._last = now
+        speed = f"{stats['speed']:.1f} itens/min" if stats["speed"] is not None else "-- itens/min"
+        if stats["eta"] is not None:
+            eta_seconds = stats["eta"]
+            h, m, s = int(eta_seconds // 3600), int((eta_seconds % 3600) // 60), int(eta_seconds % 60)
+            eta = f"{h:02d}:{m:02d}:{s:02d}"
+        else:
+            eta = "--:--:--"
+        print(f"[PROGRESSO] {stats['processed']}/{stats['total']} | {speed} | ETA {eta} | "
+              f"Workers: {stats['active_workers']}/{stats['target_workers']}", flush=True)
+        if self.health:
+            for row in self.health():
+                on_current = f"{row['code']} há {row['on_current']:.0f}s" if row["code"] and row["on_current"] is not None else "-"
+                rss = f"{row['rss_mb']:.0f} MB" if row["rss_mb"] is not None else "-- MB"
+                cpu = f"{row['cpu']:.0f}%" if row["cpu"] is not None else "--%"
+                print(f"  [WORKER {row['worker_id']}] {row['status']} | {row['items_per_min']:.1f} itens/min | {on_current} | "
+                      f"reinícios {row['restarts']} | timeouts {row['timeouts']} | erros {row['errors']} | Chrome {rss}, CPU {cpu}", flush=True)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Raspagem da CT Shop Atlas Copco em lote, sem interface gráfica.")
+    parser.add_argument("input", help="Arquivo Excel de entrada")
+    parser.add_argument("--sheet", help="Planilha a processar (padrão: a primeira)")
+    parser.add_argument("--output", help="Arquivo de saída (padrão: <entrada>_PROCESSADO.xlsx)")
+    parser.add_argument("--workers", type=int, help="Quantidade de workers (padrão: scraping_settings.num_workers)")
+    parser.add_argument("--resume", choices=("resume", "restart", "abort"), default="resume",
+                        help="Com processamento anterior: continuar, reiniciar do zero ou abortar (padrão: resume)")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="Sobrescreve uma saída gerada a partir de outra entrada")
+    parser.add_argument("--headless", action=argparse.BooleanOptionalAction, default=None,
+                        help="Navegador sem janela (padrão: system.chrome_options.headless)")
+    parser.add_argument("--execution-mode", choices=("threads", "processes"),
+                        help="Workers em threads ou em processos (padrão: scraping_settings.execution_mode)")
+    parser.add_argument("--preset", choices=tuple(FIELD_PRESETS),
+                        help="Campos a extrair; 'price_only' visita só a aba Pricing (padrão: scraping_settings.field_preset ou excel_settings.output_columns)")
+    parser.add_argument("--config", help="Caminho do config.json")
+    parser.add_argument("--progress-interval", type=float, default=10, help="Segundos entre linhas de progresso")
+    parser.add_argument("--quiet", action="store_true", help="Mostra apenas o progresso, sem o log detalhado")
+    parser.add_argument("--health", action="store_true",
+                        help="Junto com o progresso, uma linha por worker (itens/min, produto atual, reinícios, RSS/CPU do Chrome)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    base_path = _base_path()
+
+    try:
+        config = load_config(args.config or os.path.join(base_path, 'config.json'))
+    except ConfigError as e:
+        print(f"ERRO: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    def ask_resume(saved_count, reprocess_count):
+        print(f"Processamento anterior encontrado: {saved_count} linha(s) salva(s), {reprocess_count} para reprocessar. Política: {args.resume}.", flush=True)
+        return {"resume": True, "restart": False, "abort": None}[args.resume]
+
+    def confirm_overwrite(reason):
+        print(f"{reason} {'Sobrescrevendo (--overwrite).' if args.overwrite else 'Use --overwrite para sobrescrever.'}", flush=True)
+        return args.overwrite
+
+    log_queue = queue.Queue()
+    progress = _ProgressPrinter(args.progress_interval)
+    engine = ScrapingEngine(config, base_path, login_log_queue=log_queue, scraper_log_queue=log_queue,
+                            ask_resume=ask_resume, confirm_overwrite=confirm_overwrite, on_progress=progress)
+    if args.workers is not None:
+        engine.num_workers = max(1, args.workers)
+    if args.headless is not None:
+        engine.headless = args.headless
+    if args.execution_mode:
+        engine.execution_mode = args.execution_mode
+    if args.preset:
+        engine.field_preset = args.preset
+    if args.health:
+        progress.health = engine.worker_health
+
+    log_file = RotatingLog.from_config(config, base_path)
+    logs_done = threading.Event()
+    log_thread = threading.Thread(target=_print_logs, args=(log_queue, logs_done, args.quiet, log_file), daemon=True)
+    log_thread.start()
+
+    # Ctrl+C / SIGTERM: para e salva o que já foi processado
+    def request_stop(signum, frame):
+        engine.stop()
+    signal.signal(signal.SIGINT, request_stop)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, request_stop)
+
+    try:
+        try:
+            engine.set_input(args.input, args.sheet)
+        except Exception as e:
+            print(f"ERRO: Não foi possível ler o arquivo de entrada: {e}", file=sys.stderr)
+            return EXIT_ERROR
+        engine.output_file = args.output or ScrapingEngine.default_output_for(args.input)
+        engine.log(f"Entrada: {engine.input_file} [{engine.selected_sheet}] | Saída: {engine.output_file}")
+
+        if not engine.prepare():
+            print("Processamento não iniciado.", file=sys.stderr)
+            return EXIT_NOT_STARTED
+
+        start = time.time()
+        success = engine.run()
+        elapsed = time.time() - start
+        progress(engine.progress(), force=True)
+        processed = engine.saved_items_count - engine.session_start_count
+        rate = processed / elapsed * 60 if elapsed > 0 else 0
+        print(f"[RESUMO] {processed} linha(s) salva(s) em {elapsed:.0f}s ({rate:.1f} itens/min).", flush=True)
+
+        if not success:
+            return EXIT_ERROR
+        if engine.interrupted:
+            return EXIT_INTERRUPTED
+        return EXIT_OK
+    finally:
+        logs_done.set()
+        log_thread.join(timeout=5)
+        if log_file:
+            log_file.close()
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,147 @@
+import statistics
+import threading
+import time
+from typing import Optional
+
+import psutil
+
+DEFAULT_AUTOSCALE = {
+    "enabled": False,
+    "min_workers": 1,
+    "max_workers": 20,
+    "interval": 30,
+    "min_samples": 10,
+    "max_timeout_rate": 0.1,
+    "max_cpu": 90,
+    "min_free_memory_mb": 1024,
+    "latency_factor": 2.0,
+    "decrease_factor": 0.75,
+    "min_gain": 0.02,
+}
+
+# Status de resultado que contam como falha de capacidade (timeout/erro)
+FAILURE_PREFIXES = ("Tempo Esgotado", "ERRO")
+
+# Janelas durante as quais o teto aprendido (queda de vazão) vale
+CEILING_WINDOWS = 10
+
+
+class AdaptiveConcurrency:
+    """
+    Ajuste automático da quantidade de workers (AIMD): a cada `interval`
+    segundos, olha a janela de itens concluídos (latência, taxa de
+    timeout/erro e itens/min), a CPU e a memória livre da máquina.
+
+    - Pressão (memória, CPU, timeouts, latência acima de `latency_factor` x a
+      melhor mediana já vista): reduz multiplicando por `decrease_factor`.
+    - Aumento que não rendeu pelo menos `min_gain` a mais de itens/min: volta
+      um worker e guarda esse teto por algumas janelas, convergindo para o
+      máximo de itens/min sustentável.
+    - Caso contrário: soma um worker.
+
+    adjust() devolve (novo_alvo, motivo); motivo None significa sem mudança.
+    """
+
+    def __init__(self, min_workers: int = 1, max_workers: int = 20, interval: float = 30,
+                 min_samples: int = 10, max_timeout_rate: float = 0.1, max_cpu: float = 90,
+                 min_free_memory_mb: float = 1024, latency_factor: float = 2.0, decrease_factor: float = 0.75,
+                 min_gain: float = 0.02):
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.interval = interval
+        self.min_samples = min_samples
+        self.max_timeout_rate = max_timeout_rate
+        self.max_cpu = max_cpu
+        self.min_free_memory = min_free_memory_mb * 1024 * 1024
+        self.latency_factor = latency_factor
+        self.decrease_factor = decrease_factor
+        self.min_gain = min_gain
+        self._lock = threading.Lock()
+        self._latencies = []
+        self._failures = 0
+        self._window_start = time.time()
+        self._best_latency = None
+        self._last_rate = None
+        self._last_action = None
+        self._ceiling = None
+        self._ceiling_windows = 0
+        psutil.cpu_percent(interval=None)  # a primeira leitura sempre retorna 0
+
+    @classmethod
+    def from_config(cls, config: dict) -> Optional["AdaptiveConcurrency"]:
+        """Controlador de scraping_settings.autoscale, ou None se desativado."""
+        settings = {**DEFAULT_AUTOSCALE, **config.get("scraping_settings", {}).get("autoscale", {})}
+        if not settings.pop("enabled"):
+            return None
+        return cls(**settings)
+
+    def record(self, latency: float, status: str = ""):
+        """Registra um item concluído por um worker."""
+        with self._lock:
+            self._latencies.append(latency)
+            if str(status or "").startswith(FAILURE_PREFIXES):
+                self._failures += 1
+
+    def due(self) -> bool:
+        return time.time() - self._window_start >= self.interval
+
+    def clamp(self, target: int) -> int:
+        return min(self.max_workers, max(self.min_workers, target))
+
+    def adjust(self, current: int):
+        """Fecha a janela atual e decide o novo alvo de workers."""
+        now = time.time()
+        with self._lock:
+            latencies, failures = self._latencies, self._failures
+            elapsed = max(now - self._window_start, 1e-6)
+            self._latencies, self._failures, self._window_start = [], 0, now
+
+        if self._ceiling is not None:
+            self._ceiling_windows -= 1
+            if self._ceiling_windows <= 0:
+                self._ceiling = None
+
+        cpu = psutil.cpu_percent(interval=None)
+        free = psutil.virtual_memory().available
+        samples = len(latencies)
+        rate = samples / elapsed * 60
+
+        if free < self.min_free_memory:
+            return self._decrease(current, f"memória livre {free / (1024 * 1024):.0f} MB abaixo de {self.min_free_memory / (1024 * 1024):.0f} MB")
+        if cpu > self.max_cpu:
+            return self._decrease(current, f"CPU em {cpu:.0f}% (limite {self.max_cpu:.0f}%)")
+        if samples < self.min_samples:
+            # Poucos itens na janela: sem base para decidir
+            if current != self.clamp(current):
+                return self.clamp(current), "fora dos limites min/max_workers"
+            return current, None
+
+        timeout_rate = failures / samples
+        median = statistics.median(latencies)
+        if self._best_latency is None or median < self._best_latency:
+            self._best_latency = median
+        summary = f"p50 {median:.1f}s, timeouts/erros {timeout_rate:.0%}, CPU {cpu:.0f}%, {rate:.1f} itens/min"
+
+        if timeout_rate > self.max_timeout_rate:
+            return self._decrease(current, f"taxa de timeouts/erros {timeout_rate:.0%} acima de {self.max_timeout_rate:.0%} ({summary})", rate)
+        if median > self._best_latency * self.latency_factor:
+            return self._decrease(current, f"latência p50 {median:.1f}s acima de {self.latency_factor:g}x a melhor ({self._best_latency:.1f}s)", rate)
+        if self._last_action == "increase" and self._last_rate and rate < self._last_rate * (1 + self.min_gain):
+            self._ceiling, self._ceiling_windows = current, CEILING_WINDOWS
+            return self._set(current, current - 1, "decrease",
+                             f"o último worker não aumentou a vazão ({self._last_rate:.1f} -> {rate:.1f} itens/min); teto temporário de {current - 1}", rate)
+        if current < self.max_workers and (self._ceiling is None or current + 1 < self._ceiling):
+            return self._set(current, current + 1, "increase", f"estável ({summary})", rate)
+        self._last_rate, self._last_action = rate, None
+        return current, None
+
+    def _decrease(self, current: int, reason: str, rate: Optional[float] = None):
+        target = min(current - 1, int(current * self.decrease_factor))
+        return self._set(current, target, "decrease", reason, rate)
+
+    def _set(self, current: int, target: int, action: str, reason: str, rate: Optional[float] = None):
+        target = self.clamp(target)
+        self._last_rate, self._last_action = rate, action
+        if target == current:
+            return current, None
+        return target, reason
@@ -0,0 +1,260 @@
+import contextlib
+import threading
+
+import psutil
+
+DEFAULT_RECYCLING = {"enabled": True, "max_pages": 500, "max_rss_mb": 1500, "check_every": 10, "spare_drivers": 1}
+
+
+def driver_pid(driver):
+    """PID do chromedriver de um driver, ou None."""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+def driver_process_tree(driver) -> list:
+    """Processos do chromedriver e de todo o Chrome que ele abriu."""
+    pid = driver_pid(driver)
+    if not pid:
+        return []
+    try:
+        return live_process_tree(psutil.Process(pid))
+    except psutil.Error:
+        return []
+
+
+def live_process_tree(root) -> list:
+    """
+    O processo e seus descendentes neste momento: o Chrome abre e fecha
+    renderers durante a navegação, então a lista não pode ser guardada.
+    """
+    if root is None:
+        return []
+    try:
+        return [root, *root.children(recursive=True)]
+    except psutil.Error:
+        return []
+
+
+def process_tree_rss(processes) -> int:
+    """Soma o RSS (bytes) dos processos ainda vivos."""
+    total = 0
+    for proc in processes:
+        with contextlib.suppress(psutil.Error):
+            total += proc.memory_info().rss
+    return total
+
+
+def terminate_processes(processes, timeout: float = 3) -> int:
+    """
+    Encerra os processos em paralelo: SIGTERM em todos, espera até `timeout`
+    e mata os que restarem. Retorna quantos ainda estavam vivos.
+    """
+    alive = []
+    for proc in processes:
+        with contextlib.suppress(psutil.Error):
+            # is_running confere o create_time: um PID reaproveitado não é tocado
+            if proc.is_running():
+                proc.terminate()
+                alive.append(proc)
+    _, survivors = psutil.wait_procs(alive, timeout=timeout)
+    for proc in survivors:
+        with contextlib.suppress(psutil.Error):
+            proc.kill()
+    psutil.wait_procs(survivors, timeout=1)
+    return len(alive)
+
+
+class BrowserProcessRegistry:
+    """
+    PIDs de chromedriver/Chrome de cada driver criado por este processo,
+    registrados na criação. No encerramento só esses processos são
+    finalizados, sem afetar outros navegadores ou instâncias do scraper.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._trees = {}
+
+    def register(self, driver) -> list:
+        tree = driver_process_tree(driver)
+        with self._lock:
+            self._trees[id(driver)] = tree
+        return tree
+
+    def forget(self, driver):
+        with self._lock:
+            self._trees.pop(id(driver), None)
+
+    def processes(self, driver) -> list:
+        with self._lock:
+            return list(self._trees.get(id(driver), ()))
+
+    def terminate_all(self, timeout: float = 3) -> int:
+        """Finaliza, em paralelo, todos os navegadores registrados que ainda vivem."""
+        with self._lock:
+            trees, self._trees = list(self._trees.values()), {}
+        processes = {}
+        for tree in trees:
+            for proc in tree:
+                processes[proc.pid] = proc
+                # Renderers abertos depois da criação também entram
+                with contextlib.suppress(psutil.Error):
+                    for child in proc.children(recursive=True):
+                        processes.setdefault(child.pid, child)
+        return terminate_processes(processes.values(), timeout)
+
+
+BROWSER_PROCESSES = BrowserProcessRegistry()
+
+
+def _quit(driver):
+    with contextlib.suppress(Exception): driver.quit()
+    BROWSER_PROCESSES.forget(driver)
+
+
+class DriverPool:
+    """
+    Entrega navegadores autenticados aos workers e os recicla antes que o
+    Chrome inche: cada driver conta as páginas abertas e, a cada
+    `check_every` páginas, mede o RSS da árvore de processos. Ao passar de
+    `max_pages` ou `max_rss_mb`, o driver é trocado por um reserva já aquecido
+    (sessão restaurada, sem login completo) e o antigo é fechado em segundo
+    plano. Os reservas são repostos em background e guardam a geração da
+    sessão em que foram abertos: depois de uma invalidação, um reserva da
+    sessão antiga é descartado em vez de entregue.
+    """
+
+    def __init__(self, shared_session, max_pages: int = 500, max_rss_mb: float = 1500,
+                 check_every: int = 10, spare_drivers: int = 1, enabled: bool = True, log=None):
+        self.shared_session = shared_session
+        self.enabled = enabled
+        self.max_pages = max_pages
+        self.max_rss = max_rss_mb * 1024 * 1024 if max_rss_mb else 0
+        self.check_every = max(1, check_every)
+        self.spare_target = spare_drivers if enabled else 0
+        self.log = log or print
+        self.recycled = 0
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._spares = []  # (driver, geração da sessão)
+        self._filling = 0
+        self._closed = False
+
+    @classmethod
+    def from_config(cls, shared_session, config: dict, log=None, spare_drivers=None) -> "DriverPool":
+        """spare_drivers, se informado, substitui o valor do config."""
+        settings = {**DEFAULT_RECYCLING, **config.get("system", {}).get("browser_recycling", {})}
+        if spare_drivers is not None:
+            settings["spare_drivers"] = spare_drivers
+        return cls(shared_session, max_pages=settings["max_pages"], max_rss_mb=settings["max_rss_mb"],
+                   check_every=settings["check_every"], spare_drivers=settings["spare_drivers"],
+                   enabled=settings["enabled"], log=log)
+
+    def acquire(self):
+        """Um driver autenticado: um reserva pronto, se houver, ou um novo."""
+        generation = self.shared_session.generation
+        with self._lock:
+            spares, self._spares = self._spares, [spare for spare in self._spares if spare[1] == generation]
+            stale = [driver for driver, spare_generation in spares if spare_generation != generation]
+            driver = self._spares.pop()[0] if self._spares else None
+        for old in stale:
+            self._quit_in_background(old)
+        if driver is None:
+            driver = self.shared_session.get_driver()
+        if driver is not None:
+            self._track(driver)
+        self._refill()
+        return driver
+
+    def page_done(self, driver):
+        """
+        Registra uma página processada. Retorna o driver a usar daqui em
+        diante (o mesmo, ou um novo se este foi reciclado).
+        """
+        stats = self._stats.get(id(driver))
+        if not self.enabled or stats is None:
+            return driver
+        stats["pages"] += 1
+        reason = None
+        if self.max_pages and stats["pages"] >= self.max_pages:
+            reason = f"{stats['pages']} páginas"
+        elif self.max_rss and stats["pages"] % self.check_every == 0:
+            rss = process_tree_rss(live_process_tree(stats["root"]))
+            if rss >= self.max_rss:
+                reason = f"{rss / (1024 * 1024):.0f} MB de RSS"
+        if not reason:
+            return driver
+
+        replacement = self.acquire()
+        if replacement is None:
+            # Sem sessão válida agora: segue com o driver atual
+            return driver
+        self.recycled += 1
+        self.log(f"♻️ Navegador reciclado ({reason}).")
+        self._quit_in_background(driver)
+        return replacement
+
+    def discard(self, driver):
+        """Descarta um driver com falha (fechado em segundo plano)."""
+        if driver is not None:
+            self._quit_in_background(driver)
+
+    def release(self, driver):
+        if driver is not None:
+            self._stats.pop(id(driver), None)
+            _quit(driver)
+
+    def rss(self, driver) -> int:
+        stats = self._stats.get(id(driver))
+        return process_tree_rss(live_process_tree(stats["root"])) if stats else 0
+
+    def pages(self, driver) -> int:
+        stats = self._stats.get(id(driver))
+        return stats["pages"] if stats else 0
+
+    def close(self):
+        """Fecha os reservas; os drivers em uso são fechados pelos workers."""
+        with self._lock:
+            self._closed = True
+            spares, self._spares = self._spares, []
+        for driver, _ in spares:
+            _quit(driver)
+
+    def _track(self, driver):
+        # Só a raiz (chromedriver) é guardada; a árvore é percorrida a cada medição
+        processes = BROWSER_PROCESSES.processes(driver) or driver_process_tree(driver)
+        self._stats[id(driver)] = {"pages": 0, "root": processes[0] if processes else None}
+
+    def _quit_in_background(self, driver):
+        self._stats.pop(id(driver), None)
+        threading.Thread(target=_quit, args=(driver,), daemon=True).start()
+
+    def _refill(self):
+        """Prepara reservas em background até atingir spare_drivers."""
+        if not self.shared_session.session:
+            return
+        with self._lock:
+            missing = self.spare_target - len(self._spares) - self._filling
+            if self._closed or missing <= 0:
+                return
+            self._filling += missing
+        for _ in range(missing):
+            threading.Thread(target=self._build_spare, daemon=True).start()
+
+    def _build_spare(self):
+        # Lida antes: se a sessão mudar durante a restauração, o reserva é tratado como antigo
+        generation = self.shared_session.generation
+        try:
+            driver = self.shared_session.get_driver()
+        except Exception:
+            driver = None
+        with self._lock:
+            self._filling -= 1
+            if driver is not None and not self._closed:
+                self._spares.append((driver, generation))
+                return
+        if driver is not None:
+            _quit(driver)
@@ -0,0 +1,1138 @@
+import threading
+import openpyxl
+import hashlib
+import os
+import json
+import queue
+import contextlib
+import time
+import traceback
+import psutil
+from datetime import datetime
+from login import SharedSession
+from extractor import search_product, status_result, sections_for_fields, SECTIONS
+from http_extractor import HttpExtractor, SessionExpiredError
+from async_fetcher import AsyncProductFetcher
+from journal import ResultJournal
+from rowset import RowRangeSet, RowCodeIndex
+from product_cache import ProductCache
+from process_pool import ProcessChannels, WorkerProcess
+from driver_pool import DriverPool, BROWSER_PROCESSES, driver_pid, terminate_processes
+from health import WorkerHealth
+from concurrency import AdaptiveConcurrency
+from retry import RetryPolicy, TRANSIENT_STATUSES, DEAD_LETTER_STATUS
+from waits import AdaptiveTimeouts
+from timing import SpanRecorder, span
+from selenium.common.exceptions import WebDriverException, TimeoutException
+
+# Mantendo os cabeçalhos originais
+HEADERS = [
+    "code", "name", "pricing", "discount", "pricing_with", "cofins_tax",
+    "cofins_value", "difalst_tax", "difalst_value", "fecop_tax", "fecop_value",
+    "icmi_value", "icms_tax", "icms_value", "ipi_tax", "ipi_value", "pis_tax",
+    "pis_value", "st_tax", "st_value", "weight", "status", "country_of_origin",
+    "customs_tariff", "possibility_to_return", "row_num"
+]
+
+header_labels = {
+    "code": "Código",
+    "name": "Nome",
+    "pricing": "Preço",
+    "discount": "Desconto",
+    "pricing_with": "Preço com Impostos",
+    "cofins_tax": "Cofins",
+    "cofins_value": "Cofins Valor",
+    "difalst_tax": "Difal ST",
+    "difalst_value": "Difal ST Valor",
+    "fecop_tax": "Fecop",
+    "fecop_value": "Fecop Valor",
+    "icmi_value": "ICMI Valor",
+    "icms_tax": "ICMS",
+    "icms_value": "ICMS Valor",
+    "ipi_tax": "IPI",
+    "ipi_value": "IPI Valor",
+    "pis_tax": "PIS",
+    "pis_value": "PIS Valor",
+    "st_tax": "ST",
+    "st_value": "ST Valor",
+    "weight": "Peso",
+    "status": "Status",
+    "country_of_origin": "País de Origem",
+    "customs_tariff": "Tarifa Aduaneira",
+    "possibility_to_return": "Possibilidade de Devolução"
+}
+
+# Conjuntos prontos de campos (scraping_settings.field_preset ou --preset na
+# linha de comando); sem preset vale excel_settings.output_columns
+FIELD_PRESETS = {
+    "full": HEADERS,
+    "price_only": ["code", "name", "pricing", "discount", "pricing_with", "status"],
+}
+
+
+class ConfigError(Exception):
+    """config.json ausente, ilegível ou sem as chaves obrigatórias."""
+
+
+def column_to_index(col_letter: str) -> int:
+    """Converte uma letra de coluna do Excel (A, B, C...) para um índice numérico (1, 2, 3...)."""
+    index = 0
+    for char in col_letter.upper():
+        index = index * 26 + (ord(char) - ord('A') + 1)
+    return index
+
+
+def load_config(config_path: str) -> dict:
+    """Lê o config.json; levanta ConfigError se estiver inválido."""
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config_data = json.load(f)
+    except Exception as e:
+        raise ConfigError(f"Erro ao carregar o arquivo de configuração:\n{config_path}\n\n{e}") from e
+    if 'excel_settings' not in config_data or 'input_columns' not in config_data['excel_settings'] or 'code' not in config_data['excel_settings']['input_columns']:
+        raise ConfigError("O arquivo 'config.json' precisa ter a seção 'excel_settings' com 'input_columns' e a chave 'code' definida (ex: \"code\": \"A\").")
+    return config_data
+
+
+def _repair_label(label: str) -> str:
+    """Desfaz o UTF-8 lido como Latin-1 ('PreÃ§o' -> 'Preço') dos rótulos do config.json."""
+    for encoding in ("cp1252", "latin-1"):
+        try:
+            return label.encode(encoding).decode("utf-8")
+        except UnicodeError:
+            continue
+    return label
+
+
+def output_fields(config: dict, preset=None):
+    """
+    Campos (chaves de HEADERS) que a saída pede: os do `preset` ou, sem
+    preset, os de excel_settings.output_columns (rótulos de header_labels ou
+    as próprias chaves). Retorna (campos, colunas_desconhecidas).
+    """
+    if preset:
+        if preset not in FIELD_PRESETS:
+            raise ConfigError(f"Preset de campos desconhecido: '{preset}'. Disponíveis: {', '.join(FIELD_PRESETS)}")
+        return list(FIELD_PRESETS[preset]), []
+    columns = config.get("excel_settings", {}).get("output_columns")
+    if not columns:
+        return list(HEADERS), []
+    by_label = {label: key for key, label in header_labels.items()}
+    fields, unknown = [], []
+    for column in columns:
+        key = column if column in HEADERS else by_label.get(column) or by_label.get(_repair_label(column))
+        if key:
+            fields.append(key)
+        else:
+            unknown.append(column)
+    return fields, unknown
+
+
+def calculate_file_hash(filepath: str) -> str:
+    hash_sha256 = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(4096), b""):
+            hash_sha256.update(chunk)
+    return hash_sha256.hexdigest()
+
+
+# Classe Worker com seu próprio controle de parada e evento de login
+class ScraperWorker(threading.Thread):
+    def __init__(self, worker_id, headless_mode, engine, login_event):
+        super().__init__(daemon=True)
+        self.worker_id = worker_id
+        self.headless = headless_mode
+        self.engine = engine
+        self.login_event = login_event
+        self.retry_policy = RetryPolicy.from_config(engine.config)
+        self._stop_event = threading.Event()
+        self._reported_driver = None
+
+    def stop(self):
+        """Sinaliza para esta thread específica parar."""
+        self._stop_event.set()
+
+    def stopped(self):
+        """Verifica se a thread foi sinalizada para parar."""
+        return self._stop_event.is_set()
+
+    def _create_http_extractor(self):
+        """Cria o extractor HTTP a partir dos cookies da sessão compartilhada."""
+        session = self.engine.shared_session.ensure_session()
+        if not session:
+            return None
+        settings = self.engine.config.get("scraping_settings", {})
+        return HttpExtractor(
+            session,
+            generation=self.engine.shared_session.generation,
+            timeout=settings.get("request_timeout", 30),
+            pool_size=settings.get("http_pool_size", 10),
+            log_queue=self.engine.scraper_log_queue,
+        )
+
+    def _retry_or_dead_letter(self, task, error):
+        """Devolve a tarefa à fila com a tentativa seguinte ou, se esgotou, a registra como falha persistente."""
+        code, row_num, attempt = task
+        attempt += 1
+        if self.retry_policy.exhausted(attempt):
+            self.engine.log(f"☠️ [Worker {self.worker_id}] linha {row_num}: {code} desistido após {attempt} tentativa(s) ({type(error).__name__}).")
+            self.engine.results_queue.put(status_result(code, f"{DEAD_LETTER_STATUS}: {type(error).__name__}", row_num))
+        else:
+            self.engine.tasks_queue.put((code, row_num, attempt))
+        self.engine.tasks_queue.task_done()
+
+    def _report_browser(self, driver):
+        """Avisa o painel de saúde quando o worker passa a usar outro navegador."""
+        if driver is not None and driver is not self._reported_driver:
+            self._reported_driver = driver
+            self.engine.worker_event(self.worker_id, "browser", driver_pid(driver))
+
+    def _search_http(self, extractor, code, row_num):
+        """Busca via HTTP; retorna None quando for preciso recorrer ao Selenium."""
+        try:
+            return extractor.search_product(code, worker_id=self.worker_id, row_num=row_num)
+        except SessionExpiredError:
+            self.engine.log(f"[Worker {self.worker_id}] Sessão HTTP expirada. Renovando cookies...")
+            self.engine.shared_session.invalidate(extractor.session_generation)
+            session = self.engine.shared_session.ensure_session()
+            if session:
+                extractor.load_session(session, self.engine.shared_session.generation)
+        except Exception as e:
+            self.engine.log(f"⚠️ [Worker {self.worker_id}] Falha no motor HTTP ({type(e).__name__}), usando navegador.")
+        return None
+
+    def run(self):
+        """O corpo de execução do worker."""
+        self.engine.log(f"[Worker {self.worker_id}] Iniciando...")
+        self.engine.worker_event(self.worker_id, "start")
+        driver = None
+        extractor = None
+        login_success = False
+        http_engine = self.engine.config.get("scraping_settings", {}).get("engine", "selenium") == "http"
+        try:
+            # Tenta obter um driver autenticado (sessão compartilhada ou login completo).
+            # No motor HTTP basta a sessão; o navegador só é aberto se houver fallback.
+            self.engine.log(f"[Worker {self.worker_id}] Tentando fazer login...")
+            with span(self.engine.spans, "login", self.worker_id):
+                if http_engine:
+                    extractor = self._create_http_extractor()
+                else:
+                    driver = self.engine.driver_pool.acquire()
+
+            if driver or extractor:
+                self.engine.log(f"[Worker {self.worker_id}] ✅ Login bem-sucedido.")
+                login_success = True
+                self._report_browser(driver)
+            else:
+                self.engine.log(f"[Worker {self.worker_id}] ❌ Falha no login.")
+
+            # Sinaliza ao manager que a tentativa de login terminou
+            self.login_event.set()
+            self.engine.manager_wake.set()
+
+            if not login_success:
+                return
+
+            # Loop principal de processamento de tarefas
+            spans = self.engine.spans
+            idle_since = time.time()
+            while not self.engine.stop_event.is_set() and not self.stopped():
+                try:
+                    task = self.engine.tasks_queue.get(timeout=1)
+                    code, row_num, attempt = task
+                    started = time.time()
+                    self.engine.worker_event(self.worker_id, "task", code, row_num)
+                    if spans:
+                        # Tempo parado esperando tarefa na fila
+                        spans.record("queue", started - idle_since, self.worker_id, code, idle_since)
+
+                    # Seções ainda válidas no cache não são buscadas de novo
+                    cache = self.engine.product_cache
+                    wanted = self.engine.sections
+                    cached, sections = cache.lookup(code, row_num, sections=wanted, count=False) if cache else (None, set(wanted))
+                    if cached and not sections:
+                        data = cached
+                    else:
+                        with span(spans if extractor else None, "http", self.worker_id, code):
+                            data = self._search_http(extractor, code, row_num) if extractor else None
+                        if data is not None:
+                            sections = set(SECTIONS)
+                        else:
+                            if not driver:
+                                driver = self.engine.driver_pool.acquire()
+                                if not driver:
+                                    raise WebDriverException("Não foi possível obter um navegador autenticado")
+                            data = self.engine.search(driver, code, worker_id=self.worker_id, row_num=row_num, log_queue=self.engine.scraper_log_queue,
+                                                  extraction_mode=self.engine.config.get("scraping_settings", {}).get("extraction_mode", "standard"),
+                                                  sections=sections, timeouts=self.engine.wait_timeouts, spans=spans)
+                            driver = self.engine.driver_pool.page_done(driver)
+                            self._report_browser(driver)
+                        if cache:
+                            data = ProductCache.merge(cached, data, sections)
+                            cache.store(data, sections)
+                    self.engine.results_queue.put(data)
+                    self.engine.tasks_queue.task_done()
+                    finished = time.time()
+                    self.engine.record_item(self.worker_id, finished - started, data.get("status"))
+                    if spans:
+                        spans.record("item", finished - started, self.worker_id, code, started, not RetryPolicy.is_transient(data.get("status")))
+                    idle_since = finished
+
+                except queue.Empty:
+                    continue
+                except (WebDriverException, TimeoutException) as e:
+                    self.engine.log(f"🚨 [Worker {self.worker_id}] Erro no navegador: {type(e).__name__}. Reiniciando driver.")
+                    self._retry_or_dead_letter(task, e)
+                    self.engine.worker_event(self.worker_id, "restart")
+                    restart_started = time.time()
+                    self.engine.driver_pool.discard(driver)
+                    driver = None
+                    login_attempt = 0
+                    while not extractor and not driver and not self.engine.stop_event.is_set() and not self.stopped():
+                         self.engine.log(f"[Worker {self.worker_id}] Retentando login...")
+                         driver = self.engine.driver_pool.acquire()
+                         if not driver:
+                             self.engine.stop_event.wait(self.retry_policy.delay(login_attempt))
+                             login_attempt += 1
+                    if extractor:
+                        self.engine.stop_event.wait(self.retry_policy.delay(attempt))
+                    elif spans:
+                        spans.record("restart", time.time() - restart_started, self.worker_id, code, restart_started, driver is not None)
+                    self._report_browser(driver)
+                    idle_since = time.time()
+                    continue
+
+        except Exception as e:
+            self.engine.log(f"🚨 [Worker {self.worker_id}] Erro crítico, worker será finalizado: {e}")
+        finally:
+            self.engine.driver_pool.release(driver)
+            if extractor:
+                extractor.close()
+            self.engine.worker_event(self.worker_id, "exit")
+            self.engine.log(f"[Worker {self.worker_id}] Finalizado.")
+
+
+class ScrapingEngine:
+    """
+    Pipeline de raspagem independente de interface: leitura da entrada,
+    continuidade/retomada, pool de workers, checkpoints e exportação.
+
+    As decisões que antes abriam diálogos são delegadas a callbacks:
+    ask_resume(salvas, reprocessar) -> True (continuar) / False (reiniciar) /
+    None (cancelar) e confirm_overwrite(mensagem) -> bool. on_progress(stats)
+    recebe o andamento a cada resultado. A interface Tk (main.py) e a linha
+    de comando (cli.py) são apenas front-ends deste motor.
+
+    session_factory(headless=, log_queue=, config=) cria a sessão compartilhada que
+    entrega os drivers (padrão: login.SharedSession) e search tem a
+    assinatura de extractor.search_product (o padrão). simulator.py troca
+    as duas por modelos estatísticos, sem Chrome. No modo "processes" as duas
+    seguem para os processos worker por pickle.
+    """
+
+    def __init__(self, config, base_path, login_log_queue=None, scraper_log_queue=None,
+                 ask_resume=None, confirm_overwrite=None, on_progress=None,
+                 session_factory=None, search=None):
+        self.config = config
+        self.base_path = base_path
+        self.login_log_queue = login_log_queue or queue.Queue()
+        self.scraper_log_queue = scraper_log_queue or queue.Queue()
+        self.ask_resume = ask_resume or (lambda saved, reprocess: True)
+        self.confirm_overwrite = confirm_overwrite or (lambda message: False)
+        self.on_progress = on_progress
+        self.session_factory = session_factory or SharedSession
+        self.search = search or search_product
+
+        self.input_file = None
+        self.input_hash = None
+        self.selected_sheet = None
+        self.output_file = None
+
+        self.stop_event = threading.Event()
+        self.tasks_queue = queue.Queue()
+        self.results_queue = queue.Queue()
+        self.unsaved_data = []
+        self.unsaved_rows_count = 0
+        self.rows_by_code = {}
+        self.dedup_saved = 0
+        self.product_cache = None
+        self.worker_threads = []
+        self.threads_lock = threading.Lock()
+        # Acorda o manager quando um login termina, sem esperar o próximo ciclo
+        self.manager_wake = threading.Event()
+        self.saved_rows = RowRangeSet()
+        self.reprocess_rows = set()
+        self.total_items = 0
+        self.saved_items_count = 0
+        self.start_time = None
+        self.session_start_count = 0
+        self.interrupted = False
+        self.journal = None
+        self.checkpoint = None
+        self.row_codes = RowCodeIndex()
+        self.shared_session = None
+        self.driver_pool = None
+        self._fallback_driver = None
+        self._fallback_lock = threading.Lock()
+        self.num_workers = config.get("scraping_settings", {}).get("num_workers", 3)
+        self.headless = config.get("system", {}).get("chrome_options", {}).get("headless", False)
+        # "threads" (padrão) ou "processes": um processo por worker, com os
+        # resultados voltando por IPC para este processo, o único que grava
+        self.execution_mode = config.get("scraping_settings", {}).get("execution_mode", "threads")
+        self._channels = None
+        self.autoscaler = None
+        self.retry_policy = RetryPolicy.from_config(config)
+        # Prazos das esperas do extractor, ajustados à latência das páginas
+        self.wait_timeouts = AdaptiveTimeouts.from_config(config)
+        # Abas visitadas pelo extractor, derivadas dos campos pedidos na saída
+        self.field_preset = config.get("scraping_settings", {}).get("field_preset")
+        self.sections = SECTIONS
+        # Tempo por fase (timing.SpanRecorder), aberto a cada execução
+        self.spans = None
+        # Painel de saúde por worker (worker_health)
+        self.health = WorkerHealth()
+        # Resultados ainda esperados (tarefas na fila/em andamento + acertos de cache)
+        self.outstanding = 0
+        self.retry_pass_active = False
+
+    def log(self, message):
+        """Envia uma mensagem para o log de Login/Sistema."""
+        self.login_log_queue.put(message)
+
+    def record_item(self, worker_id, latency, status):
+        """Métrica de um item concluído por um worker (thread ou processo)."""
+        if self.autoscaler:
+            self.autoscaler.record(latency, status)
+        self.health.item_done(worker_id, latency, status)
+
+    def worker_event(self, worker_id, name, *args):
+        """Evento de um worker (thread ou processo) para o painel de saúde (ver WorkerHealth.event)."""
+        self.health.event(worker_id, name, *args)
+
+    def worker_health(self):
+        """Retrato por worker: itens/min na janela, produto atual, reinícios, timeouts e RSS/CPU do Chrome."""
+        with self.threads_lock:
+            alive = {w.worker_id for w in self.worker_threads if w.is_alive()}
+        # Processo que morreu sem avisar também aparece como finalizado
+        self.health.retire_missing(alive)
+        return self.health.snapshot()
+
+    def recycle_worker(self, worker_id):
+        """
+        Recicla um worker travado ou inchado sem parar a execução: fecha a
+        árvore do Chrome dele (a tarefa atual volta para a fila e o worker
+        abre um navegador novo) ou, sem navegador conhecido, para o worker e o
+        manager inicia outro no lugar. Retorna True se algo foi feito.
+        """
+        pid = self.health.browser_pid(worker_id)
+        if pid:
+            try:
+                root = psutil.Process(pid)
+                processes = [root, *root.children(recursive=True)]
+            except psutil.Error:
+                processes = []
+            if processes:
+                terminate_processes(processes)
+                self.log(f"♻️ [Worker {worker_id}] Navegador encerrado a pedido; o worker abre outro e segue.")
+                return True
+        with self.threads_lock:
+            worker = next((w for w in self.worker_threads if w.worker_id == worker_id and w.is_alive()), None)
+        if worker is None:
+            return False
+        worker.stop()
+        self.log(f"♻️ [Worker {worker_id}] Parado a pedido; o manager inicia outro no lugar.")
+        return True
+
+    def set_input(self, input_file, sheet=None):
+        """Define o arquivo de entrada; sem `sheet`, usa a primeira planilha."""
+        wb = openpyxl.load_workbook(input_file, read_only=True)
+        sheets = wb.sheetnames
+        wb.close()
+        if sheet is not None and sheet not in sheets:
+            raise ValueError(f"Planilha '{sheet}' não existe em {os.path.basename(input_file)}. Disponíveis: {', '.join(sheets)}")
+        self.input_file = input_file
+        self.input_hash = calculate_file_hash(input_file)
+        self.selected_sheet = sheet or sheets[0]
+        return sheets
+
+    @staticmethod
+    def default_output_for(input_file):
+        return os.path.splitext(input_file)[0] + "_PROCESSADO.xlsx"
+
+    def _open_journal(self):
+        """Abre (ou reaproveita) o diário de resultados do arquivo de saída atual."""
+        path = ResultJournal.path_for(self.output_file)
+        if self.journal and self.journal.path == path:
+            return self.journal
+        if self.journal:
+            self.journal.close()
+        self.journal = ResultJournal(path, HEADERS)
+        return self.journal
+
+    def _ask_resume(self):
+        """Pergunta se o processamento anterior deve continuar. Retorna None se cancelado."""
+        if self.reprocess_rows: self.log(f"Detectadas {len(self.reprocess_rows)} linha(s) com status vazio (buracos).")
+
+        response = self.ask_resume(len(self.saved_rows), len(self.reprocess_rows))
+        if response is None: return None
+        if response:
+            self.log(f"Continuando processamento. {len(self.saved_rows)} linhas salvas serão ignoradas.")
+        else:
+            self.log("Reiniciando o processamento do zero.")
+            self.saved_rows.clear()
+            self.reprocess_rows.clear()
+        return response
+
+    def check_output_continuity(self):
+        self.reprocess_rows.clear()
+        self.saved_rows.clear()
+
+        if not self.output_file:
+            # Sem saída não há diário nem checkpoint: o processamento não pode começar
+            self.log("❌ Nenhum arquivo de saída definido.")
+            return False
+
+        journal_exists = os.path.exists(ResultJournal.path_for(self.output_file))
+        journal = self._open_journal()
+        if journal_exists:
+            return self._check_journal_continuity(journal)
+
+        if not os.path.exists(self.output_file):
+            self.log("Arquivo de saída não encontrado. Iniciando um novo processamento.")
+            return True
+
+        # Saída gerada por uma versão anterior, sem diário: lê a planilha uma única vez
+        try:
+            wb = openpyxl.load_workbook(self.output_file)
+            data_sheet_name = self.selected_sheet
+
+            if "Metadata" in wb.sheetnames:
+                meta_sheet = wb["Metadata"]
+                # As linhas salvas podem estar divididas em várias células a partir de B4
+                saved_rows_str = "".join(str(cell.value) for cell in meta_sheet[4][1:] if cell.value)
+                metadata = {"input_hash": meta_sheet.cell(row=1, column=2).value, "saved_rows_str": saved_rows_str}
+
+                if metadata["input_hash"] == self.input_hash:
+                    saved_rows_str = metadata.get("saved_rows_str")
+                    if saved_rows_str:
+                        self.saved_rows = RowRangeSet.from_string(saved_rows_str)
+
+                    data_sheet = None
+                    if data_sheet_name and data_sheet_name in wb.sheetnames:
+                        data_sheet = wb[data_sheet_name]
+                        status_col_idx = HEADERS.index("status") + 1
+
+                        self.log("Verificando integridade das linhas processadas...")
+                        for row_num in range(2, data_sheet.max_row + 1):
+                            if not data_sheet.cell(row=row_num, column=status_col_idx).value:
+                                self.reprocess_rows.add(row_num)
+                                if row_num in self.saved_rows: self.saved_rows.remove(row_num)
+
+                    response = self._ask_resume()
+                    if response is None: return False
+                    if response and data_sheet is not None:
+                        self._import_legacy_output(data_sheet)
+                    return True
+                else:
+                    if self.confirm_overwrite("O arquivo de saída foi gerado a partir de um arquivo de entrada diferente."):
+                        self.log("Sobrescrevendo arquivo de saída.")
+                        self.saved_rows.clear()
+                        self.reprocess_rows.clear()
+                        return True
+                    return False
+            else:
+                if self.confirm_overwrite("O arquivo de saída não contém metadados."):
+                    self.log("Sobrescrevendo arquivo de saída sem metadados.")
+                    self.saved_rows.clear()
+                    self.reprocess_rows.clear()
+                    return True
+                return False
+        except Exception as e:
+            self.log(f"Erro ao verificar continuidade: {e}. Assumindo novo processamento.")
+            self.saved_rows.clear()
+            self.reprocess_rows.clear()
+            return True
+
+    def _check_journal_continuity(self, journal):
+        """Continuidade a partir do diário de resultados (sem abrir o .xlsx)."""
+        try:
+            if journal.get_meta("input_hash") == self.input_hash:
+                checkpoint = journal.checkpoint(self.input_hash)
+                self.saved_rows = RowRangeSet(sorted(checkpoint.saved_rows()))
+                self.reprocess_rows = checkpoint.hole_rows()
+                response = self._ask_resume()
+                return response is not None
+
+            if journal.get_meta("input_hash") is None:
+                self.log("Diário de resultados vazio. Iniciando um novo processamento.")
+                return True
+
+            if self.confirm_overwrite("O arquivo de saída foi gerado a partir de um arquivo de entrada diferente."):
+                self.log("Sobrescrevendo arquivo de saída.")
+                return True
+            return False
+        except Exception as e:
+            self.log(f"Erro ao verificar continuidade: {e}. Assumindo novo processamento.")
+            self.saved_rows.clear()
+            self.reprocess_rows.clear()
+            return True
+
+    def _import_legacy_output(self, data_sheet):
+        """Copia para o diário as linhas de uma saída antiga, para não perdê-las no próximo export."""
+        items = []
+        for row in data_sheet.iter_rows(min_row=2, max_col=len(HEADERS), values_only=True):
+            item = dict(zip(HEADERS, row))
+            if item.get("row_num") and item.get("status"):
+                items.append(item)
+        if items:
+            self.journal.append_and_record(items, self.journal.checkpoint(self.input_hash))
+            self.log(f"{len(items)} linha(s) da saída anterior importada(s) para o diário.")
+
+    def prepare(self):
+        """
+        Verifica a continuidade e prepara o diário para uma nova execução.
+        Retorna False se o processamento não deve começar.
+        """
+        if not self.check_output_continuity():
+            return False
+
+        if not self.saved_rows and not self.reprocess_rows:
+            self.journal.reset()
+            if os.path.exists(self.output_file):
+                try:
+                    os.remove(self.output_file)
+                    self.log(f"Arquivo de saída '{self.output_file}' removido para reiniciar o processamento.")
+                except Exception as e:
+                    self.log(f"ERRO: Não foi possível apagar o arquivo de saída antigo: {e}")
+                    return False
+        self.journal.set_meta(input_hash=self.input_hash, sheet=self.selected_sheet)
+        self.checkpoint = self.journal.checkpoint(self.input_hash)
+
+        self.saved_items_count = len(self.saved_rows)
+        self.stop_event.clear()
+        self.interrupted = False
+        return True
+
+    def _worker_manager(self, headless_mode):
+        """
+        Gerencia o pool de workers como um pipeline contínuo: mantém até
+        login_batch_size logins em andamento e cada worker começa a consumir
+        tarefas assim que o próprio login termina. O threads_lock só protege a
+        lista de workers e nunca é mantido durante esperas ou logins.
+        """
+        worker_serial_id = 0
+        login_batch_size = max(1, self.config.get("scraping_settings", {}).get("login_batch_size", 3))
+        self.log(f"MANAGER: Até {login_batch_size} login(s) simultâneo(s); cada worker começa assim que entra.")
+
+        self.autoscaler = AdaptiveConcurrency.from_config(self.config)
+        if self.autoscaler:
+            self.num_workers = self.autoscaler.clamp(self.num_workers)
+            self.log(f"MANAGER: Ajuste automático de workers ativo ({self.autoscaler.min_workers}-{self.autoscaler.max_workers}), começando com {self.num_workers}.")
+
+        logged_in = set()
+        login_failures = 0
+        next_start = 0
+
+        while not self.stop_event.is_set():
+            if self.autoscaler and self.autoscaler.due():
+                target, reason = self.autoscaler.adjust(self.num_workers)
+                if reason:
+                    self.log(f"AUTO: workers {self.num_workers} -> {target}: {reason}.")
+                    self.num_workers = target
+
+            with self.threads_lock:
+                finished = [t for t in self.worker_threads if not t.is_alive()]
+                # Remove workers que já terminaram da lista
+                self.worker_threads = [t for t in self.worker_threads if t.is_alive()]
+                workers = list(self.worker_threads)
+
+            # Worker que morreu sem ter entrado (e sem ser parado) conta como login falho
+            for worker in finished:
+                if worker.worker_id not in logged_in and not worker.stopped():
+                    login_failures += 1
+                    next_start = time.time() + self.retry_policy.delay(login_failures - 1)
+                logged_in.discard(worker.worker_id)
+            for worker in workers:
+                if worker.login_event.is_set() and worker.worker_id not in logged_in:
+                    logged_in.add(worker.worker_id)
+                    login_failures = 0
+
+            target_workers = self.num_workers
+            running = [w for w in workers if not w.stopped()]
+            logging_in = sum(1 for w in running if not w.login_event.is_set())
+
+            # Adiciona workers se necessário, sem passar do limite de logins em andamento
+            if len(running) < target_workers and time.time() >= next_start:
+                to_start = min(target_workers - len(running), login_batch_size - logging_in)
+                if to_start > 0:
+                    self.log(f"MANAGER: Iniciando {to_start} novo(s) worker(s) ({logging_in} login(s) em andamento).")
+                for _ in range(max(0, to_start)):
+                    if self.stop_event.is_set():
+                        break
+                    worker_serial_id += 1
+                    worker = self._create_worker(worker_serial_id, headless_mode)
+                    worker.start()
+                    with self.threads_lock:
+                        self.worker_threads.append(worker)
+
+            # Remove workers se necessário (os mais recentes primeiro)
+            elif len(running) > target_workers:
+                workers_to_stop = running[target_workers:]
+                self.log(f"MANAGER: Sinalizando para remover {len(workers_to_stop)} worker(s).")
+                for worker in workers_to_stop:
+                    worker.stop()
+
+            if self.manager_wake.wait(0.5):
+                self.manager_wake.clear()
+
+        # Ao final do processo, sinaliza para todos os workers pararem
+        self.log("MANAGER: Sinal de parada global recebido. Encerrando todos os workers.")
+        with self.threads_lock:
+            workers = list(self.worker_threads)
+        for worker in workers:
+            worker.stop()
+
+    def _create_worker(self, worker_id, headless_mode):
+        """Cria um worker em thread ou, no modo 'processes', em processo próprio."""
+        if not self._channels:
+            return ScraperWorker(worker_id, headless_mode, self, threading.Event())
+        # Os processos partem da sessão do processo principal, sem novo login
+        session = self.shared_session.ensure_session()
+        return WorkerProcess(worker_id, headless_mode, self._channels, ProcessChannels.new_login_event(),
+                             self.config, self.base_path, session, self.sections, self.session_factory, self.search)
+
+    def _selenium_fallback(self, code, row_num):
+        """Busca pelo navegador os produtos que o motor assíncrono não conseguiu interpretar."""
+        with self._fallback_lock:
+            try:
+                if not self._fallback_driver:
+                    self._fallback_driver = self.shared_session.get_driver()
+                if not self._fallback_driver:
+                    return None
+                return self.search(self._fallback_driver, code, worker_id="Async", row_num=row_num, log_queue=self.scraper_log_queue,
+                                      extraction_mode=self.config.get("scraping_settings", {}).get("extraction_mode", "standard"),
+                                      sections=self.sections, timeouts=self.wait_timeouts, spans=self.spans)
+            except (WebDriverException, TimeoutException) as e:
+                self.log(f"🚨 [Async] Erro no navegador de fallback: {type(e).__name__}.")
+                with contextlib.suppress(Exception): self._fallback_driver.quit()
+                self._fallback_driver = None
+                return None
+
+    def _refresh_http_session(self):
+        """Descarta os cookies expirados e faz um novo login para o motor assíncrono."""
+        self.shared_session.invalidate(self.shared_session.generation)
+        return self.shared_session.ensure_session()
+
+    def _async_manager(self):
+        """
+        Mantém o escalonador assíncrono (motor 'async') rodando enquanto houver
+        tarefas na fila, inclusive buracos reenfileirados depois.
+        """
+        settings = self.config.get("scraping_settings", {})
+        self.log(f"MANAGER: Motor assíncrono com até {settings.get('max_in_flight', 200)} requisições em voo.")
+
+        while not self.stop_event.is_set():
+            with self.threads_lock:
+                self.worker_threads = [t for t in self.worker_threads if t.is_alive()]
+                idle = not self.worker_threads
+
+            if idle and not self.tasks_queue.empty():
+                session = self.shared_session.ensure_session()
+                if not session:
+                    self.log("MANAGER: ❌ Falha no login. Nova tentativa em 30s.")
+                    # Acorda na hora se a parada for pedida durante a espera
+                    self.stop_event.wait(30)
+                    continue
+                max_in_flight = settings.get("max_in_flight", 200)
+                if self.retry_pass_active:
+                    # Repescagem com menos requisições simultâneas
+                    max_in_flight = max(1, max_in_flight // 4)
+                fetcher = AsyncProductFetcher(
+                    session, self.tasks_queue, self.results_queue, self.stop_event,
+                    cache=self.product_cache,
+                    max_in_flight=max_in_flight,
+                    per_host_rate=settings.get("per_host_rate", 50),
+                    timeout=settings.get("request_timeout", 30),
+                    fallback=self._selenium_fallback,
+                    refresh_session=self._refresh_http_session,
+                    log_queue=self.scraper_log_queue,
+                )
+                thread = threading.Thread(target=fetcher.run, daemon=True)
+                with self.threads_lock:
+                    self.worker_threads.append(thread)
+                thread.start()
+            self.stop_event.wait(1)
+
+        with self._fallback_lock:
+            if self._fallback_driver:
+                with contextlib.suppress(Exception): self._fallback_driver.quit()
+                self._fallback_driver = None
+
+    def active_workers(self):
+        with self.threads_lock:
+            return len([t for t in self.worker_threads if t.is_alive()])
+
+    def progress(self):
+        """Retrato do andamento: processados, total, velocidade (itens/min) e ETA (s)."""
+        processed = self.saved_items_count + self.unsaved_rows_count
+        speed = eta = None
+        elapsed = time.time() - self.start_time if self.start_time else 0
+        if elapsed > 2:
+            speed = (processed - self.session_start_count) / elapsed * 60
+            remaining = self.total_items - processed
+            if speed > 0 and remaining > 0:
+                eta = remaining / (speed / 60)
+        return {
+            "processed": processed,
+            "total": self.total_items,
+            "speed": speed,
+            "eta": eta,
+            "active_workers": self.active_workers(),
+            "target_workers": self.num_workers,
+        }
+
+    def wait_stats(self):
+        """Tempo gasto por espera do extractor e prazo atual (ver AdaptiveTimeouts.stats)."""
+        return self.wait_timeouts.stats()
+
+    def _notify_progress(self):
+        if self.on_progress:
+            self.on_progress(self.progress())
+
+    def run(self):
+        """Executa o processamento completo. Retorna True se terminou sem erro."""
+        success = False
+        try:
+            self.log("\n=== INICIANDO PROCESSAMENTO ===")
+            self.spans = SpanRecorder.from_config(self.config, self.output_file)
+            self.health.reset()
+            if self.spans:
+                self.log(f"Tempos por fase em '{os.path.basename(self.spans.path)}'.")
+            use_processes = self.execution_mode == "processes" and self.config.get("scraping_settings", {}).get("engine", "selenium") != "async"
+            if use_processes:
+                self.log("Modo multiprocesso: cada worker roda em um processo próprio.")
+                self._channels = ProcessChannels(self.login_log_queue, self.scraper_log_queue, on_metric=self.record_item,
+                                                 on_span=lambda span: self.spans and self.spans.record_span(span),
+                                                 on_event=self.worker_event)
+                self.tasks_queue = self._channels.tasks
+                self.results_queue = self._channels.results
+            else:
+                self.tasks_queue = queue.Queue()
+                self.results_queue = queue.Queue()
+
+            fields, unknown = output_fields(self.config, self.field_preset)
+            if unknown:
+                self.log(f"⚠️ Colunas de saída desconhecidas ignoradas: {', '.join(unknown)}.")
+            self.sections = sections_for_fields(fields)
+            if self.sections != SECTIONS:
+                skipped = [s for s in SECTIONS if s not in self.sections]
+                self.log(f"Projeção de campos{f' ({self.field_preset})' if self.field_preset else ''}: abas {', '.join(self.sections) or 'nenhuma'}; puladas: {', '.join(skipped)}.")
+
+            code_column_letter = self.config['excel_settings']['input_columns']['code']
+            self.log(f"Lendo códigos da coluna {code_column_letter}.")
+
+            wb_input = openpyxl.load_workbook(self.input_file, read_only=True)
+            sheet_input = wb_input[self.selected_sheet]
+
+            self.log(f"Analisando coluna '{code_column_letter}' para encontrar linhas válidas...")
+            code_col = column_to_index(code_column_letter)
+
+            # Passada única em streaming, lendo apenas a coluna de código
+            self.row_codes = RowCodeIndex()
+            for row_num, (value,) in enumerate(sheet_input.iter_rows(min_row=2, min_col=code_col, max_col=code_col, values_only=True), start=2):
+                if value and str(value).strip():
+                    self.row_codes.append(row_num, str(value).zfill(10))
+
+            self.checkpoint.register_rows(self.row_codes.rows())
+            total_valid_rows = len(self.row_codes)
+            self.log(f"Encontradas {total_valid_rows} linhas com códigos válidos.")
+            self.total_items = total_valid_rows
+
+            pending_rows = []
+            if self.reprocess_rows:
+                self.log(f"Priorizando {len(self.reprocess_rows)} linha(s) para reprocessamento.")
+                for row_num in sorted(self.reprocess_rows):
+                    code = self.row_codes.get(row_num)
+                    if code:
+                        pending_rows.append((code, row_num))
+
+            for row_num, code in self.row_codes:
+                if row_num not in self.saved_rows and row_num not in self.reprocess_rows:
+                    pending_rows.append((code, row_num))
+
+            self.rows_by_code = {}
+            self.dedup_saved = 0
+            self.outstanding = 0
+            self.retry_pass_active = False
+            self.product_cache = self._open_product_cache()
+            queued = self._queue_deduplicated(pending_rows)
+            if queued:
+                self.log(f"Total de {queued} tarefas adicionadas à fila ({len(pending_rows)} linhas).")
+                if self.dedup_saved:
+                    self.log(f"Deduplicação: {self.dedup_saved} busca(s) evitada(s) por códigos repetidos.")
+            else:
+                self.log("Nenhum item novo ou para reprocessar encontrado.")
+
+            wb_input.close()
+
+            self.start_time = time.time()
+            self.session_start_count = self.saved_items_count
+            self._notify_progress()
+
+            headless_mode = self.headless
+            self.shared_session = self.session_factory(headless=headless_mode, log_queue=self.login_log_queue, config=self.config)
+            self.driver_pool = DriverPool.from_config(self.shared_session, self.config, log=self.log)
+            if self.config.get("scraping_settings", {}).get("engine", "selenium") == "async":
+                manager_thread = threading.Thread(target=self._async_manager, daemon=True)
+            else:
+                manager_thread = threading.Thread(target=self._worker_manager, args=(headless_mode,), daemon=True)
+            manager_thread.start()
+
+            while not self.stop_event.is_set():
+                try:
+                    data = self.results_queue.get(timeout=1)
+                    self.outstanding -= 1
+                    if data:
+                        self.unsaved_data.append(data)
+                        self.unsaved_rows_count += len(self.rows_by_code.get(data.get('code'), ())) or 1
+
+                        if len(self.unsaved_data) >= (self.num_workers * 5 if self.num_workers > 0 else 2):
+                            self.save_data()
+
+                        self._notify_progress()
+
+                except queue.Empty:
+                    # Terminou quando toda tarefa enfileirada já devolveu seu resultado
+                    if self.outstanding <= 0 or (self.tasks_queue.empty() and self.active_workers() == 0):
+                        self.log("Fila de tarefas vazia e nenhuma busca pendente. Verificando por buracos...")
+                        if self.unsaved_data: self.save_data()
+                        if self._find_and_queue_buracos() == 0:
+                            if not self.retry_pass_active and self._queue_retry_pass():
+                                continue
+                            self.log("Nenhum buraco adicional encontrado. Processamento finalizado.")
+                            break
+                    time.sleep(0.5)
+
+            if self.unsaved_data: self.save_data()
+            self.export_output()
+            if self.dedup_saved:
+                self.log(f"Deduplicação: {self.dedup_saved} busca(s) evitada(s) por códigos repetidos.")
+            if self.product_cache:
+                self.log(self.product_cache.stats_line())
+            self.log(f"Sessão compartilhada: {self.shared_session.full_logins} login(s) completo(s), {self.shared_session.restores} sessão(ões) reaproveitada(s), {self.driver_pool.recycled} navegador(es) reciclado(s).")
+            waits = self.wait_timeouts.summary()
+            if waits:
+                self.log(f"Esperas do navegador: {waits}.")
+            self.log("\nPROCESSAMENTO CONCLUÍDO." if not self.stop_event.is_set() else "\nProcessamento interrompido.")
+            success = True
+
+        except Exception as e:
+            self.log(f"\nERRO DURANTE PROCESSAMENTO: {e}")
+            self.log(traceback.format_exc())
+        finally:
+            self.cleanup()
+            self._close_spans()
+        return success
+
+    def _close_spans(self):
+        """Fecha o arquivo de tempos e registra o resumo p50/p95/p99 de cada fase."""
+        if not self.spans:
+            return
+        lines = self.spans.summary_lines()
+        if lines:
+            self.log("Tempo por fase (p50/p95/p99):\n  " + "\n  ".join(lines))
+        self.spans.close()
+
+    def timing_summary(self):
+        """Resumo por fase da última execução (ver SpanRecorder.summary)."""
+        return self.spans.summary() if self.spans else {}
+
+    def _find_and_queue_buracos(self):
+        # Buracos: linhas válidas da entrada que continuam sem status no checkpoint
+        try:
+            buracos = self.checkpoint.pending_rows()
+            self.saved_rows.difference_update(buracos)
+        except Exception as e:
+            self.log(f"ERRO ao escanear buracos: {e}")
+            return 0
+
+        if buracos:
+            self.log(f"Detectados {len(buracos)} novo(s) buraco(s) na planilha.")
+            self._queue_deduplicated((self.row_codes.get(row_num), row_num) for row_num in sorted(buracos) if row_num in self.row_codes)
+        return len(buracos)
+
+    def _queue_retry_pass(self):
+        """
+        Repescagem final: linhas que terminaram com falha passageira (Tempo
+        Esgotado / ERRO GRAVE) voltam uma vez à fila, com menos concorrência.
+        Retorna quantas linhas foram reenfileiradas.
+        """
+        rows = self.checkpoint.rows_with_status(TRANSIENT_STATUSES, max_attempts=self.retry_policy.max_retries)
+        rows = [(row_num, self.row_codes.get(row_num) or code) for row_num, code, _, _ in rows]
+        rows = [(row_num, code) for row_num, code in rows if code]
+        self.retry_pass_active = True
+        if not rows:
+            return 0
+
+        settings = self.config.get("scraping_settings", {})
+        workers = settings.get("retry_pass_workers") or max(1, self.num_workers // 2)
+        if self.autoscaler:
+            self.log("Repescagem: ajuste automático de workers desligado.")
+            self.autoscaler = None
+        self.num_workers = min(self.num_workers, workers)
+        self.log(f"Repescagem: {len(rows)} linha(s) com falha passageira serão tentadas de novo com {self.num_workers} worker(s).")
+
+        self.saved_rows.difference_update(row_num for row_num, _ in rows)
+        self.saved_items_count -= len(rows)
+        self._queue_deduplicated((code, row_num) for row_num, code in rows)
+        return len(rows)
+
+    def dead_letters(self, checkpoint=None):
+        """Linhas com falha persistente ou que continuaram com falha passageira."""
+        checkpoint = checkpoint or self.checkpoint
+        if not checkpoint:
+            return []
+        return checkpoint.rows_with_status((DEAD_LETTER_STATUS, *TRANSIENT_STATUSES))
+
+    def _open_product_cache(self):
+        """Abre o cache de produtos configurado em cache_settings (ou None se desativado)."""
+        settings = self.config.get("cache_settings", {})
+        if not settings.get("enabled", False):
+            return None
+        if self.product_cache:
+            return self.product_cache
+        path = os.path.join(self.base_path, settings.get("path", "product_cache.sqlite3"))
+        try:
+            cache = ProductCache(path, ttl_hours=settings.get("ttl_hours"), max_entries=settings.get("max_entries", 200000))
+            self.log(f"Cache de produtos: {path}")
+            return cache
+        except Exception as e:
+            self.log(f"⚠️ Cache de produtos indisponível: {e}")
+            return None
+
+    def _queue_deduplicated(self, pending_rows):
+        """
+        Agrupa as linhas pendentes por código e enfileira uma única busca por
+        código; save_data replica o resultado para todas as linhas do grupo.
+        Retorna o número de tarefas enfileiradas.
+        """
+        queued = 0
+        for code, row_num in pending_rows:
+            rows = self.rows_by_code.get(code)
+            if rows is None:
+                self.rows_by_code[code] = [row_num]
+                cached, stale = self.product_cache.lookup(code, row_num, sections=self.sections) if self.product_cache else (None, self.sections)
+                if cached and not stale:
+                    # Acerto completo no cache: nem passa pelos workers
+                    self.results_queue.put(cached)
+                    self.outstanding += 1
+                    continue
+                self.tasks_queue.put((code, row_num, 0))
+                self.outstanding += 1
+                queued += 1
+            elif row_num not in rows:
+                rows.append(row_num)
+                self.dedup_saved += 1
+        return queued
+
+    def _fan_out(self, items):
+        """Copia cada resultado para todas as linhas que referenciam o mesmo código."""
+        expanded = []
+        for item in items:
+            rows = self.rows_by_code.get(item.get('code')) or [item.get('row_num')]
+            for row_num in rows:
+                expanded.append(item if row_num == item.get('row_num') else dict(item, row_num=row_num))
+        return expanded
+
+    def save_data(self):
+        if not self.unsaved_data: return
+
+        if not self.journal:
+             self.log("ERRO CRÍTICO: Tentativa de salvar dados sem um arquivo de saída definido.")
+             return
+
+        self.log(f"Salvando lote de {len(self.unsaved_data)} itens no diário de '{os.path.basename(self.output_file)}'...")
+        try:
+            # Apenas o lote novo é gravado; a planilha é gerada em export_output
+            items = self._fan_out(self.unsaved_data)
+            with span(self.spans, "save", "engine"):
+                self.journal.append_and_record(items, self.checkpoint)
+
+            newly_saved_rows = {item.get('row_num') for item in items if item.get('row_num')}
+            self.saved_rows.update(newly_saved_rows)
+
+            items_saved_count = len(items)
+            self.saved_items_count += items_saved_count
+            for item in self.unsaved_data:
+                self.rows_by_code.pop(item.get('code'), None)
+            self.unsaved_data = []
+            self.unsaved_rows_count = 0
+            self.log(f"Lote salvo com sucesso. Total salvo: {self.saved_items_count} linhas.")
+            if self.product_cache:
+                self.log(self.product_cache.stats_line())
+        except Exception as e:
+            self.log(f"ERRO AO SALVAR: {e}")
+            self.log(traceback.format_exc())
+
+    def export_output(self):
+        """Gera o arquivo .xlsx de saída a partir do diário de resultados."""
+        if not self.journal: return
+        self.log(f"Gerando planilha '{os.path.basename(self.output_file)}'...")
+        try:
+            metadata_rows = [
+                ["Input File Hash", self.input_hash],
+                ["Last Processed Row", self.saved_rows.max()],
+                ["Timestamp", datetime.now().strftime("%d/%m/%Y %H:%M:%S")],
+                ["Saved Rows", *self.saved_rows.to_chunks()],
+            ]
+            dead_letters = self.dead_letters(self.checkpoint or self.journal.checkpoint(self.input_hash))
+            extra_sheets = {}
+            if dead_letters:
+                extra_sheets["Dead Letter"] = [["Linha", "Código", "Status", "Tentativas"], *dead_letters]
+            self.journal.export_xlsx(self.output_file, self.selected_sheet, [header_labels.get(h, h) for h in HEADERS], metadata_rows, extra_sheets)
+            self.log("Planilha de saída gerada com sucesso.")
+            if dead_letters:
+                self.log(f"☠️ {len(dead_letters)} linha(s) sem sucesso após as novas tentativas (aba 'Dead Letter').")
+        except Exception as e:
+            self.log(f"ERRO AO GERAR PLANILHA: {e}")
+            self.log(traceback.format_exc())
+
+    def has_journal(self):
+        return bool(self.output_file) and os.path.exists(ResultJournal.path_for(self.output_file))
+
+    def export_existing(self):
+        """Gera a planilha com o que já está no diário, sem processar nada."""
+        journal = self._open_journal()
+        if not self.saved_rows:
+            self.saved_rows = RowRangeSet(sorted(journal.checkpoint(self.input_hash).saved_rows()))
+        self.export_output()
+
+    def stop(self):
+        self.interrupted = True
+        self.stop_event.set()
+        self.manager_wake.set()
+        self.log("\nSolicitação de parada recebida...")
+
+    def cleanup(self):
+        self.log("\nSinalizando para workers finalizarem...")
+        if not self.stop_event.is_set(): self.stop_event.set()
+        self.manager_wake.set()
+        with self.threads_lock:
+            workers = list(self.worker_threads)
+        # Prazo único para todos, em vez de 5 s por worker
+        deadline = time.time() + 5
+        for thread in workers: thread.join(timeout=max(0, deadline - time.time()))
+        if self._channels:
+            self._channels.close(workers)
+            self._channels = None
+        self.autoscaler = None
+        if self.driver_pool:
+            self.driver_pool.close()
+        try:
+            # Só os navegadores criados por esta execução; outros Chrome da máquina ficam intactos
+            remaining = BROWSER_PROCESSES.terminate_all()
+            if remaining:
+                self.log(f"{remaining} processo(s) de navegador ainda aberto(s) foram encerrados.")
+        except Exception as e:
+            self.log(f"Erro ao limpar processos chrome: {e}")
+        self.log("Limpeza concluída.")
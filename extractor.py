@@ -1,15 +1,347 @@
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, NoSuchElementException
-import traceback
+from selenium.common.exceptions import TimeoutException
+import json
 from typing import Optional
 import queue
+from login import BASE_URL
+from waits import AdaptiveTimeouts
+from timing import span
 
-def search_product(driver, product_code, worker_id=None, row_num=None, log_queue: Optional[queue.Queue] = None):
+PRODUCT_URL = BASE_URL + "/en-GB/products/{code}"
+
+# Textos que identificam os estados especiais da página de produto
+NOT_FOUND_TEXT = "The server cannot find the requested resource."
+NO_LONGER_AVAILABLE_TEXT = "The product is no longer available"
+CANNOT_ADD_TEXT = "Product cannot be added to cart"
+
+# Seções (abas) da página de produto e os campos que cada uma preenche
+SECTIONS = ("pricing", "taxes", "info")
+SECTION_FIELDS = {
+    "pricing": ["pricing", "discount", "pricing_with"],
+    "taxes": [
+        "cofins_tax", "cofins_value", "difalst_tax", "difalst_value", "fecop_tax", "fecop_value",
+        "icmi_value", "icms_tax", "icms_value", "ipi_tax", "ipi_value", "pis_tax", "pis_value",
+        "st_tax", "st_value",
+    ],
+    "info": ["weight", "country_of_origin", "customs_tariff", "possibility_to_return"],
+}
+
+# Chave do produto com as seções extraídas sem erro (não vai para a planilha)
+SECTIONS_OK_KEY = "_sections_ok"
+
+def sections_for_fields(fields) -> tuple:
+    """Abas (na ordem de SECTIONS) necessárias para preencher os campos pedidos."""
+    wanted = set(fields)
+    return tuple(section for section in SECTIONS if wanted & set(SECTION_FIELDS[section]))
+
+# Posição (na lista de células da aba Taxes) do valor de cada imposto
+TAX_FIELDS = [
+    ("cofins", 1), ("difalst", 3), ("fecop", 5),
+    ("icms", 9), ("ipi", 11), ("pis", 13), ("st", 15)
+]
+
+def empty_product(product_code, name, row_num):
+    """Produto disponível com todos os campos de dados vazios."""
+    return {
+        "code": product_code,
+        "name": name,
+        "status": "Disponível",
+        "row_num": row_num,
+        "pricing": "",
+        "discount": "",
+        "pricing_with": "",
+        "cofins_tax": "",
+        "cofins_value": "",
+        "difalst_tax": "",
+        "difalst_value": "",
+        "fecop_tax": "",
+        "fecop_value": "",
+        "icmi_value": "",
+        "icms_tax": "",
+        "icms_value": "",
+        "ipi_tax": "",
+        "ipi_value": "",
+        "pis_tax": "",
+        "pis_value": "",
+        "st_tax": "",
+        "st_value": "",
+        "weight": "",
+        "country_of_origin": "",
+        "customs_tariff": "",
+        "possibility_to_return": ""
+    }
+
+def status_result(product_code, status, row_num):
+    """Resultado sem dados de produto (não encontrado, timeout, erro...)."""
+    return {"code": product_code, "name": "", "status": status, "row_num": row_num}
+
+def _parse_tax(tax_str):
+    """Separa '9,25% (BRL 1,23)' em alíquota e valor."""
+    if not tax_str:
+        return "", ""
+    if "% (BRL " in tax_str:
+        parts = tax_str.split("% (BRL ")
+        return parts[0], parts[1].replace(")", "")
+    elif "BRL " in tax_str:
+        return "", tax_str.split("BRL ")[1]
+    return "", tax_str
+
+def apply_pricing(product, tds):
+    """Preenche os campos de preço a partir das células da aba Pricing."""
+    product["pricing"] = tds[0].replace("R$", "").replace("BRL ", "")
+    product["discount"] = "0" if tds[1] == "-" else tds[1]
+    product["pricing_with"] = tds[2].replace("R$", "").replace("BRL ", "")
+
+def apply_taxes(product, cells):
+    """Mapeia as células da aba Taxes para os campos de impostos."""
+    for field, index in TAX_FIELDS:
+        if len(cells) > index:
+            tax, value = _parse_tax(cells[index])
+            product[f"{field}_tax"] = tax
+            product[f"{field}_value"] = value
+
+def apply_product_info(product, rows):
+    """Mapeia os pares (chave, valor) da aba Product information."""
+    for key, value in rows:
+        key = key.strip().lower()
+        value = value.strip()
+
+        if "country of origin" in key:
+            product["country_of_origin"] = value
+        elif "customs tariff" in key:
+            product["customs_tariff"] = value
+        elif "weight" in key:
+            product["weight"] = value
+        elif "possibility to return" in key:
+            product["possibility_to_return"] = value
+
+PRODUCT_NAME_XPATH = "//*[@id='__next']/div/div/div[1]/div[2]/section/div/div[1]/h1"
+NOT_FOUND_XPATH = f"//h2[contains(., '{NOT_FOUND_TEXT}')]"
+NO_LONGER_AVAILABLE_XPATH = f"//*[contains(text(), '{NO_LONGER_AVAILABLE_TEXT}')]"
+CANNOT_ADD_XPATH = f"//h5[contains(., '{CANNOT_ADD_TEXT}')]"
+PRICE_CELL_XPATH = "(//div[@role='tabpanel']//td)[1][contains(., 'BRL') or contains(., 'R$')]"
+
+
+def active_panel_xpath(tab) -> str:
+    """
+    XPath do painel de uma aba: o indicado por aria-controls ou, sem ele, o
+    tabpanel visível (mesma regra de tabPanel no EXTRACT_SCRIPT). Assim a
+    espera não é satisfeita pela tabela da aba anterior.
+    """
+    panel_id = tab.get_attribute("aria-controls")
+    return f"//*[@id='{panel_id}']" if panel_id else "//div[@role='tabpanel']"
+
+# Modo "script": um único execute_async_script ativa as abas Pricing, Taxes e
+# Product information, espera cada tabela e devolve todos os textos num JSON.
+# As esperas reagem às mutações do DOM (MutationObserver) e o tempo de cada
+# uma volta em result.waits ({espera: [ms, estourou]}).
+# Argumentos: XPaths (nome, não encontrado, indisponível, não adicionável),
+# timeouts em ms (inicial, preço, abas), seções a extrair e o callback do Selenium.
+EXTRACT_SCRIPT = """
+const [nameXPath, notFoundXPath, unavailableXPath, cannotAddXPath,
+       initialTimeout, pricingTimeout, tabTimeout, sections] = arguments;
+const done = arguments[arguments.length - 1];
+const byXPath = xp => document.evaluate(xp, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+const text = el => (el.innerText || el.textContent || "").trim();
+const waitFor = (fn, ms) => new Promise(resolve => {
+    const first = fn();
+    if (first) return resolve(first);
+    const observer = new MutationObserver(() => {
+        const value = fn();
+        if (value) { observer.disconnect(); clearTimeout(timer); resolve(value); }
+    });
+    const timer = setTimeout(() => { observer.disconnect(); resolve(fn() || null); }, ms);
+    observer.observe(document, {childList: true, subtree: true, characterData: true, attributes: true});
+});
+const waits = {};
+const timed = async (name, promise) => {
+    const started = performance.now();
+    let value = null;
+    try { value = await promise; } finally { waits[name] = [performance.now() - started, !value]; }
+    return value;
+};
+const tabButton = label => Array.from(document.querySelectorAll("button")).find(b => b.textContent.includes(label));
+// Painel da aba: o indicado por aria-controls ou, sem ele, o tabpanel visível
+const tabPanel = button => {
+    const id = button.getAttribute("aria-controls");
+    return (id && document.getElementById(id)) || document.querySelector("div[role='tabpanel']");
+};
+// Abre a aba e espera ready(painel). Com changed, o painel também precisa ter
+// mudado de conteúdo desde o clique (o React pode reaproveitar a mesma
+// <table> entre abas, então a identidade do nó não serve de sinal).
+const openTab = async (label, ready, changed) => {
+    const button = await waitFor(() => tabButton(label), tabTimeout);
+    if (!button) throw new Error(`Aba '${label}' não encontrada`);
+    const wasSelected = button.getAttribute("aria-selected") === "true";
+    const before = tabPanel(button);
+    const previous = before ? before.textContent : null;
+    button.click();
+    const found = await waitFor(() => {
+        const current = tabButton(label) || button;
+        if (current.getAttribute("aria-selected") === "false") return null;
+        const panel = tabPanel(current);
+        if (!panel || (changed && !wasSelected && panel.textContent === previous)) return null;
+        const value = ready(panel);
+        return value ? {panel, value} : null;
+    }, label === "Pricing" ? pricingTimeout : tabTimeout);
+    if (!found) throw new Error(`Tempo esgotado aguardando a aba '${label}'`);
+    return found;
+};
+
+(async () => {
+    const result = {state: "found", name: "", pricing: null, taxes: null, info: null, unavailable: false, errors: {}, waits};
+    const first = await timed("initial", waitFor(() => byXPath(nameXPath) || byXPath(notFoundXPath), initialTimeout));
+    if (!first) { result.state = "timeout"; return result; }
+    if (first.tagName.toLowerCase() === "h2") { result.state = "not_found"; return result; }
+    result.name = text(first);
+
+    if (sections.includes("pricing")) {
+        try {
+            // Produto indisponível encerra a espera na hora, sem gastar o prazo do preço
+            const {panel, value} = await timed("pricing", openTab("Pricing", panel => {
+                const td = panel.querySelector("td");
+                if (td && /BRL|R\\$/.test(td.textContent)) return td;
+                return byXPath(unavailableXPath) || byXPath(cannotAddXPath) ? "unavailable" : null;
+            }, false));
+            if (value === "unavailable") {
+                result.unavailable = true;
+                return result;
+            }
+            result.pricing = Array.from(panel.querySelectorAll("td")).map(text);
+        } catch (e) {
+            result.errors.pricing = String(e.message || e);
+            if (byXPath(unavailableXPath) || byXPath(cannotAddXPath)) {
+                result.unavailable = true;
+                return result;
+            }
+        }
+    }
+
+    if (sections.includes("taxes")) {
+        try {
+            const {panel} = await timed("taxes", openTab("Taxes", panel => panel.querySelector("table td[data-cy='informationTableCell']"), true));
+            result.taxes = Array.from(panel.querySelectorAll("td[data-cy='informationTableCell']")).map(text);
+        } catch (e) {
+            result.errors.taxes = String(e.message || e);
+        }
+    }
+
+    if (sections.includes("info")) {
+        try {
+            const {value: table} = await timed("info", openTab("Product information", panel => panel.querySelector("table"), true));
+            result.info = Array.from(table.querySelectorAll("tr"))
+                .map(tr => Array.from(tr.querySelectorAll("td")).map(text))
+                .filter(tds => tds.length >= 2)
+                .map(tds => [tds[0], tds[1]]);
+        } catch (e) {
+            result.errors.info = String(e.message || e);
+        }
+    }
+    return result;
+})().then(result => done(JSON.stringify(result)), e => done(JSON.stringify({state: "error", error: String(e)})));
+"""
+
+# Espera do script -> nome do prazo em AdaptiveTimeouts
+SCRIPT_WAITS = {"initial": "initial", "pricing": "pricing", "taxes": "tab", "info": "tab"}
+
+# Folga (s) do set_script_timeout sobre a soma das esperas do script
+SCRIPT_TIMEOUT_MARGIN = 10
+
+def script_timeout(budgets: dict, sections) -> float:
+    """
+    Pior caso das esperas do EXTRACT_SCRIPT, mais a folga: a inicial e, por
+    aba pedida, a do botão (prazo "tab") e a do conteúdo.
+    """
+    total = budgets["initial"]
+    for section in sections:
+        total += budgets["tab"] + budgets[SCRIPT_WAITS[section]]
+    return total + SCRIPT_TIMEOUT_MARGIN
+
+def _search_product_script(driver, product_code, row_num, log, sections, timeouts, spans=None, worker_id=None):
     """
-    Extrai dados de um produto com estrutura de erro robusta
+    Variante de search_product com uma única ida ao chromedriver após o
+    driver.get: o script injetado devolve todas as células e o mapeamento
+    reaproveita apply_pricing/apply_taxes/apply_product_info.
     """
+    budgets = {name: timeouts.budget(name) for name in ("initial", "pricing", "tab")}
+    driver.set_script_timeout(script_timeout(budgets, sections))
+    with span(spans, "script", worker_id, product_code):
+        blob = json.loads(driver.execute_async_script(
+            EXTRACT_SCRIPT,
+            PRODUCT_NAME_XPATH,
+            NOT_FOUND_XPATH,
+            NO_LONGER_AVAILABLE_XPATH,
+            CANNOT_ADD_XPATH,
+            int(budgets["initial"] * 1000), int(budgets["pricing"] * 1000), int(budgets["tab"] * 1000),
+            list(sections),
+        ))
+    for name, (elapsed_ms, timed_out) in blob.get("waits", {}).items():
+        timeouts.record(SCRIPT_WAITS[name], elapsed_ms / 1000, timed_out=timed_out)
+        if spans:
+            # Mesmas fases do modo padrão, medidas dentro da página
+            spans.record(name, elapsed_ms / 1000, worker_id, product_code, ok=not timed_out)
+
+    state = blob.get("state")
+    if state == "timeout":
+        log(f"❌ Timeout: {product_code}")
+        return status_result(product_code, "Tempo Esgotado", row_num)
+    if state == "not_found":
+        log(f"❌ Não encontrado: {product_code}")
+        return status_result(product_code, "Não Encontrado", row_num)
+    if state != "found":
+        raise RuntimeError(blob.get("error", "resposta inválida do script de extração"))
+
+    product = empty_product(product_code, blob["name"], row_num)
+    errors = blob.get("errors", {})
+
+    if blob.get("unavailable"):
+        log(f"⚠️ Produto indisponível: {product_code}")
+        product["status"] = "Indisponível"
+        log(f"✅ Sucesso (Indisponível): {product_code}")
+        return product
+
+    sections_ok = []
+    if "pricing" in sections:
+        try:
+            if blob.get("pricing") is None:
+                raise RuntimeError(errors.get("pricing", ""))
+            apply_pricing(product, blob["pricing"])
+            sections_ok.append("pricing")
+        except Exception as e:
+            log(f"⚠️ Erro preços: {str(e)}")
+
+    if blob.get("taxes") is not None:
+        apply_taxes(product, blob["taxes"])
+        sections_ok.append("taxes")
+    elif "taxes" in sections:
+        log(f"⚠️ Erro impostos: {errors.get('taxes', '')}")
+
+    if blob.get("info") is not None:
+        apply_product_info(product, blob["info"])
+        sections_ok.append("info")
+    elif "info" in sections:
+        log(f"⚠️ Erro informações: {errors.get('info', '')}")
+
+    product[SECTIONS_OK_KEY] = sections_ok
+    log(f"✅ Sucesso: {product_code}")
+    return product
+
+def search_product(driver, product_code, worker_id=None, row_num=None, log_queue: Optional[queue.Queue] = None,
+                   extraction_mode: str = "standard", sections=SECTIONS, timeouts: Optional[AdaptiveTimeouts] = None,
+                   spans=None):
+    """
+    Extrai dados de um produto com estrutura de erro robusta.
+
+    extraction_mode="script" faz a extração das três abas num único script
+    injetado em vez de uma chamada ao WebDriver por aba/célula.
+    sections limita as abas visitadas (ver SECTIONS); os campos das abas
+    não visitadas ficam vazios. Um produto disponível traz em
+    product[SECTIONS_OK_KEY] as abas lidas sem erro (o cache só renova essas).
+    timeouts define o prazo de cada espera e acumula o tempo gasto nelas;
+    sem ele valem os prazos fixos. spans (timing.SpanRecorder) recebe o tempo
+    de cada fase: driver.get, initial, pricing, taxes e info.
+    """
+    timeouts = timeouts or AdaptiveTimeouts(enabled=False)
  
     log_prefix = f"[Worker {worker_id}] " if worker_id else ""
     log_line = f"linha {row_num}: " if row_num else ""
@@ -23,178 +355,113 @@ def search_product(driver, product_code, worker_id=None, row_num=None, log_queue
 
     try:
         # Acesso à página do produto
-        driver.get(f"https://ctshoponline.atlascopco.com/en-GB/products/{product_code}")
+        with span(spans, "driver.get", worker_id, product_code):
+            driver.get(PRODUCT_URL.format(code=product_code))
         _log(f"{log_prefix}{log_line}Acessando: {product_code}")
-        
-        # Localizadores
-        locators = {
-            "product_name": (By.XPATH, "//*[@id='__next']/div/div/div[1]/div[2]/section/div/div[1]/h1"),
-            "not_found": (By.XPATH, "//h2[contains(., 'The server cannot find the requested resource.')]"),
-            "no_longer_available": (By.XPATH, "//*[contains(text(), 'The product is no longer available')]"),
-            "cannot_add": (By.XPATH, "//h5[contains(., 'Product cannot be added to cart')]")
-        }
 
-        # Verificação inicial
+        if extraction_mode == "script":
+            return _search_product_script(driver, product_code, row_num, lambda message: _log(f"{log_prefix}{log_line}{message}"),
+                                          sections, timeouts, spans, worker_id)
+
+        # Verificação inicial: resolve assim que o nome ou a página de erro aparecer
         try:
-            element = WebDriverWait(driver, 10).until(
-                EC.any_of(
-                    EC.presence_of_element_located(locators["product_name"]),
-                    EC.presence_of_element_located(locators["not_found"])
-                )
-            )
+            with span(spans, "initial", worker_id, product_code):
+                index, element = timeouts.wait(driver, "initial", PRODUCT_NAME_XPATH, NOT_FOUND_XPATH)
         except TimeoutException:
             _log(f"{log_prefix}{log_line}❌ Timeout: {product_code}")
-            return {"code": product_code, "name": "", "status": "Tempo Esgotado", "row_num": row_num}
+            return status_result(product_code, "Tempo Esgotado", row_num)
 
         # Verifica se produto não foi encontrado
-        if element.tag_name == 'h2':
+        if index == 1:
             _log(f"{log_prefix}{log_line}❌ Não encontrado: {product_code}")
-            return {"code": product_code, "name": "", "status": "Não Encontrado", "row_num": row_num}
+            return status_result(product_code, "Não Encontrado", row_num)
 
         # Inicializa produto com campos vazios
-        product = {
-            "code": product_code,
-            "name": element.text,
-            "status": "Disponível",
-            "row_num": row_num,
-            "pricing": "",
-            "discount": "",
-            "pricing_with": "",
-            "cofins_tax": "",
-            "cofins_value": "",
-            "difalst_tax": "",
-            "difalst_value": "",
-            "fecop_tax": "",
-            "fecop_value": "",
-            "icmi_value": "",
-            "icms_tax": "",
-            "icms_value": "",
-            "ipi_tax": "",
-            "ipi_value": "",
-            "pis_tax": "",
-            "pis_value": "",
-            "st_tax": "",
-            "st_value": "",
-            "weight": "",
-            "country_of_origin": "",
-            "customs_tariff": "",
-            "possibility_to_return": ""
-        }
+        product = empty_product(product_code, element.text, row_num)
+        sections_ok = []
 
         # SEÇÃO 1: EXTRAÇÃO DE PREÇOS
-        try:
-            # Muda para aba de Pricing
-            pricing_tab = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(., 'Pricing')]"))
-            )
-            driver.execute_script("arguments[0].click();", pricing_tab)
-            xpath_com_condicao = "(//div[@role='tabpanel']//td)[1][contains(., 'BRL') or contains(., 'R$')]"
-            # Aguarda dados carregarem
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.XPATH, xpath_com_condicao))
-            ).text
-            # Extrai dados de preço
-            tds = [td.text for td in driver.find_elements(By.XPATH, "//div[@role='tabpanel']//td")]
-
-
-            product["pricing"] = tds[0].replace("R$", "").replace("BRL ", "")
-            product["discount"] = "0" if tds[1] == "-" else tds[1]
-            product["pricing_with"] = tds[2].replace("R$", "").replace("BRL ", "")
-
-                
-        except Exception as e:
+        if "pricing" in sections:
+            try:
+                with span(spans, "pricing", worker_id, product_code):
+                    # Muda para aba de Pricing
+                    _, pricing_tab = timeouts.wait(driver, "tab", "//button[contains(., 'Pricing')]")
+                    driver.execute_script("arguments[0].click();", pricing_tab)
+                    # Aguarda o preço ou, para produto indisponível, o aviso (sem gastar o prazo inteiro)
+                    index, _ = timeouts.wait(driver, "pricing", PRICE_CELL_XPATH, NO_LONGER_AVAILABLE_XPATH, CANNOT_ADD_XPATH)
+                    if index == 0:
+                        # Extrai dados de preço
+                        tds = [td.text for td in driver.find_elements(By.XPATH, "//div[@role='tabpanel']//td")]
+                        apply_pricing(product, tds)
+                        sections_ok.append("pricing")
+                if index > 0:
+                    _log(f"{log_prefix}{log_line}⚠️ Produto indisponível: {product_code}")
+                    product["status"] = "Indisponível"
+                    _log(f"{log_prefix}{log_line}✅ Sucesso (Indisponível): {product_code}")
+                    return product
+
+            except Exception as e:
    
-            # Se falhar, verifica se o produto está indisponível
-            if driver.find_elements(*locators["no_longer_available"]) or driver.find_elements(*locators["cannot_add"]):
-                _log(f"{log_prefix}{log_line}⚠️ Produto indisponível: {product_code}")
-                product["status"] = "Indisponível"
-                # Retorna o produto aqui, pois não haverá mais dados
-                _log(f"{log_prefix}{log_line}✅ Sucesso (Indisponível): {product_code}")
-                return product
-            else:
-                _log(f"{log_prefix}{log_line}⚠️ Erro preços: {str(e)}")
+                # Se falhar, verifica se o produto está indisponível
+                if driver.find_elements(By.XPATH, NO_LONGER_AVAILABLE_XPATH) or driver.find_elements(By.XPATH, CANNOT_ADD_XPATH):
+                    _log(f"{log_prefix}{log_line}⚠️ Produto indisponível: {product_code}")
+                    product["status"] = "Indisponível"
+                    # Retorna o produto aqui, pois não haverá mais dados
+                    _log(f"{log_prefix}{log_line}✅ Sucesso (Indisponível): {product_code}")
+                    return product
+                else:
+                    _log(f"{log_prefix}{log_line}⚠️ Erro preços: {str(e)}")
 
         # SEÇÃO 2: EXTRAÇÃO DE IMPOSTOS
-        try:
-            # Muda para aba de Taxes
-            taxes_tab = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(., 'Taxes')]"))
-            )
-            driver.execute_script("arguments[0].click();", taxes_tab)
-            
-            # Aguarda dados carregarem
-            table = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "//div[@role='tabpanel']//table"))
-            )
-            
-            # Extrai células da tabela
-            cells = [cell.text for cell in driver.find_elements(
-                By.XPATH, "//div[@role='tabpanel']//td[@data-cy='informationTableCell']"
-            )]
-            
-            # Processamento de valores fiscais
-            def _parse_tax(tax_str):
-                if not tax_str:
-                    return "", ""
-                if "% (BRL " in tax_str:
-                    parts = tax_str.split("% (BRL ")
-                    return parts[0], parts[1].replace(")", "")
-                elif "BRL " in tax_str:
-                    return "", tax_str.split("BRL ")[1]
-                return "", tax_str
-
-            # Mapeia células para campos (com verificação de índice)
-            tax_fields = [
-                ("cofins", 1), ("difalst", 3), ("fecop", 5),
-                ("icms", 9), ("ipi", 11), ("pis", 13), ("st", 15)
-            ]
-            
-            for field, index in tax_fields:
-                if len(cells) > index:
-                    tax, value = _parse_tax(cells[index])
-                    product[f"{field}_tax"] = tax
-                    product[f"{field}_value"] = value
+        if "taxes" in sections:
+            try:
+                with span(spans, "taxes", worker_id, product_code):
+                    # Muda para aba de Taxes
+                    _, taxes_tab = timeouts.wait(driver, "tab", "//button[contains(., 'Taxes')]")
+                    driver.execute_script("arguments[0].click();", taxes_tab)
+
+                    # Aguarda as células de impostos no painel desta aba
+                    cell_xpath = active_panel_xpath(taxes_tab) + "//td[@data-cy='informationTableCell']"
+                    timeouts.wait(driver, "tab", cell_xpath)
+
+                    # Extrai células da tabela
+                    cells = [cell.text for cell in driver.find_elements(By.XPATH, cell_xpath)]
+
+                    # Mapeia células para campos (com verificação de índice)
+                    apply_taxes(product, cells)
+                    sections_ok.append("taxes")
                     
-        except Exception as e:
-            _log(f"{log_prefix}{log_line}⚠️ Erro impostos: {str(e)}")
+            except Exception as e:
+                _log(f"{log_prefix}{log_line}⚠️ Erro impostos: {str(e)}")
 
         # SEÇÃO 3: INFORMAÇÕES DO PRODUTO
-        try:
-            # Muda para aba de informações
-            info_tab = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(., 'Product information')]"))
-            )
-            driver.execute_script("arguments[0].click();", info_tab)
-            
-            # Aguarda tabela carregar
-            table = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "//div[@role='tabpanel']//table"))
-            )
-            
-            # Processa linhas da tabela
-            for tr in table.find_elements(By.TAG_NAME, "tr"):
-                tds = tr.find_elements(By.TAG_NAME, "td")
-                if len(tds) < 2:
-                    continue
-                    
-                key = tds[0].text.strip().lower()
-                value = tds[1].text.strip()
-                
-                if "country of origin" in key:
-                    product["country_of_origin"] = value
-                elif "customs tariff" in key:
-                    product["customs_tariff"] = value
-                elif "weight" in key:
-                    product["weight"] = value
-                elif "possibility to return" in key:
-                    product["possibility_to_return"] = value
+        if "info" in sections:
+            try:
+                with span(spans, "info", worker_id, product_code):
+                    # Muda para aba de informações
+                    _, info_tab = timeouts.wait(driver, "tab", "//button[contains(., 'Product information')]")
+                    driver.execute_script("arguments[0].click();", info_tab)
+
+                    # Aguarda a tabela no painel desta aba
+                    _, table = timeouts.wait(driver, "tab", active_panel_xpath(info_tab) + "//table")
+
+                    # Processa linhas da tabela
+                    rows = []
+                    for tr in table.find_elements(By.TAG_NAME, "tr"):
+                        tds = tr.find_elements(By.TAG_NAME, "td")
+                        if len(tds) < 2:
+                            continue
+                        rows.append((tds[0].text, tds[1].text))
+                    apply_product_info(product, rows)
+                    sections_ok.append("info")
                     
-        except Exception as e:
-            _log(f"{log_prefix}{log_line}⚠️ Erro informações: {str(e)}")
+            except Exception as e:
+                _log(f"{log_prefix}{log_line}⚠️ Erro informações: {str(e)}")
 
+        product[SECTIONS_OK_KEY] = sections_ok
         _log(f"{log_prefix}{log_line}✅ Sucesso: {product_code}")
         return product
 
     except Exception as e:
         _log(f"{log_prefix}{log_line}❌ ERRO GRAVE: {str(e)}")
-        return {"code": product_code, "name": "", "status": f"ERRO GRAVE: {str(e)}", "row_num": row_num}
\ No newline at end of file
+        return status_result(product_code, f"ERRO GRAVE: {str(e)}", row_num)
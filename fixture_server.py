@@ -0,0 +1,365 @@
+"""
+Loja falsa para testes e benchmarks offline: imita o fluxo de login e o DOM
+da página de produto que login.py e extractor.py esperam.
+
+    python fixture_server.py --port 8765 --latency-ms 300 --error-rate 0.01
+    SHOP_BASE_URL=http://127.0.0.1:8765 python cli.py entrada.xlsx
+
+Fluxo de login: /pt-BR/login (banner OneTrust + 'Conecte-se') -> /sso/email
+-> /sso/password (idSIButton9) -> /sso/kmsi (idBtn_Back) -> página inicial
+com 'Welcome Vendas'. Qualquer usuário/senha é aceito.
+
+Páginas de produto em /en-GB/products/{código}, com as abas Pricing, Taxes e
+Product information montadas no navegador. A variante de cada código (normal,
+não encontrado, indisponível, não adicionável) é fixa, derivada de um hash
+do código, e as falhas (HTTP 500, página que trava) são sorteadas a cada
+requisição.
+"""
+import argparse
+import html
+import json
+import random
+import secrets
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from extractor import NOT_FOUND_TEXT, NO_LONGER_AVAILABLE_TEXT, CANNOT_ADD_TEXT
+
+DEFAULT_FIXTURE = {
+    "latency_ms": 0,          # atraso de cada página (produto e login)
+    "jitter_ms": 0,           # variação uniforme (+/-) sobre o atraso
+    "tab_latency_ms": 0,      # tempo até a tabela de uma aba aparecer após o clique
+    "not_found_rate": 0.05,   # fração dos códigos que não existem
+    "unavailable_rate": 0.03, # fração dos códigos "no longer available"
+    "cannot_add_rate": 0.02,  # fração dos códigos "cannot be added to cart"
+    "error_rate": 0.0,        # chance de HTTP 500 por requisição de produto
+    "hang_rate": 0.0,         # chance de a página de produto travar por hang_seconds
+    "hang_seconds": 60,
+    "session_ttl": None,      # segundos até a sessão expirar (None: não expira)
+    "ssr": False,             # repete as tabelas em <noscript>, legíveis pelo http_extractor
+    "seed": None,
+}
+
+SESSION_COOKIE = "fixture_session"
+
+TAX_LABELS = ("COFINS", "DIFAL ST", "FECOP", "ICMI", "ICMS", "IPI", "PIS", "ST")
+TAX_RATES = (9.25, 0.0, 2.0, 0.0, 18.0, 3.25, 1.65, 0.0)
+COUNTRIES = ("SE", "BE", "DE", "IT", "US", "CN", "BR")
+
+PAGE = """<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>{title}</title></head>
+<body>{body}</body></html>"""
+
+LOGIN_PAGE = """
+<div id="onetrust-banner-sdk"><p>Cookies</p>
+<button id="onetrust-accept-btn-handler" onclick="document.cookie='OptanonAlertBoxClosed=1; path=/'; this.parentNode.remove();">Aceitar todos os cookies</button></div>
+<button onclick="location.href='/sso/email'">Conecte-se</button>"""
+
+EMAIL_PAGE = """
+<form method="post" action="/sso/email"><input type="email" name="loginfmt">
+<input type="submit" value="Avançar"></form>"""
+
+PASSWORD_PAGE = """
+<form method="post" action="/sso/password"><input type="password" name="passwd">
+<input type="submit" id="idSIButton9" value="Entrar"></form>"""
+
+KMSI_PAGE = """
+<form method="post" action="/sso/kmsi"><p>Continuar conectado?</p>
+<input type="submit" id="idBtn_Back" value="Não"></form>"""
+
+LANDING_PAGE = """<div id="__next"><p>Welcome <b>Vendas</b></p></div>"""
+
+# Layout mínimo que satisfaz PRODUCT_NAME_XPATH:
+# //*[@id='__next']/div/div/div[1]/div[2]/section/div/div[1]/h1
+PRODUCT_PAGE = """
+<div id="__next"><div><div><div><div>Menu</div><div><section><div>
+<div><h1>{name}</h1>{notice}</div>
+<div><div role="tablist">
+<button role="tab" aria-selected="false" data-tab="pricing">Pricing</button>
+<button role="tab" aria-selected="false" data-tab="taxes">Taxes</button>
+<button role="tab" aria-selected="false" data-tab="info">Product information</button>
+</div><div id="tab-panel"></div></div>
+{ssr}
+</div></section></div></div></div></div></div>
+<template id="tab-pricing"><div role="tabpanel">{pricing}</div></template>
+<template id="tab-taxes"><div role="tabpanel">{taxes}</div></template>
+<template id="tab-info"><div role="tabpanel">{info}</div></template>
+<script>
+const panel = document.getElementById("tab-panel");
+let pending = 0;
+for (const button of document.querySelectorAll("button[role=tab]")) {{
+    button.addEventListener("click", () => {{
+        for (const other of document.querySelectorAll("button[role=tab]"))
+            other.setAttribute("aria-selected", other === button ? "true" : "false");
+        const token = ++pending;
+        panel.innerHTML = '<div role="tabpanel"><p>Loading...</p></div>';
+        setTimeout(() => {{
+            if (token !== pending) return;
+            panel.replaceChildren(document.getElementById("tab-" + button.dataset.tab).content.cloneNode(true));
+        }}, {tab_latency_ms});
+    }});
+}}
+</script>"""
+
+NOT_FOUND_PAGE = """<div id="__next"><div><h2>{text}</h2></div></div>""".format(text=NOT_FOUND_TEXT)
+
+
+def _money(value: float) -> str:
+    """1234.5 -> '1.234,50' (formato da loja)."""
+    return f"{value:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def product_variant(code: str, options: dict) -> str:
+    """Variante fixa do código: "found", "not_found", "unavailable" ou "cannot_add"."""
+    fraction = zlib.crc32(code.encode("utf-8")) / 2 ** 32
+    for variant, rate in (("not_found", options["not_found_rate"]), ("unavailable", options["unavailable_rate"]),
+                          ("cannot_add", options["cannot_add_rate"])):
+        if fraction < rate:
+            return variant
+        fraction -= rate
+    return "found"
+
+
+def product_data(code: str) -> dict:
+    """Dados determinísticos do produto: preço, desconto, impostos e informações."""
+    seed = zlib.crc32(code.encode("utf-8"))
+    price = 10 + seed % 500000 / 100
+    discount = seed % 4 * 5
+    net = price * (1 - discount / 100)
+    taxes = [(label, rate, net * rate / 100) for label, rate in zip(TAX_LABELS, TAX_RATES)]
+    return {
+        "name": f"Fixture part {code}",
+        "pricing": [f"BRL {_money(price)}", f"{discount}%" if discount else "-",
+                    f"BRL {_money(net + sum(value for _, _, value in taxes))}"],
+        "taxes": taxes,
+        "info": [
+            ("Country of origin", COUNTRIES[seed % len(COUNTRIES)]),
+            ("Customs tariff", f"{8400 + seed % 100}.{seed % 90 + 10}.00"),
+            ("Weight", f"{seed % 5000 / 100:.2f} kg"),
+            ("Possibility to return", "Yes" if seed % 3 else "No"),
+        ],
+    }
+
+
+def _table(rows, data_cy=None) -> str:
+    cell = f'<td data-cy="{data_cy}">' if data_cy else "<td>"
+    body = "".join("<tr>" + "".join(f"{cell}{html.escape(str(value))}</td>" for value in row) + "</tr>" for row in rows)
+    return f"<table><tbody>{body}</tbody></table>"
+
+
+def render_product(code: str, variant: str, options: dict) -> str:
+    data = product_data(code)
+    if variant == "found":
+        pricing = _table([data["pricing"]])
+        notice = ""
+    else:
+        # Sem preço: a aba mostra só traços e o aviso já está na página
+        pricing = _table([["-", "-", "-"]])
+        notice = (f"<p>{NO_LONGER_AVAILABLE_TEXT}</p>" if variant == "unavailable"
+                  else f"<h5>{CANNOT_ADD_TEXT}</h5>")
+    taxes = _table([(label, f"{rate:g}%".replace(".", ",") + f" (BRL {_money(value)})") for label, rate, value in data["taxes"]],
+                   data_cy="informationTableCell")
+    info = _table(data["info"])
+    ssr = f"<noscript>{pricing}{taxes}{info}</noscript>" if options["ssr"] and variant == "found" else ""
+    body = PRODUCT_PAGE.format(name=html.escape(data["name"]), notice=notice, pricing=pricing, taxes=taxes, info=info,
+                               ssr=ssr, tab_latency_ms=int(options["tab_latency_ms"]))
+    return PAGE.format(title=html.escape(data["name"]), body=body)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FixtureShop/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def shop(self) -> "FixtureShop":
+        return self.server.shop
+
+    def _send(self, status: int, body: str = "", headers=()):
+        payload = body.encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _redirect(self, location: str, headers=()):
+        self._send(302, "", [("Location", location), *headers])
+
+    def _page(self, title: str, body: str):
+        self._send(200, PAGE.format(title=title, body=body))
+
+    def _session(self):
+        for part in self.headers.get("Cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == SESSION_COOKIE and self.shop.valid_session(value):
+                return value
+        return None
+
+    def do_GET(self):
+        path = urlsplit(self.path).path.rstrip("/") or "/"
+        self.shop.delay()
+        if path in ("/", "/pt-BR"):
+            if self._session():
+                return self._page("CT Shop", LANDING_PAGE)
+            return self._page("CT Shop", '<div id="__next"><a href="/pt-BR/login">Login</a></div>')
+        if path == "/pt-BR/login":
+            return self._page("Login", LOGIN_PAGE)
+        if path == "/sso/email":
+            return self._page("Entrar", EMAIL_PAGE)
+        if path == "/sso/password":
+            return self._page("Senha", PASSWORD_PAGE)
+        if path == "/sso/kmsi":
+            return self._page("Continuar conectado?", KMSI_PAGE)
+        if path.startswith("/en-GB/products/"):
+            return self._product(path.rsplit("/", 1)[1])
+        self._send(404, PAGE.format(title="404", body=NOT_FOUND_PAGE))
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        path = urlsplit(self.path).path
+        if path == "/sso/email":
+            return self._redirect("/sso/password")
+        if path == "/sso/password":
+            return self._redirect("/sso/kmsi")
+        if path == "/sso/kmsi":
+            token = self.shop.new_session()
+            return self._redirect("/pt-BR/", [("Set-Cookie", f"{SESSION_COOKIE}={token}; Path=/; HttpOnly")])
+        self._send(404)
+
+    def _product(self, code: str):
+        if not self._session():
+            self.shop.count("redirect")
+            return self._redirect("/pt-BR/login")
+        fault = self.shop.fault()
+        if fault == "error":
+            return self._send(500, PAGE.format(title="500", body="<h1>Internal Server Error</h1>"))
+        if fault == "hang":
+            time.sleep(self.shop.options["hang_seconds"])
+        variant = product_variant(code, self.shop.options)
+        self.shop.count(variant)
+        if variant == "not_found":
+            return self._send(404, PAGE.format(title="404", body=NOT_FOUND_PAGE))
+        self._send(200, render_product(code, variant, self.shop.options))
+
+
+class FixtureShop:
+    """
+    Servidor HTTP local (uma thread por conexão) da loja falsa. Use como
+    contexto ou com start()/stop(); base_url é o valor para SHOP_BASE_URL.
+    As opções são as de DEFAULT_FIXTURE.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **options):
+        unknown = set(options) - set(DEFAULT_FIXTURE)
+        if unknown:
+            raise ValueError(f"Opções desconhecidas: {', '.join(sorted(unknown))}")
+        self.options = {**DEFAULT_FIXTURE, **options}
+        self._random = random.Random(self.options["seed"])
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self.counts = {}
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.block_on_close = False
+        self._server.shop = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FixtureShop":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def count(self, name: str):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def delay(self):
+        latency = self.options["latency_ms"]
+        jitter = self.options["jitter_ms"]
+        with self._lock:
+            seconds = max(0.0, latency + self._random.uniform(-jitter, jitter)) / 1000
+        if seconds:
+            time.sleep(seconds)
+
+    def fault(self):
+        """Falha sorteada para esta requisição de produto: "error", "hang" ou None."""
+        with self._lock:
+            draw = self._random.random()
+        if draw < self.options["error_rate"]:
+            self.count("error")
+            return "error"
+        if draw < self.options["error_rate"] + self.options["hang_rate"]:
+            self.count("hang")
+            return "hang"
+        return None
+
+    def new_session(self) -> str:
+        token = secrets.token_hex(16)
+        with self._lock:
+            self._sessions[token] = time.time()
+            self.counts["login"] = self.counts.get("login", 0) + 1
+        return token
+
+    def valid_session(self, token: str) -> bool:
+        with self._lock:
+            created = self._sessions.get(token)
+        ttl = self.options["session_ttl"]
+        return created is not None and (ttl is None or time.time() - created < ttl)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Loja falsa local para testes e benchmarks offline.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    for name, default in DEFAULT_FIXTURE.items():
+        if name == "ssr":
+            parser.add_argument("--ssr", action="store_true", help="Tabelas também no HTML (http_extractor)")
+        elif name != "seed":
+            parser.add_argument(f"--{name.replace('_', '-')}", type=float, default=default)
+    parser.add_argument("--seed", type=int)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = vars(parse_args(argv))
+    host, port = args.pop("host"), args.pop("port")
+    shop = FixtureShop(host, port, **args).start()
+    print(f"Loja falsa em {shop.base_url} (SHOP_BASE_URL={shop.base_url}). Ctrl+C para sair.", flush=True)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shop.stop()
+        print(json.dumps(shop.counts, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import contextlib
+import threading
+import time
+from collections import deque
+
+import psutil
+
+# Janela (s) do cálculo de itens/min de cada worker
+HEALTH_WINDOW = 60
+
+
+class WorkerHealth:
+    """
+    Estado de cada worker para o painel de saúde: itens/min numa janela
+    deslizante, produto atual e há quanto tempo está nele, reinícios de
+    navegador, timeouts/erros e RSS/CPU da árvore de processos do Chrome.
+
+    Alimentado por item_done() e pelos eventos dos workers (event()), que em
+    modo multiprocesso chegam pela ponte de ProcessChannels.
+    """
+
+    def __init__(self, window: float = HEALTH_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._workers = {}
+        self._procs = {}  # pid -> psutil.Process, para o cpu_percent entre leituras
+        self._procs_lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self._workers.clear()
+
+    def _state(self, worker_id) -> dict:
+        state = self._workers.get(worker_id)
+        if state is None:
+            state = self._workers[worker_id] = {
+                "started": time.time(), "status": "login", "code": None, "row": None, "since": None,
+                "done": deque(), "items": 0, "restarts": 0, "timeouts": 0, "errors": 0, "browser_pid": None,
+                "ended": None,
+            }
+        return state
+
+    def event(self, worker_id, name: str, *args):
+        """
+        Eventos do worker: "start", "task" (código, linha), "restart",
+        "browser" (pid do chromedriver) e "exit".
+        """
+        with self._lock:
+            state = self._state(worker_id)
+            if name == "task":
+                state["code"], state["row"] = args
+                state["since"] = time.time()
+                state["status"] = "trabalhando"
+            elif name == "restart":
+                state["restarts"] += 1
+                state["status"] = "reiniciando"
+                state["code"] = state["row"] = state["since"] = None
+            elif name == "browser":
+                state["browser_pid"] = args[0]
+                if state["status"] in ("login", "reiniciando"):
+                    state["status"] = "ocioso"
+            elif name == "exit":
+                state["status"] = "finalizado"
+                state["ended"] = time.time()
+                state["code"] = state["row"] = state["since"] = None
+                state["browser_pid"] = None
+
+    def item_done(self, worker_id, latency: float, status: str):
+        now = time.time()
+        with self._lock:
+            state = self._state(worker_id)
+            state["done"].append(now)
+            state["items"] += 1
+            status = str(status or "")
+            if status.startswith("Tempo Esgotado"):
+                state["timeouts"] += 1
+            elif status.startswith(("ERRO", "Falha Persistente")):
+                state["errors"] += 1
+            state["code"] = state["row"] = state["since"] = None
+            if state["status"] == "trabalhando":
+                state["status"] = "ocioso"
+
+    def retire_missing(self, alive_ids, grace: float = 5):
+        """Marca como finalizados os workers fora de `alive_ids` (após `grace` s do início)."""
+        now = time.time()
+        with self._lock:
+            for worker_id, state in self._workers.items():
+                if not state["ended"] and worker_id not in alive_ids and now - state["started"] > grace:
+                    state["status"], state["ended"] = "finalizado", now
+                    state["code"] = state["row"] = state["since"] = state["browser_pid"] = None
+
+    def browser_pid(self, worker_id):
+        with self._lock:
+            state = self._workers.get(worker_id)
+            return state["browser_pid"] if state else None
+
+    def snapshot(self) -> list:
+        """
+        Uma linha por worker: worker_id, status, items_per_min (janela),
+        items, code, row, on_current (s no produto atual), restarts,
+        timeouts, errors, rss_mb e cpu (% da árvore do Chrome).
+        """
+        now = time.time()
+        rows = []
+        with self._lock:
+            # Finalizados saem do painel depois de uma janela
+            for worker_id in [w for w, s in self._workers.items() if s["ended"] and now - s["ended"] > self.window]:
+                del self._workers[worker_id]
+            for worker_id, state in sorted(self._workers.items(), key=lambda item: str(item[0])):
+                done = state["done"]
+                while done and now - done[0] > self.window:
+                    done.popleft()
+                elapsed = min(self.window, now - state["started"])
+                rows.append({
+                    "worker_id": worker_id,
+                    "status": state["status"],
+                    "items_per_min": len(done) / elapsed * 60 if elapsed > 1 else 0.0,
+                    "items": state["items"],
+                    "code": state["code"],
+                    "row": state["row"],
+                    "on_current": now - state["since"] if state["since"] else None,
+                    "restarts": state["restarts"],
+                    "timeouts": state["timeouts"],
+                    "errors": state["errors"],
+                    "browser_pid": state["browser_pid"],
+                })
+        seen = set()
+        with self._procs_lock:
+            for row in rows:
+                row["rss_mb"], row["cpu"] = self._tree_usage(row.pop("browser_pid"), seen)
+            # Processos que sumiram saem do cache
+            for pid in set(self._procs) - seen:
+                self._procs.pop(pid, None)
+        return rows
+
+    def _tree_usage(self, pid, seen: set):
+        """RSS (MB) e CPU (%) somados do chromedriver e de todo o Chrome abaixo dele."""
+        if not pid:
+            return None, None
+        try:
+            root = self._process(pid)
+            tree = [root, *root.children(recursive=True)]
+        except psutil.Error:
+            return None, None
+        rss = cpu = 0.0
+        for proc in tree:
+            proc = self._process(proc.pid, proc)
+            seen.add(proc.pid)
+            with contextlib.suppress(psutil.Error):
+                rss += proc.memory_info().rss
+                cpu += proc.cpu_percent(interval=None)
+        return rss / (1024 * 1024), cpu
+
+    def _process(self, pid, fresh=None):
+        cached = self._procs.get(pid)
+        # is_running confere o create_time: PID reaproveitado ganha objeto novo
+        if cached is None or not cached.is_running():
+            cached = self._procs[pid] = fresh or psutil.Process(pid)
+        return cached
@@ -0,0 +1,272 @@
+import json
+import queue
+from html.parser import HTMLParser
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from extractor import (
+    PRODUCT_URL, NOT_FOUND_TEXT, NO_LONGER_AVAILABLE_TEXT, CANNOT_ADD_TEXT, SECTIONS_OK_KEY,
+    empty_product, status_result, apply_pricing, apply_taxes, apply_product_info,
+)
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36"
+)
+# Cabeçalhos de navegador enviados pelos dois motores HTTP
+BROWSER_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "en-GB,en;q=0.9",
+}
+
+# Rótulos que identificam cada tabela da página de produto
+TAX_LABELS = ("cofins", "icms")
+INFO_LABELS = ("country of origin", "customs tariff", "weight", "possibility to return")
+# Chaves do __NEXT_DATA__ que guardam a lista de atributos do produto
+ATTRIBUTE_LIST_KEYS = ("attributes", "productAttributes", "productInformation", "specifications")
+
+
+class SessionExpiredError(Exception):
+    """A loja redirecionou para o login: os cookies compartilhados expiraram."""
+
+
+class _ProductPageParser(HTMLParser):
+    """
+    Coleta, do HTML renderizado no servidor, o que o extractor Selenium lê do
+    DOM: o h1 dentro de #__next, os textos de h2/h5 e as tabelas (com o
+    atributo data-cy de cada célula), além do payload __NEXT_DATA__.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.name = ""
+        self.headings = []
+        self.tables = []
+        self.text_chunks = []
+        self.next_data = ""
+        self._next_depth = 0
+        self._in_next_data = False
+        self._heading = None
+        self._cell = None
+        self._row = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "script" and attrs.get("id") == "__NEXT_DATA__":
+            self._in_next_data = True
+            return
+        if tag == "div":
+            if self._next_depth:
+                self._next_depth += 1
+            elif attrs.get("id") == "__next":
+                self._next_depth = 1
+        if not self._next_depth:
+            return
+        if tag in ("h1", "h2", "h5"):
+            self._heading = [tag, ""]
+        elif tag == "table":
+            self.tables.append([])
+        elif tag == "tr" and self.tables:
+            self._row = []
+            self.tables[-1].append(self._row)
+        elif tag == "td" and self._row is not None:
+            self._cell = [attrs.get("data-cy"), ""]
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._in_next_data:
+            self._in_next_data = False
+            return
+        if not self._next_depth:
+            return
+        if tag == "div":
+            self._next_depth -= 1
+        elif tag in ("h1", "h2", "h5") and self._heading and self._heading[0] == tag:
+            text = " ".join(self._heading[1].split())
+            if tag == "h1" and not self.name:
+                self.name = text
+            self.headings.append((tag, text))
+            self._heading = None
+        elif tag == "td" and self._cell is not None:
+            self._row.append((self._cell[0], " ".join(self._cell[1].split())))
+            self._cell = None
+        elif tag == "tr":
+            self._row = None
+
+    def handle_data(self, data):
+        if self._in_next_data:
+            self.next_data += data
+            return
+        if not self._next_depth:
+            return
+        self.text_chunks.append(data)
+        if self._heading is not None:
+            self._heading[1] += data
+        if self._cell is not None:
+            self._cell[1] += data
+
+
+def _label_value_pairs(node):
+    """
+    Pares {label, value} das listas de atributos do produto no JSON do
+    Next.js; o resto do payload (menus, filtros, traduções) é ignorado.
+    """
+    if isinstance(node, dict):
+        for key, child in node.items():
+            if key in ATTRIBUTE_LIST_KEYS and isinstance(child, list):
+                yield from _attribute_pairs(child)
+            else:
+                yield from _label_value_pairs(child)
+    elif isinstance(node, list):
+        for child in node:
+            yield from _label_value_pairs(child)
+
+
+def _attribute_pairs(items):
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        label = next((item[k] for k in ("label", "name", "key", "title") if isinstance(item.get(k), str)), None)
+        value = next((item[k] for k in ("value", "formattedValue", "displayValue") if isinstance(item.get(k), (str, int, float))), None)
+        if label is not None and value is not None:
+            yield label, str(value)
+
+
+def _is_info_label(label: str) -> bool:
+    label = label.strip().lower()
+    return any(info in label for info in INFO_LABELS)
+
+
+def load_session_cookies(jar, session: dict):
+    """Substitui os cookies de `jar` (RequestsCookieJar) pelos da sessão exportada (formato CDP)."""
+    jar.clear()
+    for cookie in session.get("cookies", []):
+        jar.set(
+            cookie["name"], cookie["value"],
+            domain=cookie.get("domain", ""), path=cookie.get("path", "/"),
+        )
+
+
+def parse_product_page(html: str, product_code, row_num=None) -> Optional[dict]:
+    """
+    Converte a página de produto renderizada no servidor no mesmo dicionário
+    retornado por extractor.search_product.
+
+    Retorna None quando a página não traz os dados necessários (por exemplo,
+    quando as abas só são montadas no navegador); nesse caso o chamador deve
+    recorrer ao extractor Selenium.
+    """
+    parser = _ProductPageParser()
+    parser.feed(html)
+    parser.close()
+
+    if any(tag == "h2" and NOT_FOUND_TEXT in text for tag, text in parser.headings):
+        return status_result(product_code, "Não Encontrado", row_num)
+    if not parser.name:
+        return None
+
+    product = empty_product(product_code, parser.name, row_num)
+
+    page_text = " ".join("".join(parser.text_chunks).split())
+    if NO_LONGER_AVAILABLE_TEXT in page_text or any(tag == "h5" and CANNOT_ADD_TEXT in text for tag, text in parser.headings):
+        product["status"] = "Indisponível"
+        return product
+
+    pricing_found = False
+    taxes_found = False
+    info_rows = []
+    for table in parser.tables:
+        cells = [text for row in table for _, text in row]
+        if not cells:
+            continue
+        labels = " ".join(cells).lower()
+        if not pricing_found and len(cells) >= 3 and ("BRL" in cells[0] or "R$" in cells[0]):
+            apply_pricing(product, cells)
+            pricing_found = True
+        elif any(label in labels for label in TAX_LABELS):
+            apply_taxes(product, [text for row in table for data_cy, text in row if data_cy == "informationTableCell"])
+            taxes_found = True
+        elif any(label in labels for label in INFO_LABELS):
+            info_rows.extend((row[0][1], row[1][1]) for row in table if len(row) >= 2)
+
+    # Dados que não vieram nas tabelas podem estar no payload do Next.js
+    if parser.next_data:
+        try:
+            info_rows.extend(_label_value_pairs(json.loads(parser.next_data)))
+        except ValueError:
+            pass
+    info_rows = [(label, value) for label, value in info_rows if _is_info_label(label)]
+    apply_product_info(product, info_rows)
+
+    if not pricing_found:
+        return None
+    # "info" só conta como lido se algum rótulo da aba foi de fato aplicado
+    product[SECTIONS_OK_KEY] = ["pricing", *(["taxes"] if taxes_found else []), *(["info"] if info_rows else [])]
+    return product
+
+
+class HttpExtractor:
+    """
+    Extrai produtos via HTTP, sem navegador, usando os cookies da sessão
+    Selenium autenticada em um requests.Session com pool de conexões.
+    """
+
+    def __init__(self, session: dict, generation: int = 0, timeout: float = 30,
+                 pool_size: int = 10, log_queue: Optional[queue.Queue] = None):
+        self.timeout = timeout
+        self.log_queue = log_queue
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.http.mount("https://", adapter)
+        self.http.mount("http://", adapter)
+        self.http.headers.update(BROWSER_HEADERS)
+        self.load_session(session, generation)
+
+    def _log(self, message: str):
+        if self.log_queue:
+            self.log_queue.put(message)
+        else:
+            print(message)
+
+    def load_session(self, session: dict, generation: int = 0):
+        """Substitui os cookies pelos da sessão exportada (formato CDP)."""
+        self.session_generation = generation
+        load_session_cookies(self.http.cookies, session)
+
+    def search_product(self, product_code, worker_id=None, row_num=None) -> Optional[dict]:
+        """
+        Busca um produto via HTTP. Retorna None quando a página precisa do
+        navegador para ser interpretada (fallback para o Selenium).
+        """
+        log_prefix = f"[Worker {worker_id}] " if worker_id else ""
+        log_line = f"linha {row_num}: " if row_num else ""
+
+        try:
+            response = self.http.get(PRODUCT_URL.format(code=product_code), timeout=self.timeout)
+        except requests.Timeout:
+            self._log(f"{log_prefix}{log_line}❌ Timeout (HTTP): {product_code}")
+            return status_result(product_code, "Tempo Esgotado", row_num)
+
+        if "/login" in response.url:
+            raise SessionExpiredError(response.url)
+
+        if response.status_code == 404:
+            self._log(f"{log_prefix}{log_line}❌ Não encontrado: {product_code}")
+            return status_result(product_code, "Não Encontrado", row_num)
+        if response.status_code >= 400:
+            self._log(f"{log_prefix}{log_line}⚠️ HTTP {response.status_code}: {product_code}")
+            return None
+
+        product = parse_product_page(response.text, product_code, row_num)
+        if product is None:
+            return None
+        if product["status"] == "Não Encontrado":
+            self._log(f"{log_prefix}{log_line}❌ Não encontrado: {product_code}")
+        else:
+            self._log(f"{log_prefix}{log_line}✅ Sucesso (HTTP): {product_code}")
+        return product
+
+    def close(self):
+        self.http.close()
@@ -0,0 +1,229 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import openpyxl
+
+
+class ResultJournal:
+    """
+    Diário append-only dos resultados em SQLite, ao lado do arquivo de saída.
+
+    Cada checkpoint grava apenas o lote novo (custo O(lote)); o .xlsx é
+    montado de uma vez por export_xlsx, em modo write_only.
+    """
+
+    def __init__(self, path: str, fields: list):
+        self.path = path
+        self.output_fields = list(fields)
+        self.fields = [f for f in fields if f != "row_num"]
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(f'"{f}" TEXT' for f in self.fields)
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS results (row_num INTEGER PRIMARY KEY, {columns}, saved_at TEXT)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint (input_hash TEXT, row_num INTEGER, status TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (input_hash, row_num))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS checkpoint_status ON checkpoint (input_hash, status)")
+        self.conn.commit()
+
+    @staticmethod
+    def path_for(output_file: str) -> str:
+        """Caminho do diário correspondente a um arquivo de saída."""
+        return os.path.splitext(output_file)[0] + ".journal.sqlite3"
+
+    def append(self, items: list):
+        """Grava um lote de resultados (itens sem row_num são ignorados)."""
+        with self._lock:
+            self._write_results(items)
+            self.conn.commit()
+
+    def append_and_record(self, items: list, checkpoint: "CheckpointIndex"):
+        """
+        append e checkpoint.record numa única transação: após uma queda, o
+        resultado de uma linha e o status dela no checkpoint nunca divergem.
+        """
+        with self._lock:
+            try:
+                self._write_results(items)
+                checkpoint._write_status(items)
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+
+    def _write_results(self, items: list):
+        now = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+        placeholders = ", ".join("?" for _ in range(len(self.fields) + 2))
+        columns = ", ".join(f'"{f}"' for f in self.fields)
+        rows = [
+            (item["row_num"], *[_as_text(item.get(f, "")) for f in self.fields], now)
+            for item in items if item.get("row_num")
+        ]
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO results (row_num, {columns}, saved_at) VALUES ({placeholders})", rows
+        )
+        self.conn.execute("INSERT OR REPLACE INTO metadata VALUES ('timestamp', ?)", (now,))
+
+    def get_meta(self, key: str, default=None):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM metadata WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, **values):
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO metadata VALUES (?, ?)",
+                [(key, str(value)) for key, value in values.items()],
+            )
+            self.conn.commit()
+
+    def checkpoint(self, input_hash: str) -> "CheckpointIndex":
+        """Índice de checkpoint deste diário para um arquivo de entrada."""
+        return CheckpointIndex(self, input_hash)
+
+    def reset(self):
+        """Apaga todos os resultados e metadados (reinício do zero)."""
+        with self._lock:
+            self.conn.execute("DELETE FROM results")
+            self.conn.execute("DELETE FROM metadata")
+            self.conn.execute("DELETE FROM checkpoint")
+            self.conn.commit()
+
+    def export_xlsx(self, output_file: str, sheet_name: str, header_row: list, metadata_rows: list,
+                    extra_sheets: dict = None):
+        """
+        Monta o .xlsx de saída em modo write_only a partir do diário, com cada
+        resultado na mesma linha da planilha de entrada. `extra_sheets`
+        ({nome: linhas}) acrescenta abas depois de Metadata.
+        """
+        wb = openpyxl.Workbook(write_only=True)
+        data_sheet = wb.create_sheet(sheet_name)
+        data_sheet.append(header_row)
+
+        columns = ", ".join(f'"{f}"' for f in self.fields)
+        with self._lock:
+            cursor = self.conn.execute(f"SELECT row_num, {columns} FROM results ORDER BY row_num")
+            current_row = 2
+            for row_num, *values in cursor:
+                while current_row < row_num:
+                    data_sheet.append([])
+                    current_row += 1
+                record = dict(zip(self.fields, values), row_num=row_num)
+                data_sheet.append([_from_text(record[f]) for f in self.output_fields])
+                current_row += 1
+
+        meta_sheet = wb.create_sheet("Metadata")
+        for row in metadata_rows:
+            meta_sheet.append(row)
+
+        for name, rows in (extra_sheets or {}).items():
+            sheet = wb.create_sheet(name)
+            for row in rows:
+                sheet.append(row)
+
+        # Grava num temporário e substitui, para nunca deixar um .xlsx pela metade
+        tmp_file = output_file + ".tmp"
+        wb.save(tmp_file)
+        os.replace(tmp_file, output_file)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class CheckpointIndex:
+    """
+    Índice persistente de checkpoint, por hash da entrada: para cada linha,
+    o último status gravado e o número de tentativas. Retomada e detecção de
+    buracos viram consultas indexadas em vez de varrer a planilha.
+    """
+
+    def __init__(self, journal: ResultJournal, input_hash: str):
+        self.conn = journal.conn
+        self._lock = journal._lock
+        self.input_hash = input_hash
+        with self._lock:
+            # Diários sem checkpoint (versão anterior) são indexados uma única vez
+            if not self.conn.execute("SELECT 1 FROM checkpoint WHERE input_hash = ? LIMIT 1", (input_hash,)).fetchone():
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO checkpoint (input_hash, row_num, status, attempts) "
+                    "SELECT ?, row_num, status, 1 FROM results", (input_hash,)
+                )
+                self.conn.commit()
+
+    def register_rows(self, row_nums):
+        """Registra as linhas válidas da entrada ainda não conhecidas (sem status)."""
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO checkpoint (input_hash, row_num) VALUES (?, ?)",
+                [(self.input_hash, r) for r in row_nums],
+            )
+            self.conn.commit()
+
+    def record(self, items: list):
+        """Atualiza status e incrementa as tentativas das linhas do lote."""
+        with self._lock:
+            self._write_status(items)
+            self.conn.commit()
+
+    def _write_status(self, items: list):
+        rows = [(self.input_hash, item["row_num"], _as_text(item.get("status", ""))) for item in items if item.get("row_num")]
+        self.conn.executemany(
+            "INSERT INTO checkpoint (input_hash, row_num, status, attempts) VALUES (?, ?, ?, 1) "
+            "ON CONFLICT (input_hash, row_num) DO UPDATE SET status = excluded.status, attempts = attempts + 1",
+            rows,
+        )
+
+    def _rows(self, where: str) -> set:
+        with self._lock:
+            return {r for (r,) in self.conn.execute(f"SELECT row_num FROM checkpoint WHERE input_hash = ? AND {where}", (self.input_hash,))}
+
+    def saved_rows(self) -> set:
+        """Linhas com status preenchido."""
+        return self._rows("status IS NOT NULL AND status != ''")
+
+    def pending_rows(self) -> set:
+        """Linhas registradas que ainda não têm status."""
+        return self._rows("(status IS NULL OR status = '')")
+
+    def hole_rows(self) -> set:
+        """Buracos: linhas já tentadas que continuam sem status."""
+        return self._rows("(status IS NULL OR status = '') AND attempts > 0")
+
+    def rows_with_status(self, prefixes, max_attempts: int = None) -> list:
+        """
+        (row_num, code, status, attempts) das linhas cujo status começa com um
+        dos prefixos, opcionalmente só as com no máximo `max_attempts` tentativas.
+        """
+        where = " OR ".join("c.status LIKE ?" for _ in prefixes)
+        params = [self.input_hash, *(f"{p}%" for p in prefixes)]
+        query = (
+            "SELECT c.row_num, r.code, c.status, c.attempts FROM checkpoint c "
+            f"LEFT JOIN results r ON r.row_num = c.row_num WHERE c.input_hash = ? AND ({where})"
+        )
+        if max_attempts is not None:
+            query += " AND c.attempts <= ?"
+            params.append(max_attempts)
+        with self._lock:
+            return self.conn.execute(query + " ORDER BY c.row_num", params).fetchall()
+
+    def attempts(self, row_num: int) -> int:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT attempts FROM checkpoint WHERE input_hash = ? AND row_num = ?", (self.input_hash, row_num)
+            ).fetchone()
+        return row[0] if row else 0
+
+
+def _as_text(value):
+    return None if value is None else str(value)
+
+
+def _from_text(value):
+    return "" if value is None else value
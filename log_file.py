@@ -0,0 +1,41 @@
+import logging
+import os
+import queue
+from logging.handlers import QueueListener, RotatingFileHandler
+from typing import Optional
+
+DEFAULT_LOG_FILE = {"enabled": True, "path": "scraper.log", "max_mb": 10, "backups": 5}
+
+
+class RotatingLog:
+    """
+    Log completo em disco, com rotação por tamanho (`max_mb` por arquivo,
+    `backups` arquivos antigos). A gravação roda na thread de um
+    QueueListener: quem registra só enfileira, sem esperar pelo disco.
+    """
+
+    def __init__(self, path: str, max_mb: float = 10, backups: int = 5):
+        self.path = path
+        self._handler = RotatingFileHandler(path, maxBytes=int(max_mb * 1024 * 1024), backupCount=backups,
+                                            encoding="utf-8", delay=True)
+        self._handler.setFormatter(logging.Formatter("%(asctime)s [%(name)s] %(message)s"))
+        self._queue = queue.SimpleQueue()
+        self._listener = QueueListener(self._queue, self._handler)
+        self._listener.start()
+
+    @classmethod
+    def from_config(cls, config: dict, base_path: str) -> Optional["RotatingLog"]:
+        """Log de system.log_file, ou None se desativado."""
+        settings = {**DEFAULT_LOG_FILE, **config.get("system", {}).get("log_file", {})}
+        if not settings["enabled"]:
+            return None
+        return cls(os.path.join(base_path, settings["path"]), settings["max_mb"], settings["backups"])
+
+    def write(self, channel: str, messages):
+        """Registra um lote de mensagens de um canal (login, raspagem...)."""
+        for message in messages:
+            self._queue.put_nowait(logging.makeLogRecord({"name": channel, "msg": message, "levelno": logging.INFO, "levelname": "INFO"}))
+
+    def close(self):
+        self._listener.stop()
+        self._handler.close()
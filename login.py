@@ -7,18 +7,43 @@ import json
 import os
 import sys
 import traceback
+import threading
 from typing import Optional, Union
 import queue
+from driver_pool import BROWSER_PROCESSES
+
+DEFAULT_BASE_URL = "https://ctshoponline.atlascopco.com"
+# SHOP_BASE_URL aponta a loja para outro endereço (ex.: fixture_server.py em
+# testes e benchmarks); processos worker herdam a variável
+BASE_URL = os.environ.get("SHOP_BASE_URL", DEFAULT_BASE_URL).rstrip("/")
+LOGIN_URL = f"{BASE_URL}/pt-BR/login"
+# Elemento que só aparece para um usuário autenticado
+LOGGED_IN_LOCATOR = (By.XPATH, "//p[contains(., 'Welcome') and .//b[text()='Vendas']]")
+
+# Padrões de URL (sintaxe do Network.setBlockedURLs) por categoria de
+# system.chrome_options.resource_blocking.block
+BLOCKED_RESOURCE_PATTERNS = {
+    "images": ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico", "*/_next/image*"],
+    "fonts": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*fonts.googleapis.com*", "*fonts.gstatic.com*"],
+    "media": ["*.mp4", "*.webm", "*.ogg", "*.mp3", "*.wav", "*.m3u8", "*youtube.com/embed*", "*vimeo.com*"],
+    "trackers": [
+        "*cookielaw.org*", "*onetrust.com*", "*google-analytics.com*", "*googletagmanager.com*",
+        "*doubleclick.net*", "*hotjar.com*", "*clarity.ms*", "*facebook.net*", "*licdn.com*",
+        "*demdex.net*", "*omtrdc.net*", "*adobedtm.com*",
+    ],
+}
 
 class AtlasCopcoLogin:
-    def __init__(self, headless: bool = False, log_queue: Optional[queue.Queue] = None):
+    def __init__(self, headless: bool = False, log_queue: Optional[queue.Queue] = None, config: Optional[dict] = None):
         """
-        Configuração idêntica ao script original
+        Configuração idêntica ao script original. `config` é o config.json já
+        carregado (por exemplo, o de --config na linha de comando); sem ele,
+        lê o config.json ao lado do programa.
         """
-        self.config = self._load_config()
+        self.log_queue = log_queue
+        self.config = config if config is not None else self._load_config()
         self.headless = headless
         self.driver = None
-        self.log_queue = log_queue
 
     def _load_config(self) -> dict:
         """Carrega credenciais do config.json exatamente como no original"""
@@ -45,23 +70,55 @@ class AtlasCopcoLogin:
         else:
             print(message)
 
+    def _chrome_options(self) -> dict:
+        return self.config.get("system", {}).get("chrome_options", {})
+
     def _configure_driver(self) -> webdriver.Chrome:
-        """Configuração IDÊNTICA ao driver original"""
+        """Monta o Chrome a partir de system.chrome_options do config.json."""
+        chrome_config = self._chrome_options()
         options = ChromeOptions()
         
-        # Configurações originais exatas
         options.add_argument('--log-level=3')
         options.add_experimental_option('excludeSwitches', ['enable-logging'])
-        options.add_argument("--disable-extensions")
+        if chrome_config.get("disable_extensions", True):
+            options.add_argument("--disable-extensions")
         options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
+        if not chrome_config.get("sandbox", False):
+            options.add_argument("--no-sandbox")
         options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--window-size=1200,800")  # Tamanho fixo original
+        options.add_argument(f"--window-size={chrome_config.get('window_size', '1200,800')}")
+        # 'eager': driver.get retorna no DOMContentLoaded; as esperas por
+        # elemento do login e do extractor continuam explícitas
+        options.page_load_strategy = chrome_config.get("page_load_strategy", "normal")
         
         if self.headless:
             options.add_argument("--headless=new")
         
-        return webdriver.Chrome(options=options)
+        driver = webdriver.Chrome(options=options)
+        # As esperas do extractor rodam em execute_async_script (waits.py)
+        driver.set_script_timeout(60)
+        # PIDs do chromedriver/Chrome guardados para o encerramento seletivo
+        BROWSER_PROCESSES.register(driver)
+        return driver
+
+    def apply_resource_policy(self):
+        """
+        Bloqueia via DevTools (Network.setBlockedURLs) os recursos que o
+        extractor não lê: imagens, fontes, mídia e rastreadores/OneTrust.
+        Chamado só depois do login, que precisa do banner de cookies.
+        """
+        policy = self._chrome_options().get("resource_blocking", {})
+        if not self.driver or not policy.get("enabled", False):
+            return
+        patterns = [p for category in policy.get("block", []) for p in BLOCKED_RESOURCE_PATTERNS.get(category, ())]
+        patterns += policy.get("extra_patterns", [])
+        if not patterns:
+            return
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        except Exception as e:
+            self._log(f"⚠️ Não foi possível aplicar o bloqueio de recursos: {str(e)}")
 
     def login(self) -> Optional[webdriver.Chrome]:
         """
@@ -70,7 +127,7 @@ class AtlasCopcoLogin:
         try:
             self._log("Iniciando o processo de login...") # Log simplificado de início
             self.driver = self._configure_driver()
-            self.driver.get("https://ctshoponline.atlascopco.com/pt-BR/login")
+            self.driver.get(LOGIN_URL)
             
             # 1. Aceitar cookies
             WebDriverWait(self.driver, 15).until(
@@ -86,8 +143,7 @@ class AtlasCopcoLogin:
             credentials = self.config.get('credentials')
             if not credentials or 'username' not in credentials or 'password' not in credentials:
                 self._log("ERRO: A seção 'credentials' com 'username' e 'password' não foi encontrada ou está incompleta no config.json.")
-                if self.driver:
-                    self.driver.quit()
+                self.logout()
                 return None
 
             # 4. Preencher email
@@ -119,16 +175,76 @@ class AtlasCopcoLogin:
             
             # Verificação de login
             WebDriverWait(self.driver, 30).until(
-                EC.presence_of_element_located((By.XPATH, "//p[contains(., 'Welcome') and .//b[text()='Vendas']]"))
+                EC.presence_of_element_located(LOGGED_IN_LOCATOR)
             )
             self._log("Login bem-sucedido!") # Log de sucesso
+            self.apply_resource_policy()
             return self.driver
             
         except Exception as e:
             self._log(f"❌ Falha no login: {str(e)}") # Log de falha
             self._log(traceback.format_exc())
-            if self.driver:
-                self.driver.quit()
+            # logout() também tira o navegador do registro de processos
+            self.logout()
+            return None
+
+    def export_session(self) -> Optional[dict]:
+        """
+        Exporta cookies (de todos os domínios, incluindo o SSO) e o storage
+        da loja a partir do driver autenticado.
+        """
+        if not self.driver:
+            return None
+        try:
+            cookies = self.driver.execute_cdp_cmd("Network.getAllCookies", {}).get("cookies", [])
+            local_storage = self.driver.execute_script("return Object.assign({}, window.localStorage);") or {}
+            session_storage = self.driver.execute_script("return Object.assign({}, window.sessionStorage);") or {}
+            return {
+                "cookies": cookies,
+                "local_storage": local_storage,
+                "session_storage": session_storage,
+                "landing_url": self.driver.current_url,
+            }
+        except Exception as e:
+            self._log(f"⚠️ Não foi possível exportar a sessão: {str(e)}")
+            return None
+
+    def restore_session(self, session: dict) -> Optional[webdriver.Chrome]:
+        """
+        Abre um Chrome já carregando a sessão exportada por export_session,
+        sem passar pelo fluxo de login. Retorna None se a sessão não for mais válida.
+        """
+        try:
+            self.driver = self._configure_driver()
+            # Cookies via CDP podem ser definidos antes de qualquer navegação
+            cookies = [
+                {k: v for k, v in cookie.items() if k not in ("size", "session")}
+                for cookie in session.get("cookies", [])
+            ]
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+            # O consentimento do OneTrust já está nos cookies: pode bloquear desde já
+            self.apply_resource_policy()
+
+            # O storage é por origem: precisa de uma página da loja carregada
+            self.driver.get(BASE_URL)
+            self.driver.execute_script(
+                "for (const [k, v] of Object.entries(arguments[0])) window.localStorage.setItem(k, v);"
+                "for (const [k, v] of Object.entries(arguments[1])) window.sessionStorage.setItem(k, v);",
+                session.get("local_storage", {}),
+                session.get("session_storage", {}),
+            )
+
+            self.driver.get(session.get("landing_url") or BASE_URL)
+            WebDriverWait(self.driver, 15).until(
+                EC.presence_of_element_located(LOGGED_IN_LOCATOR)
+            )
+            self._log("Sessão compartilhada restaurada.")
+            return self.driver
+
+        except Exception as e:
+            self._log(f"⚠️ Sessão compartilhada inválida: {str(e)}")
+            self.logout()
             return None
 
     def logout(self):
@@ -139,8 +255,104 @@ class AtlasCopcoLogin:
             except:
                 pass
             finally:
+                BROWSER_PROCESSES.forget(self.driver)
                 self.driver = None
 
+class SharedSession:
+    """
+    Sessão autenticada compartilhada entre vários drivers.
+
+    O primeiro pedido faz o login completo e exporta cookies/storage; os
+    demais abrem o Chrome já com a sessão injetada. Um novo login completo
+    só acontece quando a sessão armazenada deixa de funcionar, e apenas uma
+    thread o executa por vez. `session` permite começar de uma sessão já
+    exportada (por exemplo, a do processo principal, no modo multiprocesso).
+    `config` segue para cada AtlasCopcoLogin (credenciais e chrome_options).
+    """
+
+    def __init__(self, headless: bool = False, log_queue: Optional[queue.Queue] = None, session: Optional[dict] = None,
+                 config: Optional[dict] = None):
+        self.headless = headless
+        self.log_queue = log_queue
+        self.config = config
+        self._lock = threading.Lock()
+        self._session = session
+        self._generation = 0
+        self.full_logins = 0
+        self.restores = 0
+
+    @property
+    def session(self) -> Optional[dict]:
+        return self._session
+
+    @property
+    def generation(self) -> int:
+        """Incrementado a cada renovação ou invalidação da sessão."""
+        return self._generation
+
+    def get_driver(self) -> Optional[webdriver.Chrome]:
+        """Retorna um driver autenticado, reaproveitando a sessão sempre que possível."""
+        session, generation = self._session, self._generation
+        if session:
+            driver = self._restore(session)
+            if driver:
+                return driver
+
+        with self._lock:
+            # Outra thread pode ter renovado a sessão enquanto esperávamos o lock
+            if self._session and self._generation != generation:
+                driver = self._restore(self._session)
+                if driver:
+                    return driver
+            return self._full_login(keep_driver=True)
+
+    def ensure_session(self) -> Optional[dict]:
+        """
+        Garante que exista uma sessão exportada, fazendo o login completo se
+        necessário. Usado por quem só precisa dos cookies (motor HTTP).
+        """
+        if self._session:
+            return self._session
+        with self._lock:
+            if not self._session:
+                self._full_login(keep_driver=False)
+            return self._session
+
+    def invalidate(self, generation: Optional[int] = None):
+        """
+        Descarta a sessão armazenada, forçando um novo login completo no próximo
+        pedido. Se `generation` for informado, só invalida se a sessão ainda for
+        a mesma que o chamador viu (evita logins repetidos em rajada).
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._session = None
+            self._generation += 1
+
+    def _full_login(self, keep_driver: bool) -> Optional[webdriver.Chrome]:
+        """Executa o login completo e exporta a sessão. Chamar com o lock adquirido."""
+        service = AtlasCopcoLogin(headless=self.headless, log_queue=self.log_queue, config=self.config)
+        driver = service.login()
+        if not driver:
+            return None
+        self.full_logins += 1
+        exported = service.export_session()
+        if exported:
+            self._session = exported
+            self._generation += 1
+        if not keep_driver:
+            service.logout()
+            return None
+        return driver
+
+    def _restore(self, session: dict) -> Optional[webdriver.Chrome]:
+        service = AtlasCopcoLogin(headless=self.headless, log_queue=self.log_queue, config=self.config)
+        driver = service.restore_session(session)
+        if driver:
+            self.restores += 1
+        return driver
+
 # Função de compatibilidade para manter o mesmo uso do original
 def login(headless: bool = False, log_queue: Optional[queue.Queue] = None):
     """Versão de função compatível com o código original"""
@@ -1,136 +1,24 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
-import openpyxl
-import hashlib
 import os
 import json
+import multiprocessing
 import sys
 import queue
-import contextlib
-import time
-import psutil
-from datetime import datetime
-from login import login
-from extractor import search_product
-from selenium.common.exceptions import WebDriverException, TimeoutException
-
-# Mantendo os cabeçalhos originais
-HEADERS = [
-    "code", "name", "pricing", "discount", "pricing_with", "cofins_tax", 
-    "cofins_value", "difalst_tax", "difalst_value", "fecop_tax", "fecop_value",
-    "icmi_value", "icms_tax", "icms_value", "ipi_tax", "ipi_value", "pis_tax",
-    "pis_value", "st_tax", "st_value", "weight", "status", "country_of_origin",
-    "customs_tariff", "possibility_to_return", "row_num"
-]
-
-header_labels = {
-    "code": "Código",
-    "name": "Nome",
-    "pricing": "Preço",
-    "discount": "Desconto",
-    "pricing_with": "Preço com Impostos",
-    "cofins_tax": "Cofins",
-    "cofins_value": "Cofins Valor",
-    "difalst_tax": "Difal ST",
-    "difalst_value": "Difal ST Valor",
-    "fecop_tax": "Fecop",
-    "fecop_value": "Fecop Valor",
-    "icmi_value": "ICMI Valor",
-    "icms_tax": "ICMS",
-    "icms_value": "ICMS Valor",
-    "ipi_tax": "IPI",
-    "ipi_value": "IPI Valor",
-    "pis_tax": "PIS",
-    "pis_value": "PIS Valor",
-    "st_tax": "ST",
-    "st_value": "ST Valor",
-    "weight": "Peso",
-    "status": "Status",
-    "country_of_origin": "País de Origem",
-    "customs_tariff": "Tarifa Aduaneira",
-    "possibility_to_return": "Possibilidade de Devolução"
-}
-
-def column_to_index(col_letter: str) -> int:
-    """Converte uma letra de coluna do Excel (A, B, C...) para um índice numérico (1, 2, 3...)."""
-    index = 0
-    for char in col_letter.upper():
-        index = index * 26 + (ord(char) - ord('A') + 1)
-    return index
-
-# Classe Worker com seu próprio controle de parada e evento de login
-class ScraperWorker(threading.Thread):
-    def __init__(self, worker_id, headless_mode, app_instance, login_event):
-        super().__init__(daemon=True)
-        self.worker_id = worker_id
-        self.headless = headless_mode
-        self.app = app_instance
-        self.login_event = login_event
-        self._stop_event = threading.Event()
-
-    def stop(self):
-        """Sinaliza para esta thread específica parar."""
-        self._stop_event.set()
-
-    def stopped(self):
-        """Verifica se a thread foi sinalizada para parar."""
-        return self._stop_event.is_set()
-
-    def run(self):
-        """O corpo de execução do worker."""
-        self.app.log(f"[Worker {self.worker_id}] Iniciando...")
-        driver = None
-        login_success = False
-        try:
-            # Tenta fazer o login primeiro
-            self.app.log(f"[Worker {self.worker_id}] Tentando fazer login...")
-            driver = login(headless=self.headless, log_queue=self.app.login_log_queue)
-            
-            if driver:
-                self.app.log(f"[Worker {self.worker_id}] ✅ Login bem-sucedido.")
-                login_success = True
-            else:
-                self.app.log(f"[Worker {self.worker_id}] ❌ Falha no login.")
-
-            # Sinaliza ao manager que a tentativa de login terminou
-            self.login_event.set()
-
-            if not login_success:
-                return
-
-            # Loop principal de processamento de tarefas
-            while not self.app.stop_event.is_set() and not self.stopped():
-                try:
-                    task = self.app.tasks_queue.get(timeout=1)
-                    code, row_num = task
-
-                    data = search_product(driver, code, worker_id=self.worker_id, row_num=row_num, log_queue=self.app.scraper_log_queue)
-                    self.app.results_queue.put(data)
-                    self.app.tasks_queue.task_done()
-
-                except queue.Empty:
-                    continue
-                except (WebDriverException, TimeoutException) as e:
-                    self.app.log(f"🚨 [Worker {self.worker_id}] Erro no navegador: {type(e).__name__}. Reiniciando driver.")
-                    self.app.tasks_queue.put(task)
-                    if driver:
-                        with contextlib.suppress(Exception): driver.quit()
-                    driver = None
-                    while not driver and not self.app.stop_event.is_set() and not self.stopped():
-                         self.app.log(f"[Worker {self.worker_id}] Retentando login...")
-                         driver = login(headless=self.headless, log_queue=self.app.login_log_queue)
-                         if not driver:
-                             time.sleep(30)
-                    continue
+from engine import ScrapingEngine, ConfigError, load_config
+from log_file import RotatingLog
 
-        except Exception as e:
-            self.app.log(f"🚨 [Worker {self.worker_id}] Erro crítico, worker será finalizado: {e}")
-        finally:
-            if driver:
-                with contextlib.suppress(Exception): driver.quit()
-            self.app.log(f"[Worker {self.worker_id}] Finalizado.")
+# Intervalo (ms) entre as atualizações da interface: logs e andamento
+UI_TICK_MS = 100
+# Intervalo (ms) entre as atualizações do painel de saúde dos workers
+HEALTH_REFRESH_MS = 2000
 
+HEALTH_COLUMNS = (
+    ("worker", "Worker", 60), ("status", "Estado", 90), ("rate", "Itens/min", 75), ("items", "Itens", 60),
+    ("code", "Produto atual", 110), ("on_current", "Há (s)", 60), ("restarts", "Reinícios", 70),
+    ("timeouts", "Timeouts", 70), ("errors", "Erros", 55), ("rss", "RSS Chrome (MB)", 110), ("cpu", "CPU Chrome (%)", 100),
+)
 
 class Application(tk.Tk):
     def __init__(self):
@@ -152,24 +40,29 @@ class Application(tk.Tk):
             self.destroy()
             sys.exit()
 
-        self.stop_event = threading.Event()
-        self.tasks_queue = queue.Queue()
-        self.results_queue = queue.Queue()
-        self.unsaved_data = []
-        self.worker_threads = []
-        self.threads_lock = threading.Lock()
-        self.saved_rows = set()
-        self.reprocess_rows = set()
-        self.total_items = 0
-        self.saved_items_count = 0
-        default_workers = self.config.get("scraping_settings", {}).get("num_workers", 3)
-        self.num_workers_var = tk.IntVar(value=default_workers)
-        default_headless = self.config.get("system", {}).get("chrome_options", {}).get("headless", False)
-        self.headless_var = tk.BooleanVar(value=default_headless)
+        # Todo o processamento fica no motor; esta janela só o controla
+        self.engine = ScrapingEngine(
+            self.config, self.base_path,
+            login_log_queue=self.login_log_queue,
+            scraper_log_queue=self.scraper_log_queue,
+            ask_resume=self._ask_resume,
+            confirm_overwrite=self._confirm_overwrite,
+            on_progress=self._update_progress,
+        )
+        self.num_workers_var = tk.IntVar(value=self.engine.num_workers)
+        self.num_workers_var.trace_add("write", self._on_workers_changed)
+        self.headless_var = tk.BooleanVar(value=self.engine.headless)
+
+        # Log completo em disco; nas janelas ficam só as últimas linhas
+        self.log_file = RotatingLog.from_config(self.config, self.base_path)
+        self.max_log_lines = self.config.get("system", {}).get("log_window_lines", 2000)
+        # Estado vindo da thread de processamento, aplicado pelo tick da interface
+        self._pending_progress = None
+        self._finished_state = None
+        self._health_due = 0
 
         self.create_widgets()
-        self.process_login_log_queue()
-        self.process_scraper_log_queue()
+        self._ui_tick()
 
     def log(self, message):
         """Envia uma mensagem para a área de log de Login/Sistema."""
@@ -177,16 +70,18 @@ class Application(tk.Tk):
 
     def load_config(self):
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config_data = json.load(f)
-                if 'excel_settings' not in config_data or 'input_columns' not in config_data['excel_settings'] or 'code' not in config_data['excel_settings']['input_columns']:
-                     messagebox.showerror("Erro de Configuração", "O arquivo 'config.json' precisa ter a seção 'excel_settings' com 'input_columns' e a chave 'code' definida (ex: \"code\": \"A\").")
-                     return None
-                return config_data
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao carregar o arquivo de configuração:\n{self.config_path}\n\n{e}")
+            return load_config(self.config_path)
+        except ConfigError as e:
+            messagebox.showerror("Erro de Configuração", str(e))
             return None
 
+    def _on_workers_changed(self, *args):
+        """Repassa ao motor a quantidade de workers ajustada no spinbox."""
+        try:
+            self.engine.num_workers = self.num_workers_var.get()
+        except tk.TclError:
+            pass
+
     def create_widgets(self):
         file_frame = ttk.LabelFrame(self, text="Controle de Arquivos", padding=10)
         file_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -217,6 +112,19 @@ class Application(tk.Tk):
         self.scraper_log_area = scrolledtext.ScrolledText(right_log_frame, state='disabled', font=('Consolas', 10))
         self.scraper_log_area.pack(fill=tk.BOTH, expand=True)
         
+        health_frame = ttk.LabelFrame(self, text="Saúde dos Workers", padding=5)
+        health_frame.pack(fill=tk.X, padx=10, pady=5)
+        self.health_tree = ttk.Treeview(health_frame, columns=[c[0] for c in HEALTH_COLUMNS], show="headings", height=6)
+        for column, title, width in HEALTH_COLUMNS:
+            self.health_tree.heading(column, text=title)
+            self.health_tree.column(column, width=width, anchor=tk.CENTER)
+        self.health_tree.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        health_side = ttk.Frame(health_frame)
+        health_side.pack(side=tk.LEFT, fill=tk.Y, padx=(5, 0))
+        ttk.Button(health_side, text="Reciclar Selecionado", command=self.recycle_selected_worker).pack(fill=tk.X)
+        self.window_speed_var = tk.StringVar(value="Janela: -- itens/min")
+        ttk.Label(health_side, textvariable=self.window_speed_var).pack(pady=(5, 0))
+
         progress_frame = ttk.Frame(self)
         progress_frame.pack(fill=tk.X, padx=10, pady=5)
         
@@ -235,6 +143,8 @@ class Application(tk.Tk):
         
         self.stop_btn = ttk.Button(ctrl_frame, text="PARAR E SALVAR", command=self.stop_process, state='disabled')
         self.stop_btn.pack(side=tk.LEFT, padx=5)
+
+        ttk.Button(ctrl_frame, text="EXPORTAR EXCEL", command=self.export_on_demand).pack(side=tk.LEFT, padx=5)
         
         ttk.Label(ctrl_frame, text="Workers:").pack(side=tk.LEFT, padx=(20, 2))
         self.workers_spinbox = ttk.Spinbox(ctrl_frame, from_=1, to=20, textvariable=self.num_workers_var, width=5)
@@ -252,46 +162,92 @@ class Application(tk.Tk):
         self.speed_var = tk.StringVar(value="-- itens/min")
         ttk.Label(ctrl_frame, textvariable=self.speed_var, font=('Arial', 10, 'italic')).pack(side=tk.RIGHT, padx=5)
 
-    def process_log_queue(self, log_queue, area):
+    def process_log_queue(self, log_queue, area, channel):
+        """
+        Esvazia a fila de uma vez: o lote vai inteiro para o arquivo de log e
+        entra no widget num único insert, que guarda só as últimas
+        max_log_lines linhas.
+        """
+        batch = []
         try:
             while True:
-                message = log_queue.get_nowait()
-                area.config(state='normal')
-                area.insert(tk.END, message + "\n")
-                area.see(tk.END)
-                area.config(state='disabled')
+                batch.append(log_queue.get_nowait())
         except queue.Empty:
             pass
+        if not batch:
+            return
+        if self.log_file:
+            self.log_file.write(channel, batch)
+        area.config(state='normal')
+        area.insert(tk.END, "\n".join(batch[-self.max_log_lines:]) + "\n")
+        lines = int(area.index("end-1c").split(".")[0]) - 1
+        if lines > self.max_log_lines:
+            area.delete("1.0", f"{lines - self.max_log_lines + 1}.0")
+        area.see(tk.END)
+        area.config(state='disabled')
+
+    def _ui_tick(self):
+        """Atualiza logs e andamento no máximo uma vez por UI_TICK_MS."""
+        try:
+            self.process_log_queue(self.login_log_queue, self.login_log_area, "sistema")
+            self.process_log_queue(self.scraper_log_queue, self.scraper_log_area, "raspagem")
+            stats, self._pending_progress = self._pending_progress, None
+            if stats:
+                self._apply_progress(stats)
+            finished, self._finished_state = self._finished_state, None
+            if finished:
+                self._apply_finished(*finished)
+            self._health_due -= UI_TICK_MS
+            if self._health_due <= 0:
+                self._health_due = HEALTH_REFRESH_MS
+                self._refresh_health()
         finally:
-            self.after(100, lambda: self.process_log_queue(log_queue, area))
-
-    def process_login_log_queue(self):
-        self.process_log_queue(self.login_log_queue, self.login_log_area)
-
-    def process_scraper_log_queue(self):
-        self.process_log_queue(self.scraper_log_queue, self.scraper_log_area)
-
-    def calculate_file_hash(self, filepath):
-        hash_sha256 = hashlib.sha256()
-        with open(filepath, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_sha256.update(chunk)
-        return hash_sha256.hexdigest()
+            self.after(UI_TICK_MS, self._ui_tick)
+
+    def _refresh_health(self):
+        """Atualiza o painel de saúde, reaproveitando as linhas de cada worker."""
+        rows = self.engine.worker_health()
+        shown = set(self.health_tree.get_children())
+        current = set()
+        for row in rows:
+            iid = str(row["worker_id"])
+            current.add(iid)
+            values = (
+                row["worker_id"], row["status"], f"{row['items_per_min']:.1f}", row["items"],
+                row["code"] or "-", f"{row['on_current']:.0f}" if row["on_current"] is not None else "-",
+                row["restarts"], row["timeouts"], row["errors"],
+                f"{row['rss_mb']:.0f}" if row["rss_mb"] is not None else "-",
+                f"{row['cpu']:.0f}" if row["cpu"] is not None else "-",
+            )
+            if iid in shown:
+                self.health_tree.item(iid, values=values)
+            else:
+                self.health_tree.insert("", tk.END, iid=iid, values=values)
+        for iid in shown - current:
+            self.health_tree.delete(iid)
+        if rows:
+            self.window_speed_var.set(f"Janela: {sum(r['items_per_min'] for r in rows):.1f} itens/min")
+
+    def recycle_selected_worker(self):
+        """Botão 'Reciclar Selecionado': troca o navegador do worker marcado no painel."""
+        selected = self.health_tree.selection()
+        if not selected:
+            messagebox.showinfo("Reciclar Worker", "Selecione um worker no painel de saúde.")
+            return
+        worker_id = self.health_tree.item(selected[0], "values")[0]
+        worker_id = int(worker_id) if str(worker_id).isdigit() else worker_id
+        threading.Thread(target=self.engine.recycle_worker, args=(worker_id,), daemon=True).start()
 
     def select_input_file(self):
         file_path = filedialog.askopenfilename(title="Selecione o arquivo Excel de entrada", filetypes=[("Arquivos Excel", "*.xlsx *.xls")])
         if file_path:
-            self.input_file = file_path
             self.input_label.config(text=os.path.basename(file_path))
-            self.input_hash = self.calculate_file_hash(file_path)
-            
             try:
-                wb = openpyxl.load_workbook(file_path, read_only=True)
-                sheets = wb.sheetnames
-                wb.close()
+                sheets = self.engine.set_input(file_path)
                 selected = self.ask_sheet_selection(sheets)
+                # set_input já escolheu a primeira planilha: cancelar o popup desfaz a escolha
+                self.engine.selected_sheet = selected
                 if selected:
-                    self.selected_sheet = selected
                     self.log(f"Planilha selecionada: {selected}")
             except Exception as e:
                 messagebox.showerror("Erro", f"Não foi possível ler o arquivo:\n{str(e)}")
@@ -320,370 +276,102 @@ class Application(tk.Tk):
         return result[0] if result else None
     
     def select_output_file(self):
-        if not hasattr(self, 'input_file'):
+        if not self.engine.input_file:
             messagebox.showwarning("Aviso", "Selecione um arquivo de entrada primeiro.")
             return
         
-        default_name = os.path.splitext(os.path.basename(self.input_file))[0] + "_PROCESSADO.xlsx"
+        default_name = os.path.basename(ScrapingEngine.default_output_for(self.engine.input_file))
         file_path = filedialog.asksaveasfilename(title="Salvar resultado como", defaultextension=".xlsx", filetypes=[("Arquivos Excel", "*.xlsx")], initialfile=default_name)
         if file_path:
-            self.output_file = file_path
+            self.engine.output_file = file_path
             self.output_label.config(text=os.path.basename(file_path))
-            self.log(f"Arquivo de saída definido para: {self.output_file}")
+            self.log(f"Arquivo de saída definido para: {file_path}")
 
-    def check_output_continuity(self):
-        self.reprocess_rows.clear()
-        self.saved_rows.clear()
+    def _ask_resume(self, saved_count, reprocess_count):
+        """Pergunta se o processamento anterior deve continuar. Retorna None se cancelado."""
+        return messagebox.askyesnocancel("Continuar Processamento?", f"Foi encontrado um processamento anterior para este arquivo com {saved_count} itens já salvos.\n{reprocess_count} linha(s) será(ão) reprocessada(s) por estar(em) com status vazio.\n\nDeseja continuar de onde parou?", icon='question')
 
-        if not hasattr(self, 'output_file') or not os.path.exists(self.output_file):
-            self.log("Arquivo de saída não encontrado. Iniciando um novo processamento.")
-            return True
-
-        try:
-            wb = openpyxl.load_workbook(self.output_file)
-            data_sheet_name = self.selected_sheet if hasattr(self, 'selected_sheet') else None
-            
-            if "Metadata" in wb.sheetnames:
-                meta_sheet = wb["Metadata"]
-                metadata = {"input_hash": meta_sheet.cell(row=1, column=2).value, "saved_rows_str": meta_sheet.cell(row=4, column=2).value}
-                
-                if metadata["input_hash"] == self.input_hash:
-                    saved_rows_str = metadata.get("saved_rows_str")
-                    if saved_rows_str:
-                        self.saved_rows = {int(r) for r in str(saved_rows_str).split(',') if r.strip().isdigit()}
-
-                    if data_sheet_name and data_sheet_name in wb.sheetnames:
-                        data_sheet = wb[data_sheet_name]
-                        status_col_idx = HEADERS.index("status") + 1
-                        
-                        self.log("Verificando integridade das linhas processadas...")
-                        for row_num in range(2, data_sheet.max_row + 1):
-                            if not data_sheet.cell(row=row_num, column=status_col_idx).value:
-                                self.reprocess_rows.add(row_num)
-                                if row_num in self.saved_rows: self.saved_rows.remove(row_num)
-                    
-                    if self.reprocess_rows: self.log(f"Detectadas {len(self.reprocess_rows)} linha(s) com status vazio (buracos).")
-
-                    response = messagebox.askyesnocancel("Continuar Processamento?", f"Foi encontrado um processamento anterior para este arquivo com {len(self.saved_rows)} itens já salvos.\n{len(self.reprocess_rows)} linha(s) será(ão) reprocessada(s) por estar(em) com status vazio.\n\nDeseja continuar de onde parou?", icon='question')
-                    if response is None: return False
-                    if response:
-                        self.log(f"Continuando processamento. {len(self.saved_rows)} linhas salvas serão ignoradas.")
-                        return True
-                    else:
-                        self.log("Reiniciando o processamento do zero.")
-                        self.saved_rows.clear()
-                        self.reprocess_rows.clear()
-                        return True
-                else:
-                    if messagebox.askyesno("Arquivo de saída existente", "O arquivo de saída foi gerado a partir de um arquivo de entrada diferente.\nDeseja SOBRESCREVER o arquivo?", icon='warning'):
-                        self.log("Sobrescrevendo arquivo de saída.")
-                        self.saved_rows.clear()
-                        self.reprocess_rows.clear()
-                        return True
-                    return False
-            else:
-                if messagebox.askyesno("Arquivo de saída existente", "O arquivo de saída não contém metadados.\nDeseja SOBRESCREVER o arquivo?", icon='warning'):
-                    self.log("Sobrescrevendo arquivo de saída sem metadados.")
-                    self.saved_rows.clear()
-                    self.reprocess_rows.clear()
-                    return True
-                return False
-        except Exception as e:
-            self.log(f"Erro ao verificar continuidade: {e}. Assumindo novo processamento.")
-            self.saved_rows.clear()
-            self.reprocess_rows.clear()
-            return True
+    def _confirm_overwrite(self, reason):
+        return messagebox.askyesno("Arquivo de saída existente", f"{reason}\nDeseja SOBRESCREVER o arquivo?", icon='warning')
 
     def start_process(self):
-        if not hasattr(self, 'input_file'):
+        if not self.engine.input_file:
             messagebox.showwarning("Aviso", "Selecione um arquivo de entrada primeiro!")
             return
         
-        if not hasattr(self, 'output_file'):
+        if not self.engine.output_file:
             messagebox.showwarning("Aviso", "Selecione um arquivo de saída primeiro!")
             return
         
-        if not hasattr(self, 'selected_sheet'):
+        if not self.engine.selected_sheet:
             messagebox.showwarning("Aviso", "Nenhuma planilha foi selecionada no arquivo de entrada!")
             return
 
-        if not self.check_output_continuity():
+        self.engine.num_workers = self.num_workers_var.get()
+        self.engine.headless = self.headless_var.get()
+        if not self.engine.prepare():
             return
         
-        if not self.saved_rows and not self.reprocess_rows and hasattr(self, 'output_file') and os.path.exists(self.output_file):
-            try:
-                os.remove(self.output_file)
-                self.log(f"Arquivo de saída '{self.output_file}' removido para reiniciar o processamento.")
-            except Exception as e:
-                messagebox.showerror("Erro", f"Não foi possível apagar o arquivo de saída antigo:\n{e}")
-                return
-
-        self.saved_items_count = len(self.saved_rows)
-        
         self.start_btn.config(state='disabled')
         self.stop_btn.config(state='normal')
         self.workers_spinbox.config(state='normal')
         self.headless_check.config(state='disabled')
-        self.stop_event.clear()
         
         threading.Thread(target=self.run_scraping, daemon=True).start()
 
-    def _worker_manager(self, headless_mode):
+    def _update_progress(self, stats):
         """
-        Gerencia o pool de workers com login em lotes e ajuste dinâmico.
+        Callback de andamento do motor (chamado na thread de processamento):
+        guarda só o último retrato, aplicado no próximo tick da interface.
         """
-        worker_serial_id = 0
-        login_batch_size = self.config.get("scraping_settings", {}).get("login_batch_size", 3)
-        self.log(f"MANAGER: Iniciando logins em lotes de {login_batch_size}.")
-
-        while not self.stop_event.is_set():
-            with self.threads_lock:
-                # Remove threads que já terminaram da lista
-                self.worker_threads = [t for t in self.worker_threads if t.is_alive()]
-                
-                target_workers = self.num_workers_var.get()
-                current_workers = len(self.worker_threads)
-                
-                # Adiciona workers se necessário, em lotes
-                if current_workers < target_workers:
-                    # Calcula quantos workers iniciar neste lote
-                    needed = target_workers - current_workers
-                    batch_size = min(needed, login_batch_size)
-                    self.log(f"MANAGER: Iniciando um lote de {batch_size} novo(s) worker(s).")
-                    
-                    login_events = []
-                    for _ in range(batch_size):
-                        worker_serial_id += 1
-                        login_event = threading.Event()
-                        login_events.append(login_event)
-                        worker = ScraperWorker(worker_serial_id, headless_mode, self, login_event)
-                        worker.start()
-                        self.worker_threads.append(worker)
-
-                    # Espera que todos os logins do lote terminem
-                    self.log(f"MANAGER: Aguardando resultado do login do lote de {batch_size} worker(s)...")
-                    for event in login_events:
-                        event.wait()
-                    self.log("MANAGER: Lote de logins concluído.")
-                
-                # Remove workers se necessário
-                elif current_workers > target_workers:
-                    to_remove = current_workers - target_workers
-                    self.log(f"MANAGER: Sinalizando para remover {to_remove} worker(s).")
-                    
-                    # Pega os últimos workers da lista para parar
-                    workers_to_stop = self.worker_threads[target_workers:]
-                    for worker in workers_to_stop:
-                        worker.stop()
-
-            time.sleep(2)
-        
-        # Ao final do processo, sinaliza para todos os workers pararem
-        with self.threads_lock:
-            self.log("MANAGER: Sinal de parada global recebido. Encerrando todos os workers.")
-            for worker in self.worker_threads:
-                worker.stop()
+        self._pending_progress = stats
+
+    def _apply_progress(self, stats):
+        processed, total = stats["processed"], stats["total"]
+        self.progress["maximum"] = total
+        if stats["speed"] is not None:
+            self.speed_var.set(f"{stats['speed']:.1f} itens/min")
+        if stats["eta"] is not None:
+            eta_seconds = stats["eta"]
+            h, m, s = int(eta_seconds // 3600), int((eta_seconds % 3600) // 60), int(eta_seconds % 60)
+            self.eta_var.set(f"ETA: {h:02d}:{m:02d}:{s:02d}")
+        if self.engine.autoscaler and self.num_workers_var.get() != stats["target_workers"]:
+            # Reflete no spinbox o alvo escolhido pelo ajuste automático
+            self.num_workers_var.set(stats["target_workers"])
+        self.progress_var.set(processed)
+        self.progress_label.config(text=f"{processed}/{total}")
+        self.status_var.set(f"Processando {processed}/{total} | Workers: {stats['active_workers']}/{stats['target_workers']}")
 
     def run_scraping(self):
         try:
-            self.log("\n=== INICIANDO PROCESSAMENTO ===")
-            self.tasks_queue = queue.Queue()
-            self.results_queue = queue.Queue()
-
-            code_column_letter = self.config['excel_settings']['input_columns']['code']
-            self.log(f"Lendo códigos da coluna {code_column_letter}.")
-            
-            wb_input = openpyxl.load_workbook(self.input_file, read_only=True)
-            sheet_input = wb_input[self.selected_sheet]
-            
-            all_valid_tasks = []
-            self.log(f"Analisando coluna '{code_column_letter}' para encontrar linhas válidas...")
-            code_col_idx = column_to_index(code_column_letter) - 1
-
-            for row in sheet_input.iter_rows(min_row=2): 
-                cell = row[code_col_idx]
-                if cell.value and str(cell.value).strip():
-                    all_valid_tasks.append({'code': str(cell.value).zfill(10), 'row_num': cell.row})
-
-            total_valid_rows = len(all_valid_tasks)
-            self.log(f"Encontradas {total_valid_rows} linhas com códigos válidos.")
-            self.total_items = total_valid_rows
-            
-            tasks_to_queue = []
-            if self.reprocess_rows:
-                self.log(f"Priorizando {len(self.reprocess_rows)} linha(s) para reprocessamento.")
-                reprocess_tasks = [task for task in all_valid_tasks if task['row_num'] in self.reprocess_rows]
-                for task in reprocess_tasks:
-                    tasks_to_queue.append((task['code'], task['row_num']))
-            
-            new_tasks = [task for task in all_valid_tasks if task['row_num'] not in self.saved_rows and task['row_num'] not in self.reprocess_rows]
-            for task in new_tasks:
-                tasks_to_queue.append((task['code'], task['row_num']))
-            
-            if tasks_to_queue:
-                self.log(f"Total de {len(tasks_to_queue)} tarefas adicionadas à fila.")
-                for task in tasks_to_queue:
-                    self.tasks_queue.put(task)
-            else:
-                self.log("Nenhum item novo ou para reprocessar encontrado.")
-
-            wb_input.close()
-
-            self.progress["maximum"] = self.total_items
-            self.progress_label.config(text=f"{self.saved_items_count}/{self.total_items}")
-            
-            headless_mode = self.headless_var.get()
-            manager_thread = threading.Thread(target=self._worker_manager, args=(headless_mode,), daemon=True)
-            manager_thread.start()
-
-            start_time = time.time()
-            items_processed_session = 0
-            while not self.stop_event.is_set():
-                try:
-                    data = self.results_queue.get(timeout=1)
-                    if data:
-                        self.unsaved_data.append(data)
-                        
-                        if len(self.unsaved_data) >= (self.num_workers_var.get() * 5 if self.num_workers_var.get() > 0 else 2):
-                            self.save_data()
-                        
-                        total_processed = self.saved_items_count + len(self.unsaved_data)
-                        items_processed_session = total_processed - self.saved_items_count
-                        
-                        elapsed = time.time() - start_time
-                        if elapsed > 2:
-                            speed = items_processed_session / elapsed * 60
-                            self.speed_var.set(f"{speed:.1f} itens/min")
-                            remaining = self.total_items - total_processed
-                            if speed > 0 and remaining > 0:
-                                eta_seconds = remaining / (speed / 60)
-                                h, m, s = int(eta_seconds // 3600), int((eta_seconds % 3600) // 60), int(eta_seconds % 60)
-                                self.eta_var.set(f"ETA: {h:02d}:{m:02d}:{s:02d}")
-                        
-                        self.progress_var.set(total_processed)
-                        self.progress_label.config(text=f"{total_processed}/{self.total_items}")
-                        
-                        with self.threads_lock:
-                            active_workers = len([t for t in self.worker_threads if t.is_alive()])
-                        target_workers = self.num_workers_var.get()
-                        self.status_var.set(f"Processando {total_processed}/{self.total_items} | Workers: {active_workers}/{target_workers}")
-
-                except queue.Empty:
-                    if self.tasks_queue.empty():
-                        with self.threads_lock:
-                            active_workers = len([t for t in self.worker_threads if t.is_alive()])
-                        if active_workers == 0:
-                            self.log("Fila de tarefas vazia e nenhum worker ativo. Verificando por buracos...")
-                            if self._find_and_queue_buracos() == 0:
-                                if self.unsaved_data: self.save_data()
-                                self.log("Nenhum buraco adicional encontrado. Processamento finalizado.")
-                                break
-                    time.sleep(0.5)
-            
-            if self.unsaved_data: self.save_data()
-            self.log("\nPROCESSAMENTO CONCLUÍDO." if not self.stop_event.is_set() else "\nProcessamento interrompido.")
-            
-        except Exception as e:
-            self.log(f"\nERRO DURANTE PROCESSAMENTO: {e}")
-            import traceback
-            self.log(traceback.format_exc())
+            self.engine.run()
         finally:
-            self.cleanup()
-            final_status = "Concluído" if not self.stop_event.is_set() else "Interrompido"
-            final_processed = self.saved_items_count
-            if final_processed > self.total_items and self.total_items > 0:
-                final_processed = self.total_items
-            
-            self.status_var.set(final_status)
-            self.progress_var.set(final_processed)
-            self.progress_label.config(text=f"{final_processed}/{self.total_items}")
-            self.start_btn.config(state='normal')
-            self.stop_btn.config(state='disabled')
-            self.workers_spinbox.config(state='normal')
-            self.headless_check.config(state='normal')
-    
-    def _find_and_queue_buracos(self):
-        buracos = set()
-        try:
-            if not hasattr(self, 'output_file') or not os.path.exists(self.output_file): return 0
-            wb = openpyxl.load_workbook(self.output_file)
-            if self.selected_sheet not in wb.sheetnames: return 0
-            data_sheet = wb[self.selected_sheet]
-            status_col_idx = HEADERS.index("status") + 1
-            for row_num in range(2, data_sheet.max_row + 1):
-                if not data_sheet.cell(row=row_num, column=status_col_idx).value:
-                    buracos.add(row_num)
-                    if row_num in self.saved_rows: self.saved_rows.remove(row_num)
-        except Exception as e:
-            self.log(f"ERRO ao escanear buracos: {e}")
-            return 0
-
-        if buracos:
-            self.log(f"Detectados {len(buracos)} novo(s) buraco(s) na planilha.")
-            wb_input = openpyxl.load_workbook(self.input_file, read_only=True)
-            sheet_input = wb_input[self.selected_sheet]
-            code_col_idx = column_to_index(self.config['excel_settings']['input_columns']['code'])
-            for row_num in sorted(list(buracos)):
-                code = sheet_input.cell(row=row_num, column=code_col_idx).value
-                if code: self.tasks_queue.put((str(code).zfill(10), row_num))
-            wb_input.close()
-        return len(buracos)
-
-    def save_data(self):
-        if not self.unsaved_data: return
-        
-        if not hasattr(self, 'output_file'):
-             self.log("ERRO CRÍTICO: Tentativa de salvar dados sem um arquivo de saída definido.")
-             return
+            final_status = "Concluído" if not self.engine.interrupted else "Interrompido"
+            total_items = self.engine.total_items
+            final_processed = self.engine.saved_items_count
+            if final_processed > total_items and total_items > 0:
+                final_processed = total_items
+            self._finished_state = (final_status, final_processed, total_items)
+
+    def _apply_finished(self, final_status, final_processed, total_items):
+        self.status_var.set(final_status)
+        self.progress_var.set(final_processed)
+        self.progress_label.config(text=f"{final_processed}/{total_items}")
+        self.start_btn.config(state='normal')
+        self.stop_btn.config(state='disabled')
+        self.workers_spinbox.config(state='normal')
+        self.headless_check.config(state='normal')
+
+    def export_on_demand(self):
+        """Botão 'Exportar Excel': gera a planilha com o que já está no diário."""
+        if not self.engine.selected_sheet or not self.engine.has_journal():
+            messagebox.showwarning("Aviso", "Nenhum diário de resultados encontrado para o arquivo de saída selecionado.")
+            return
+        threading.Thread(target=self.engine.export_existing, daemon=True).start()
 
-        self.log(f"Salvando lote de {len(self.unsaved_data)} itens em '{os.path.basename(self.output_file)}'...")
-        try:
-            if os.path.exists(self.output_file):
-                wb = openpyxl.load_workbook(self.output_file)
-                if self.selected_sheet in wb.sheetnames:
-                    data_sheet = wb[self.selected_sheet]
-                else:
-                    data_sheet = wb.create_sheet(self.selected_sheet)
-                    data_sheet.append([header_labels.get(h, h) for h in HEADERS])
-            else:
-                wb = openpyxl.Workbook()
-                data_sheet = wb.active
-                data_sheet.title = self.selected_sheet
-                data_sheet.append([header_labels.get(h, h) for h in HEADERS])
-            
-            meta_sheet = wb["Metadata"] if "Metadata" in wb.sheetnames else wb.create_sheet("Metadata")
-            
-            newly_saved_rows = {item.get('row_num') for item in self.unsaved_data if item.get('row_num')}
-            self.saved_rows.update(newly_saved_rows)
-            
-            meta_sheet['A1'], meta_sheet['B1'] = "Input File Hash", self.input_hash
-            meta_sheet['A2'], meta_sheet['B2'] = "Last Processed Row", max(self.saved_rows) if self.saved_rows else 0
-            meta_sheet['A3'], meta_sheet['B3'] = "Timestamp", datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-            
-            meta_sheet['A4'], meta_sheet['B4'] = "Saved Rows", ",".join(map(str, sorted(list(self.saved_rows))))
-
-            for item in self.unsaved_data:
-                row_num = item.get('row_num')
-                if row_num:
-                    row_data = [item.get(h, "") for h in HEADERS]
-                    for col_idx, value in enumerate(row_data, start=1):
-                        data_sheet.cell(row=row_num, column=col_idx, value=value)
-            
-            wb.save(self.output_file)
-            
-            items_saved_count = len(self.unsaved_data)
-            self.saved_items_count += items_saved_count
-            self.unsaved_data = []
-            self.log(f"Lote salvo com sucesso. Total salvo: {self.saved_items_count} linhas.")
-        except Exception as e:
-            self.log(f"ERRO AO SALVAR: {e}")
-            import traceback
-            self.log(traceback.format_exc())
-    
     def stop_process(self):
-        self.stop_event.set()
+        self.engine.stop()
         self.status_var.set("Finalizando...")
-        self.log("\nSolicitação de parada recebida...")
 
     def save_config(self):
         if not self.config: return
@@ -696,17 +384,9 @@ class Application(tk.Tk):
             print(f"Aviso: Não foi possível salvar as preferências: {e}")
     
     def cleanup(self):
-        self.log("\nSinalizando para workers finalizarem...")
-        if not self.stop_event.is_set(): self.stop_event.set()
-        with self.threads_lock:
-            for thread in self.worker_threads: thread.join(timeout=5)
-        try:
-            for proc in psutil.process_iter(['pid', 'name']):
-                if 'chrome' in proc.info['name'].lower():
-                     proc.kill()
-        except Exception as e:
-            self.log(f"Erro ao limpar processos chrome: {e}")
-        self.log("Limpeza concluída.")
+        self.engine.cleanup()
+        if self.log_file:
+            self.log_file.close()
     
     def on_closing(self):
         if messagebox.askokcancel("Sair", "Deseja realmente sair?"):
@@ -720,6 +400,8 @@ class Application(tk.Tk):
         self.after(0, self.destroy)
 
 if __name__ == "__main__":
+    # Necessário para o modo multiprocesso no executável PyInstaller
+    multiprocessing.freeze_support()
     app = Application()
     app.protocol("WM_DELETE_WINDOW", app.on_closing)
     app.mainloop()
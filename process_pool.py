@@ -0,0 +1,198 @@
+import contextlib
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+import psutil
+
+from driver_pool import DriverPool, BROWSER_PROCESSES, terminate_processes
+from product_cache import ProductCache
+from waits import AdaptiveTimeouts
+from timing import DEFAULT_TIMING, SpanRecorder
+
+# "spawn" em todas as plataformas: o processo filho não herda o Tk nem as
+# threads do processo principal
+_ctx = multiprocessing.get_context("spawn")
+
+
+class _WorkerContext:
+    """
+    Substituto do ScrapingEngine dentro do processo filho: expõe apenas o
+    que o ScraperWorker usa, com filas e eventos de multiprocessing.
+    session_factory e search são os mesmos do motor (ScrapingEngine).
+    """
+
+    def __init__(self, config, base_path, headless, session, tasks_queue, results_queue,
+                 login_log_queue, scraper_log_queue, stop_event, metrics_queue, sections, spans_queue, events_queue,
+                 session_factory, search):
+        self.config = config
+        self.search = search
+        # Não há manager neste processo: o worker avisa, ninguém espera
+        self.manager_wake = threading.Event()
+        self.events_queue = events_queue
+        self.sections = sections
+        self.metrics_queue = metrics_queue
+        self.tasks_queue = tasks_queue
+        self.results_queue = results_queue
+        self.login_log_queue = login_log_queue
+        self.scraper_log_queue = scraper_log_queue
+        self.stop_event = stop_event
+        self.shared_session = session_factory(headless=headless, log_queue=login_log_queue, session=session, config=config)
+        # Sem reservas: spare_drivers vale para a execução inteira, e um reserva
+        # por processo dobraria o número de Chromes abertos
+        self.driver_pool = DriverPool.from_config(self.shared_session, config, log=self.log, spare_drivers=0)
+        self.wait_timeouts = AdaptiveTimeouts.from_config(config)
+        # Spans seguem para o gravador do processo principal
+        self.spans = SpanRecorder(forward=spans_queue.put) if {**DEFAULT_TIMING, **config.get("system", {}).get("timing", {})}["enabled"] else None
+        self.product_cache = None
+        settings = config.get("cache_settings", {})
+        if settings.get("enabled", False):
+            path = os.path.join(base_path, settings.get("path", "product_cache.sqlite3"))
+            with contextlib.suppress(Exception):
+                self.product_cache = ProductCache(path, ttl_hours=settings.get("ttl_hours"), max_entries=settings.get("max_entries", 200000))
+
+    def log(self, message):
+        self.login_log_queue.put(message)
+
+    def record_item(self, worker_id, latency, status):
+        self.metrics_queue.put((worker_id, latency, status))
+
+    def worker_event(self, worker_id, name, *args):
+        self.events_queue.put((worker_id, name, *args))
+
+
+class WorkerProcess(_ctx.Process):
+    """
+    Um worker em processo próprio, com seus navegadores. Tem a mesma interface
+    que o ScraperWorker usa no manager (stop, is_alive, join): as tarefas vêm
+    e os resultados voltam pelas filas de ProcessChannels.
+
+    session_factory e search vão para o processo filho por pickle: precisam
+    ser importáveis (classes/funções de módulo ou functools.partial delas).
+    """
+
+    def __init__(self, worker_id, headless_mode, channels, login_event, config, base_path, session, sections,
+                 session_factory, search):
+        super().__init__(daemon=True, name=f"ScraperWorker-{worker_id}")
+        self.worker_id = worker_id
+        self.headless = headless_mode
+        self.login_event = login_event
+        self.config = config
+        self.base_path = base_path
+        self.session = session
+        self.sections = sections
+        self.session_factory = session_factory
+        self.search = search
+        self.tasks_queue = channels.tasks
+        self.results_queue = channels.results
+        self.login_log_queue = channels.login_logs
+        self.scraper_log_queue = channels.scraper_logs
+        self.global_stop = channels.stop_event
+        self.metrics_queue = channels.metrics
+        self.spans_queue = channels.spans
+        self.events_queue = channels.events
+        self._stop_event = _ctx.Event()
+
+    def stop(self):
+        """Sinaliza para este processo específico parar."""
+        self._stop_event.set()
+
+    def stopped(self):
+        return self._stop_event.is_set()
+
+    def run(self):
+        # Importado aqui para não criar import circular com engine
+        from engine import ScraperWorker
+
+        context = _WorkerContext(
+            self.config, self.base_path, self.headless, self.session,
+            self.tasks_queue, self.results_queue, self.login_log_queue,
+            self.scraper_log_queue, self.global_stop, self.metrics_queue, self.sections, self.spans_queue,
+            self.events_queue, self.session_factory, self.search,
+        )
+        worker = ScraperWorker(self.worker_id, self.headless, context, self.login_event)
+        worker._stop_event = self._stop_event
+        try:
+            # Roda o corpo do worker na thread principal do processo filho
+            worker.run()
+        finally:
+            self.login_event.set()
+            waits = context.wait_timeouts.summary()
+            if waits:
+                context.log(f"[Worker {self.worker_id}] Esperas do navegador: {waits}.")
+            context.driver_pool.close()
+            BROWSER_PROCESSES.terminate_all()
+            if context.product_cache:
+                context.product_cache.close()
+
+
+class ProcessChannels:
+    """
+    Filas e eventos compartilhados entre o processo principal (único escritor
+    do diário) e os processos worker. Threads de ponte repassam os logs dos
+    filhos para as filas de log do motor, as métricas por item para
+    `on_metric(worker_id, latência, status)`, os spans de tempo para
+    `on_span(span)` e os eventos do painel de saúde para
+    `on_event(worker_id, nome, *args)`.
+    """
+
+    def __init__(self, login_log_queue, scraper_log_queue, on_metric=None, on_span=None, on_event=None):
+        self.tasks = _ctx.JoinableQueue()
+        self.results = _ctx.Queue()
+        self.login_logs = _ctx.Queue()
+        self.scraper_logs = _ctx.Queue()
+        self.metrics = _ctx.Queue()
+        self.spans = _ctx.Queue()
+        self.events = _ctx.Queue()
+        self.stop_event = _ctx.Event()
+        self._closed = threading.Event()
+        self._bridges = [
+            threading.Thread(target=self._bridge, args=(self.login_logs, login_log_queue.put), daemon=True),
+            threading.Thread(target=self._bridge, args=(self.scraper_logs, scraper_log_queue.put), daemon=True),
+            threading.Thread(target=self._bridge, args=(self.metrics, lambda metric: on_metric and on_metric(*metric)), daemon=True),
+            threading.Thread(target=self._bridge, args=(self.spans, lambda span: on_span and on_span(span)), daemon=True),
+            threading.Thread(target=self._bridge, args=(self.events, lambda event: on_event and on_event(*event)), daemon=True),
+        ]
+        for bridge in self._bridges:
+            bridge.start()
+
+    @staticmethod
+    def new_login_event():
+        return _ctx.Event()
+
+    def _bridge(self, source, deliver):
+        while not self._closed.is_set():
+            try:
+                deliver(source.get(timeout=0.5))
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+
+    def close(self, processes, timeout=5):
+        """Para os filhos, encerra os que não saírem a tempo e libera as filas."""
+        self.stop_event.set()
+        stuck = []
+        deadline = time.time() + timeout
+        for process in processes:
+            if isinstance(process, WorkerProcess):
+                process.join(timeout=max(0, deadline - time.time()))
+                if process.is_alive():
+                    stuck.append(process)
+        # Processos que não saíram levam junto apenas os navegadores que abriram
+        orphans = []
+        for process in stuck:
+            with contextlib.suppress(psutil.Error):
+                orphans.extend(psutil.Process(process.pid).children(recursive=True))
+            process.terminate()
+        for process in stuck:
+            process.join(timeout=1)
+        terminate_processes(orphans)
+        self._closed.set()
+        for bridge in self._bridges:
+            bridge.join(timeout=1)
+        for channel in (self.tasks, self.results, self.login_logs, self.scraper_logs, self.metrics, self.spans, self.events):
+            channel.close()
+            channel.cancel_join_thread()
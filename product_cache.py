@@ -0,0 +1,167 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from extractor import SECTIONS, SECTION_FIELDS, SECTIONS_OK_KEY
+
+# Resultados que valem como resposta definitiva da loja e podem ir para o cache
+CACHEABLE_STATUSES = ("Disponível", "Indisponível", "Não Encontrado")
+
+DEFAULT_TTL_HOURS = {"pricing": 24, "taxes": 24, "info": 24 * 30, "not_found": 24 * 30}
+
+
+class ProductCache:
+    """
+    Cache em disco (SQLite) dos produtos retornados por search_product,
+    com validade separada por seção: preços e impostos expiram rápido,
+    informações estáticas e "Não Encontrado" duram mais.
+
+    lookup() devolve o produto em cache e as seções vencidas; só essas
+    precisam ser buscadas de novo. O tamanho é limitado por max_entries,
+    descartando os códigos acessados há mais tempo.
+    """
+
+    def __init__(self, path: str, ttl_hours: Optional[dict] = None, max_entries: int = 200000):
+        ttl_hours = {**DEFAULT_TTL_HOURS, **(ttl_hours or {})}
+        self.ttl = {key: hours * 3600 for key, hours in ttl_hours.items()}
+        self.max_entries = max_entries
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._accessed = {}  # code -> último acesso ainda não gravado
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS products (code TEXT PRIMARY KEY, data TEXT NOT NULL, "
+            "pricing_at REAL, taxes_at REAL, info_at REAL, last_access REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS products_last_access ON products (last_access)")
+        self.conn.commit()
+        self._count = self.conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def lookup(self, code: str, row_num=None, sections=SECTIONS, count: bool = True):
+        """
+        Retorna (produto, seções_vencidas). produto é None quando não há nada
+        aproveitável; seções_vencidas vazio significa acerto completo.
+        count=False não altera os contadores (consulta repetida do mesmo código).
+        """
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT data, pricing_at, taxes_at, info_at FROM products WHERE code = ?", (code,)
+            ).fetchone()
+            if row:
+                # Sem escrita aqui: o carimbo de acesso é gravado no próximo store() ou no close()
+                self._accessed[code] = now
+            product, stale, outcome = self._classify(row, now, sections)
+            if outcome == "hit":
+                self.hits += count
+            elif outcome == "partial":
+                self.partial_hits += count
+            else:
+                self.misses += count
+
+        if product is not None:
+            product["row_num"] = row_num
+        return product, stale
+
+    def _classify(self, row, now: float, sections):
+        """(produto, seções_vencidas, "hit" | "partial" | "miss") de uma linha da tabela."""
+        if not row:
+            return None, set(sections), "miss"
+
+        product = json.loads(row[0])
+        fetched_at = dict(zip(SECTIONS, row[1:]))
+
+        if product.get("status") == "Não Encontrado":
+            if fetched_at["info"] and now - fetched_at["info"] < self.ttl["not_found"]:
+                return product, set(), "hit"
+            return None, set(sections), "miss"
+
+        stale = {s for s in sections if not fetched_at[s] or now - fetched_at[s] >= self.ttl[s]}
+        if not stale:
+            return product, stale, "hit"
+        if len(stale) < len(sections):
+            return product, stale, "partial"
+        return None, stale, "miss"
+
+    def store(self, product: dict, sections=SECTIONS):
+        """
+        Grava o produto, renovando a validade apenas das seções buscadas que
+        o extractor leu sem erro (product[SECTIONS_OK_KEY], quando presente).
+        """
+        if product.get("status") not in CACHEABLE_STATUSES:
+            return
+        now = time.time()
+        if product["status"] != "Disponível":
+            # Indisponível/Não Encontrado é uma resposta completa (a validade do
+            # "não encontrado" usa o carimbo de info)
+            sections = SECTIONS
+        elif SECTIONS_OK_KEY in product:
+            sections = set(sections) & set(product[SECTIONS_OK_KEY])
+        data = json.dumps({k: v for k, v in product.items() if k not in ("row_num", SECTIONS_OK_KEY)}, ensure_ascii=False)
+        stamps = [now if s in sections else None for s in SECTIONS]
+        with self._lock:
+            self._flush_access()
+            existed = self.conn.execute("SELECT 1 FROM products WHERE code = ?", (product["code"],)).fetchone()
+            self.conn.execute(
+                "INSERT INTO products (code, data, pricing_at, taxes_at, info_at, last_access) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (code) DO UPDATE SET data = excluded.data, "
+                "pricing_at = COALESCE(excluded.pricing_at, pricing_at), "
+                "taxes_at = COALESCE(excluded.taxes_at, taxes_at), "
+                "info_at = COALESCE(excluded.info_at, info_at), "
+                "last_access = excluded.last_access",
+                (product["code"], data, *stamps, now),
+            )
+            if not existed:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._evict()
+            self.conn.commit()
+
+    def _flush_access(self):
+        if self._accessed:
+            self.conn.executemany("UPDATE products SET last_access = ? WHERE code = ?",
+                                  [(at, code) for code, at in self._accessed.items()])
+            self._accessed.clear()
+
+    def _evict(self):
+        """Remove os acessados há mais tempo, deixando 10% de folga abaixo do limite."""
+        target = int(self.max_entries * 0.9)
+        excess = self._count - target
+        self.conn.execute(
+            "DELETE FROM products WHERE code IN (SELECT code FROM products ORDER BY last_access LIMIT ?)", (excess,)
+        )
+        self._count = target
+
+    @staticmethod
+    def merge(cached: Optional[dict], fresh: dict, sections) -> dict:
+        """
+        Combina o produto em cache com o resultado de uma busca parcial: os
+        campos das seções buscadas (e nome/status) vêm da busca nova.
+        """
+        if not cached or fresh.get("status") != "Disponível":
+            return fresh
+        merged = dict(cached)
+        merged["name"] = fresh.get("name") or cached.get("name", "")
+        merged["status"] = fresh["status"]
+        merged["row_num"] = fresh.get("row_num")
+        if SECTIONS_OK_KEY in fresh:
+            merged[SECTIONS_OK_KEY] = fresh[SECTIONS_OK_KEY]
+        for section in sections:
+            for field in SECTION_FIELDS[section]:
+                merged[field] = fresh.get(field, "")
+        return merged
+
+    def stats_line(self) -> str:
+        return f"Cache: {self.hits} acerto(s), {self.partial_hits} parcial(is), {self.misses} falta(s), {self._count} produto(s) em disco."
+
+    def close(self):
+        with self._lock:
+            self._flush_access()
+            self.conn.commit()
+            self.conn.close()
@@ -0,0 +1,37 @@
+import random
+
+# Status que indicam falha passageira: a linha entra na repescagem final
+TRANSIENT_STATUSES = ("Tempo Esgotado", "ERRO GRAVE")
+# Status de uma tarefa que esgotou as tentativas (vai para a lista de dead letters)
+DEAD_LETTER_STATUS = "Falha Persistente"
+
+
+class RetryPolicy:
+    """
+    Política de novas tentativas lida de scraping_settings: max_retries
+    tentativas extras por tarefa, com espera exponencial (retry_delay * 2^n,
+    limitada a max_retry_delay) e jitter para os workers não baterem juntos.
+    """
+
+    def __init__(self, max_retries: int = 3, retry_delay: float = 5, max_delay: float = 300):
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_config(cls, config: dict) -> "RetryPolicy":
+        settings = config.get("scraping_settings", {})
+        return cls(settings.get("max_retries", 3), settings.get("retry_delay", 5), settings.get("max_retry_delay", 300))
+
+    def delay(self, attempt: int) -> float:
+        """Espera antes da tentativa `attempt` (0 = primeira repetição), com jitter."""
+        cap = min(self.max_delay, self.retry_delay * (2 ** attempt))
+        return cap / 2 + random.uniform(0, cap / 2)
+
+    def exhausted(self, attempt: int) -> bool:
+        """True quando `attempt` repetições já passaram do limite."""
+        return attempt > self.max_retries
+
+    @staticmethod
+    def is_transient(status) -> bool:
+        return str(status or "").startswith(TRANSIENT_STATUSES)
@@ -0,0 +1,183 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+FORMAT_VERSION = "v1"
+# Limite de caracteres por célula do Excel é 32.767; deixa folga
+MAX_CELL_CHARS = 32000
+
+
+class RowRangeSet:
+    """
+    Conjunto de números de linha guardado como intervalos disjuntos
+    (início, fim) ordenados. Inserção e remoção são incrementais e a
+    serialização é proporcional ao número de intervalos, não de linhas.
+
+    Formato serializado (versionado): "v1:2-500,502,504-900".
+    """
+
+    def __init__(self, rows=()):
+        self._starts = []
+        self._ends = []
+        self._len = 0
+        self.update(rows)
+
+    def add(self, row: int):
+        starts, ends = self._starts, self._ends
+        i = bisect_right(starts, row) - 1
+        if i >= 0 and ends[i] >= row:
+            return
+        joins_left = i >= 0 and ends[i] == row - 1
+        joins_right = i + 1 < len(starts) and starts[i + 1] == row + 1
+        if joins_left and joins_right:
+            ends[i] = ends[i + 1]
+            del starts[i + 1], ends[i + 1]
+        elif joins_left:
+            ends[i] = row
+        elif joins_right:
+            starts[i + 1] = row
+        else:
+            starts.insert(i + 1, row)
+            ends.insert(i + 1, row)
+        self._len += 1
+
+    def discard(self, row: int):
+        starts, ends = self._starts, self._ends
+        i = bisect_right(starts, row) - 1
+        if i < 0 or ends[i] < row:
+            return
+        if starts[i] == ends[i]:
+            del starts[i], ends[i]
+        elif row == starts[i]:
+            starts[i] += 1
+        elif row == ends[i]:
+            ends[i] -= 1
+        else:
+            starts.insert(i + 1, row + 1)
+            ends.insert(i + 1, ends[i])
+            ends[i] = row - 1
+        self._len -= 1
+
+    def remove(self, row: int):
+        if row not in self:
+            raise KeyError(row)
+        self.discard(row)
+
+    def add_range(self, start: int, end: int):
+        """Adiciona o intervalo fechado [start, end]."""
+        if not self._ends or start > self._ends[-1] + 1:
+            # Caminho rápido: intervalo depois de todos os existentes
+            self._starts.append(start)
+            self._ends.append(end)
+            self._len += end - start + 1
+            return
+        for row in range(start, end + 1):
+            self.add(row)
+
+    def update(self, rows):
+        for row in rows:
+            self.add(row)
+
+    def difference_update(self, rows):
+        for row in rows:
+            self.discard(row)
+
+    def clear(self):
+        self._starts.clear()
+        self._ends.clear()
+        self._len = 0
+
+    def max(self) -> int:
+        return self._ends[-1] if self._ends else 0
+
+    def ranges(self):
+        return list(zip(self._starts, self._ends))
+
+    def __contains__(self, row) -> bool:
+        i = bisect_right(self._starts, row) - 1
+        return i >= 0 and self._ends[i] >= row
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __bool__(self) -> bool:
+        return self._len > 0
+
+    def __iter__(self):
+        for start, end in zip(self._starts, self._ends):
+            yield from range(start, end + 1)
+
+    def to_string(self) -> str:
+        parts = [str(s) if s == e else f"{s}-{e}" for s, e in zip(self._starts, self._ends)]
+        return f"{FORMAT_VERSION}:" + ",".join(parts)
+
+    def to_chunks(self, max_chars: int = MAX_CELL_CHARS) -> list:
+        """Serializa em pedaços que cabem numa célula do Excel cada."""
+        text = self.to_string()
+        chunks = []
+        while len(text) > max_chars:
+            cut = text.rfind(",", 0, max_chars) + 1 or max_chars
+            chunks.append(text[:cut])
+            text = text[cut:]
+        chunks.append(text)
+        return chunks
+
+    @classmethod
+    def from_string(cls, text) -> "RowRangeSet":
+        """Lê o formato versionado ou a lista separada por vírgulas das versões antigas."""
+        result = cls()
+        if not text:
+            return result
+        text = str(text)
+        if text.startswith(f"{FORMAT_VERSION}:"):
+            text = text[len(FORMAT_VERSION) + 1:]
+        for part in text.split(","):
+            part = part.strip()
+            start, _, end = part.partition("-")
+            if not start.isdigit() or (end and not end.isdigit()):
+                continue
+            result.add_range(int(start), int(end or start))
+        return result
+
+
+class RowCodeIndex:
+    """
+    Índice linha -> código da planilha de entrada, montado numa única
+    passada em streaming. As linhas ficam num array de inteiros ordenado e
+    cada código distinto é guardado uma única vez, então a busca de um
+    buraco custa O(log n) sem reabrir a planilha.
+    """
+
+    def __init__(self):
+        self._rows = array("l")
+        self._codes = []
+        self._interned = {}
+
+    def append(self, row: int, code: str):
+        """Adiciona uma linha; as linhas devem chegar em ordem crescente."""
+        if self._rows and row <= self._rows[-1]:
+            raise ValueError(f"Linha {row} fora de ordem")
+        self._rows.append(row)
+        self._codes.append(self._interned.setdefault(code, code))
+
+    def get(self, row: int, default=None):
+        i = bisect_left(self._rows, row)
+        if i < len(self._rows) and self._rows[i] == row:
+            return self._codes[i]
+        return default
+
+    def rows(self):
+        return iter(self._rows)
+
+    @property
+    def distinct_codes(self) -> int:
+        return len(self._interned)
+
+    def __contains__(self, row) -> bool:
+        return self.get(row) is not None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self):
+        """Itera pares (linha, código) em ordem de linha."""
+        return zip(self._rows, self._codes)
@@ -0,0 +1,369 @@
+"""
+Simulador do escalonamento, sem Chrome: o ScrapingEngine real (manager com
+lotes de login, workers, repescagem, busca de buracos e gravação em lote)
+roda com uma sessão e um extractor falsos, cujos tempos, timeouts e quedas
+de navegador seguem um modelo estatístico.
+
+    python simulator.py --workers 1000 --items 20000 --time-scale 0.001
+    python simulator.py --workers 50 --items 2000 --crash-rate 0.02 --hang-rate 0.01
+
+Os tempos do modelo são em segundos "reais" e cada espera é multiplicada
+por time_scale. O sorteio de cada busca depende só de (seed, código,
+tentativa): a mesma carga produz as mesmas latências e falhas em qualquer
+execução, seja qual for a ordem em que os workers pegam as tarefas.
+
+O relatório traz espera na fila (início da execução até a primeira busca de
+cada item), ociosidade dos workers, cauda do fim da execução e a latência
+por fase, já convertidos para a escala do modelo. As esperas fixas do motor
+(consultas de 0,5-1 s às filas) não são escaladas e aparecem ampliadas.
+"""
+import argparse
+import functools
+import json
+import math
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+from benchmark import write_input
+from engine import ScrapingEngine, load_config
+from extractor import SECTIONS, SECTIONS_OK_KEY, empty_product, status_result
+from timing import percentile
+
+DEFAULT_MODEL = {
+    "login_seconds": 8.0,        # login completo
+    "restore_seconds": 2.0,      # Chrome novo com a sessão compartilhada
+    "login_failure_rate": 0.02,
+    "page_median": 2.5,          # driver.get até o nome do produto (log-normal)
+    "page_sigma": 0.5,
+    "tab_median": 0.6,           # cada aba visitada (log-normal)
+    "tab_sigma": 0.4,
+    "hang_rate": 0.01,           # página que nunca carrega: estoura o prazo da espera inicial
+    "crash_rate": 0.005,         # navegador cai no meio da busca (WebDriverException)
+    "not_found_rate": 0.05,
+    "unavailable_rate": 0.03,
+    "time_scale": 0.01,
+    "seed": 1,
+}
+
+
+class FakeDriver:
+    """Driver sem navegador: só conta as páginas e se foi fechado."""
+
+    def __init__(self, driver_id: int):
+        self.driver_id = driver_id
+        self.pages = 0
+        self.closed = False
+
+    def quit(self):
+        self.closed = True
+
+
+class FakeSession:
+    """
+    Substituto de login.SharedSession: o primeiro driver faz o "login
+    completo" (login_seconds), os demais restauram a sessão
+    (restore_seconds). Logins falham com login_failure_rate.
+    """
+
+    def __init__(self, model: dict, headless: bool = False, log_queue=None, session=None, config=None):
+        self.model = model
+        self.log_queue = log_queue
+        self._lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self._random = random.Random(f"{model['seed']}:login")
+        self._session = session
+        self._generation = 0
+        self._drivers = 0
+        self.full_logins = 0
+        self.restores = 0
+
+    @classmethod
+    def factory(cls, model: dict):
+        """Callable no formato de ScrapingEngine(session_factory=...)."""
+        # partial (e não lambda): também vai por pickle para os processos worker
+        return functools.partial(cls, model)
+
+    @property
+    def session(self):
+        return self._session
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def _sleep(self, seconds: float):
+        time.sleep(seconds * self.model["time_scale"])
+
+    def _failed(self) -> bool:
+        with self._counter_lock:
+            return self._random.random() < self.model["login_failure_rate"]
+
+    def _new_driver(self) -> FakeDriver:
+        with self._counter_lock:
+            self._drivers += 1
+            return FakeDriver(self._drivers)
+
+    def get_driver(self):
+        if self._session:
+            self._sleep(self.model["restore_seconds"])
+            if not self._failed():
+                with self._counter_lock:
+                    self.restores += 1
+                return self._new_driver()
+        with self._lock:
+            return self._full_login(keep_driver=True)
+
+    def ensure_session(self):
+        if self._session:
+            return self._session
+        with self._lock:
+            if not self._session:
+                self._full_login(keep_driver=False)
+            return self._session
+
+    def invalidate(self, generation=None):
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._session = None
+            self._generation += 1
+
+    def _full_login(self, keep_driver: bool):
+        self._sleep(self.model["login_seconds"])
+        if self._failed():
+            return None
+        self.full_logins += 1
+        self._session = {"cookies": [], "landing_url": "fake://"}
+        self._generation += 1
+        return self._new_driver() if keep_driver else None
+
+
+class FakeExtractor:
+    """
+    Substituto de extractor.search_product (mesma assinatura). Cada busca
+    sorteia, com random.Random(seed:código:tentativa), a latência da página
+    e das abas, travamento, queda do navegador e o status do produto. As
+    esperas passam pelos prazos de `timeouts` (AdaptiveTimeouts do motor),
+    como no extractor real.
+
+    calls guarda (código, tentativa, worker, início, fim, desfecho) de cada
+    busca, em segundos de relógio.
+    """
+
+    def __init__(self, model: dict):
+        self.model = model
+        self._lock = threading.Lock()
+        self._attempts = {}
+        self.calls = []
+
+    def _sleep(self, seconds: float):
+        time.sleep(seconds * self.model["time_scale"])
+
+    def __getstate__(self):
+        # Cópia enviada a um processo worker: só o modelo (calls fica neste processo)
+        return {"model": self.model}
+
+    def __setstate__(self, state):
+        self.__init__(state["model"])
+
+    def __call__(self, driver, product_code, worker_id=None, row_num=None, log_queue=None,
+                 extraction_mode: str = "standard", sections=SECTIONS, timeouts=None, spans=None):
+        model = self.model
+        started = time.time()
+        with self._lock:
+            attempt = self._attempts.get(product_code, 0)
+            self._attempts[product_code] = attempt + 1
+        draw = random.Random(f"{model['seed']}:{product_code}:{attempt}")
+        outcome = "ok"
+        try:
+            driver.pages += 1
+            page = draw.lognormvariate(math.log(model["page_median"]), model["page_sigma"])
+            if draw.random() < model["hang_rate"]:
+                page = math.inf
+            crash_at = draw.random() if draw.random() < model["crash_rate"] else None
+
+            budget = timeouts.budget("initial") if timeouts else 10
+            if crash_at is not None:
+                self._sleep(min(page, budget) * crash_at)
+                outcome = "crash"
+                driver.closed = True
+                raise WebDriverException("Navegador simulado caiu")
+            if page > budget:
+                self._sleep(budget)
+                self._record(timeouts, spans, "initial", budget, True, worker_id, product_code)
+                outcome = "timeout"
+                return status_result(product_code, "Tempo Esgotado", row_num)
+            self._sleep(page)
+            self._record(timeouts, spans, "initial", page, False, worker_id, product_code)
+
+            status = draw.random()
+            if status < model["not_found_rate"]:
+                outcome = "not_found"
+                return status_result(product_code, "Não Encontrado", row_num)
+            product = empty_product(product_code, f"Produto simulado {product_code}", row_num)
+            if status < model["not_found_rate"] + model["unavailable_rate"]:
+                outcome = "unavailable"
+                product["status"] = "Indisponível"
+                return product
+
+            product[SECTIONS_OK_KEY] = []
+            for section in sections:
+                seconds = draw.lognormvariate(math.log(model["tab_median"]), model["tab_sigma"])
+                name = "pricing" if section == "pricing" else "tab"
+                limit = timeouts.budget(name) if timeouts else 10
+                self._sleep(min(seconds, limit))
+                self._record(timeouts, spans, section, min(seconds, limit), seconds > limit, worker_id, product_code, name)
+                if seconds <= limit:
+                    product[SECTIONS_OK_KEY].append(section)
+            if "pricing" in product[SECTIONS_OK_KEY]:
+                product.update(pricing="100,00", discount="0", pricing_with="120,00")
+            return product
+        finally:
+            with self._lock:
+                self.calls.append((product_code, attempt, worker_id, started, time.time(), outcome))
+
+    def _record(self, timeouts, spans, phase, seconds, timed_out, worker_id, code, budget_name=None):
+        """Espera no prazo adaptativo (segundos do modelo) e span (segundos de relógio)."""
+        if timeouts:
+            timeouts.record(budget_name or phase, seconds, timed_out=timed_out)
+        if spans:
+            spans.record(phase, seconds * self.model["time_scale"], worker_id, code, ok=not timed_out)
+
+
+def _percentiles(values) -> dict:
+    ordered = sorted(values)
+    if not ordered:
+        return {}
+    return {"p50": percentile(ordered, 0.5), "p95": percentile(ordered, 0.95), "p99": percentile(ordered, 0.99), "max": ordered[-1]}
+
+
+def _scaled(stats: dict, scale: float) -> dict:
+    return {key: round(value / scale, 3) if isinstance(value, float) else value for key, value in stats.items()}
+
+
+def simulate(workers: int, items: int, model=None, config=None, login_batch_size=None, verbose: bool = False) -> dict:
+    """
+    Roda o ScrapingEngine com `workers` workers simulados sobre `items`
+    códigos e devolve as medições (ver o docstring do módulo).
+    """
+    model = {**DEFAULT_MODEL, **(model or {})}
+    scale = model["time_scale"]
+    config = json.loads(json.dumps(config or load_config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json"))))
+    settings = config.setdefault("scraping_settings", {})
+    settings.update(engine="selenium", execution_mode="threads", num_workers=workers)
+    if login_batch_size:
+        settings["login_batch_size"] = login_batch_size
+    # Esperas entre tentativas também seguem a escala do modelo
+    settings["retry_delay"] = settings.get("retry_delay", 5) * scale
+    settings["max_retry_delay"] = settings.get("max_retry_delay", 300) * scale
+    settings.setdefault("autoscale", {})["enabled"] = False
+    config.setdefault("cache_settings", {})["enabled"] = False
+    config.setdefault("system", {})["timing"] = {"enabled": True, "format": "jsonl"}
+    config["system"]["log_file"] = {"enabled": False}
+
+    extractor = FakeExtractor(model)
+    log_queue = queue.Queue()
+    with tempfile.TemporaryDirectory(prefix="simulacao_") as workdir:
+        input_file = write_input(os.path.join(workdir, "entrada.xlsx"), items)
+        engine = ScrapingEngine(config, workdir, login_log_queue=log_queue, scraper_log_queue=log_queue,
+                                session_factory=FakeSession.factory(model), search=extractor)
+        engine.headless = True
+        engine.set_input(input_file)
+        engine.output_file = ScrapingEngine.default_output_for(input_file)
+        if not engine.prepare():
+            raise RuntimeError("O motor recusou a execução")
+
+        done = threading.Event()
+        printer = threading.Thread(target=_print_logs, args=(log_queue, done, verbose), daemon=True)
+        printer.start()
+        started = time.time()
+        try:
+            success = engine.run()
+        finally:
+            finished = time.time()
+            done.set()
+            printer.join(timeout=5)
+
+    # Primeira busca e conclusão de cada item (última tentativa)
+    first_call, completed, outcomes = {}, {}, {}
+    for code, attempt, worker_id, call_start, call_end, outcome in extractor.calls:
+        first_call[code] = min(first_call.get(code, call_start), call_start)
+        completed[code] = max(completed.get(code, call_end), call_end)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    done_times = sorted(completed.values())
+    last_done = done_times[-1] if done_times else finished
+
+    phases = engine.timing_summary()
+    queue_idle = phases.get("queue", {}).get("total", 0.0)
+    busy = phases.get("item", {}).get("total", 0.0)
+    elapsed = finished - started
+    return {
+        "success": success,
+        "workers": workers,
+        "items": items,
+        "saved": engine.saved_items_count - engine.session_start_count,
+        "time_scale": scale,
+        "elapsed_model_s": round(elapsed / scale, 1),
+        "wall_s": round(elapsed, 2),
+        "items_per_min_model": round(items / (elapsed / scale) * 60, 1) if elapsed > 0 else 0.0,
+        "calls": len(extractor.calls),
+        "outcomes": outcomes,
+        "logins": {"full": engine.shared_session.full_logins, "restores": engine.shared_session.restores},
+        # Todas as tarefas entram na fila no início: espera = início -> primeira busca
+        "queue_wait": _scaled(_percentiles([t - started for t in first_call.values()]), scale),
+        # Fração do tempo dos workers (já logados) parada esperando tarefa
+        "worker_idle_fraction": round(queue_idle / (queue_idle + busy), 3) if queue_idle + busy else 0.0,
+        "tail": {
+            # Quanto durou o último 1%/5% dos itens e o que o motor gastou depois do último
+            "last_5pct_s": round((last_done - done_times[int(0.95 * (len(done_times) - 1))]) / scale, 2) if done_times else 0.0,
+            "last_1pct_s": round((last_done - done_times[int(0.99 * (len(done_times) - 1))]) / scale, 2) if done_times else 0.0,
+            "after_last_item_s": round((finished - last_done) / scale, 2),
+        },
+        "phases": {phase: _scaled(stats, scale) for phase, stats in phases.items()},
+        "waits": engine.wait_stats(),
+    }
+
+
+def _print_logs(log_queue, done: threading.Event, verbose: bool):
+    while not done.is_set() or not log_queue.empty():
+        try:
+            message = log_queue.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        if verbose:
+            print(message, flush=True)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simula o escalonamento do motor com workers e extractor falsos.")
+    parser.add_argument("--workers", type=int, default=100)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--login-batch-size", type=int, help="Logins simultâneos (padrão: scraping_settings.login_batch_size)")
+    for name, default in DEFAULT_MODEL.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    parser.add_argument("--json-out", help="Também grava o relatório neste arquivo")
+    parser.add_argument("--verbose", action="store_true", help="Mostra o log do motor")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    model = {name: getattr(args, name) for name in DEFAULT_MODEL}
+    report = simulate(args.workers, args.items, model, login_batch_size=args.login_batch_size, verbose=args.verbose)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 0 if report["success"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
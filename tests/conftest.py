@@ -0,0 +1,16 @@
+import json
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def config():
+    """Cópia do config.json do projeto, sem cache nem arquivo de log."""
+    with open(os.path.join(ROOT, "config.json"), encoding="utf-8") as f:
+        config = json.load(f)
+    config.setdefault("cache_settings", {})["enabled"] = False
+    config.setdefault("system", {})["log_file"] = {"enabled": False}
+    return config
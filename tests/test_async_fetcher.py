@@ -0,0 +1,198 @@
+import gzip
+import queue
+import socket
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import async_fetcher
+from async_fetcher import AsyncProductFetcher
+from fixture_server import FixtureShop, SESSION_COOKIE
+
+PRODUCT_PAGE = (
+    '<html><body><div id="__next"><div><h1>Peça {code}</h1>'
+    "<table><tr><td>BRL 10,00</td><td>-</td><td>BRL 12,00</td></tr></table>"
+    "</div></div></body></html>"
+)
+
+
+class _Shop(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    valid_cookie = "sessao=2"
+
+    def do_GET(self):
+        code = self.path.rsplit("/", 1)[-1]
+        if self.path.startswith("/pt-BR/login"):
+            return self._send(200, b"login")
+        if self.valid_cookie not in self.headers.get("Cookie", ""):
+            return self._send(302, b"", [("Location", "/pt-BR/login")])
+        if code == "0404":
+            return self._send(404, b"")
+        if code == "echo":
+            # Devolve no nome do produto os cookies recebidos
+            return self._send(200, PRODUCT_PAGE.format(code=self.headers.get("Cookie", "")).encode("utf-8"))
+        if code == "redirect":
+            # Redirecionamento que também renova um cookie
+            return self._send(302, b"", [("Location", "/en-GB/products/0009"), ("Set-Cookie", "extra=1; Path=/")])
+        body = PRODUCT_PAGE.format(code=code).encode("utf-8")
+        if code == "0009" and "extra=1" in self.headers.get("Cookie", ""):
+            body = body.replace(b"Pe\xc3\xa7a", b"Extra")
+        headers = [("Content-Type", "text/html; charset=utf-8")]
+        if code == "latin":
+            body = PRODUCT_PAGE.format(code=code).encode("latin-1")
+            headers = [("Content-Type", "text/html; charset=iso-8859-1")]
+        elif code in ("zlib", "raw"):
+            compressor = zlib.compressobj(wbits=zlib.MAX_WBITS if code == "zlib" else -zlib.MAX_WBITS)
+            body = compressor.compress(body) + compressor.flush()
+            headers.append(("Content-Encoding", "deflate"))
+        elif "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            headers.append(("Content-Encoding", "gzip"))
+        self._send(200, body, headers)
+
+    def _send(self, status, body, headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def shop_url(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Shop)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr(async_fetcher, "PRODUCT_URL", url + "/en-GB/products/{code}")
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+def _session(value):
+    return {"cookies": [{"name": "sessao", "value": value, "domain": "127.0.0.1", "path": "/"}]}
+
+
+def _run(session, codes, **options):
+    tasks, results = queue.Queue(), queue.Queue()
+    for row, code in enumerate(codes, start=2):
+        tasks.put((code, row))
+    fetcher = AsyncProductFetcher(session, tasks, results, threading.Event(), log_queue=queue.Queue(), **options)
+    fetcher.run()
+    return fetcher, {item["code"]: item for item in (results.get_nowait() for _ in range(results.qsize()))}
+
+
+def test_fetches_products_concurrently(shop_url):
+    codes = [str(i).zfill(4) for i in range(1, 31)]
+    fetcher, results = _run(_session("2"), codes + ["0404"], max_in_flight=10)
+
+    assert fetcher.completed == 31
+    assert {results[code]["status"] for code in codes} == {"Disponível"}
+    assert results["0001"]["name"] == "Peça 0001" and results["0001"]["pricing"] == "10,00"
+    assert results["0404"]["status"] == "Não Encontrado"
+
+
+def test_follows_redirects_and_keeps_their_cookies(shop_url):
+    _, results = _run(_session("2"), ["redirect"])
+    assert results["redirect"]["name"] == "Extra 0009"
+
+
+def test_sends_only_the_cookies_that_match_host_and_path(shop_url):
+    session = {"cookies": [
+        {"name": "sessao", "value": "2", "domain": "127.0.0.1", "path": "/"},
+        {"name": "outro_host", "value": "x", "domain": "example.com", "path": "/"},
+        {"name": "outro_path", "value": "y", "domain": "127.0.0.1", "path": "/pt-BR"},
+    ]}
+    _, results = _run(session, ["echo"])
+    assert results["echo"]["name"] == "Peça sessao=2"
+
+
+def test_decodes_deflate_and_the_declared_charset(shop_url):
+    _, results = _run(_session("2"), ["zlib", "raw", "latin"])
+    assert [results[code]["name"] for code in ("zlib", "raw", "latin")] == ["Peça zlib", "Peça raw", "Peça latin"]
+
+
+def test_expired_session_is_refreshed_once_and_requeued(shop_url):
+    refreshes = []
+
+    def refresh():
+        refreshes.append(1)
+        return _session("2")
+
+    # Várias buscas expiram com os mesmos cookies: uma única renovação
+    codes = [str(i).zfill(4) for i in range(1, 11)]
+    _, results = _run(_session("1"), codes, refresh_session=refresh)
+    assert len(refreshes) == 1
+    assert {results[code]["status"] for code in codes} == {"Disponível"}
+
+
+def test_unparseable_page_goes_to_the_fallback(shop_url, monkeypatch):
+    # Página sem os dados das abas: o produto vai para o fallback com navegador
+    calls = []
+
+    def fallback(code, row_num):
+        calls.append(code)
+        return {"code": code, "name": "via navegador", "status": "Disponível", "row_num": row_num}
+
+    monkeypatch.setattr(async_fetcher, "parse_product_page", lambda html, code, row_num: None)
+    _, results = _run(_session("2"), ["0001"], fallback=fallback)
+    assert calls == ["0001"] and results["0001"]["name"] == "via navegador"
+
+
+@pytest.fixture
+def fixture_shop():
+    with FixtureShop(ssr=True, not_found_rate=0, unavailable_rate=0, cannot_add_rate=0) as shop:
+        yield shop
+
+
+def _fixture_session(shop) -> dict:
+    http = requests.Session()
+    http.post(shop.base_url + "/sso/kmsi")
+    return {"cookies": [{"name": SESSION_COOKIE, "value": http.cookies[SESSION_COOKIE], "domain": "127.0.0.1", "path": "/"}]}
+
+
+def _fetch(session, base_url, codes, monkeypatch, **options):
+    monkeypatch.setattr(async_fetcher, "PRODUCT_URL", base_url + "/en-GB/products/{code}")
+    tasks, results = queue.Queue(), queue.Queue()
+    for row, code in enumerate(codes, start=2):
+        tasks.put((code, row, 0))
+    AsyncProductFetcher(session, tasks, results, threading.Event(), log_queue=queue.Queue(), **options).run()
+    return [results.get_nowait() for _ in range(results.qsize())]
+
+
+def test_rate_limiter_wait_does_not_count_toward_timeout(fixture_shop, monkeypatch):
+    # 20 requisições a 10/s levam ~2 s na fila do limitador, o dobro do prazo
+    codes = [str(i).zfill(10) for i in range(1, 21)]
+    results = _fetch(_fixture_session(fixture_shop), fixture_shop.base_url, codes, monkeypatch, per_host_rate=10, timeout=1)
+
+    assert sorted(r["code"] for r in results) == codes
+    assert {r["status"] for r in results} == {"Disponível"}
+
+
+def test_connection_closed_before_headers_is_a_connection_error(monkeypatch):
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    port = server.getsockname()[1]
+
+    def accept_and_close():
+        for _ in range(2):
+            connection, _ = server.accept()
+            connection.recv(65536)
+            connection.close()
+
+    threading.Thread(target=accept_and_close, daemon=True).start()
+    try:
+        results = _fetch({"cookies": []}, f"http://127.0.0.1:{port}", ["0000000001"], monkeypatch, timeout=5)
+    finally:
+        server.close()
+
+    # Sem fallback: vira "página não interpretável" pelo caminho de erro de conexão
+    assert results[0]["status"] == "ERRO GRAVE: página não interpretável"
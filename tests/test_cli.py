@@ -0,0 +1,69 @@
+import json
+import os
+import queue
+
+import openpyxl
+import pytest
+
+import cli
+from engine import ScrapingEngine, calculate_file_hash
+from journal import ResultJournal
+
+
+@pytest.fixture
+def paths(tmp_path, config, monkeypatch):
+    # Os handlers de SIGINT/SIGTERM do cli não devem sobreviver ao teste
+    monkeypatch.setattr(cli.signal, "signal", lambda signum, handler: None)
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(config), encoding="utf-8")
+    input_file = tmp_path / "entrada.xlsx"
+    wb = openpyxl.Workbook()
+    wb.active.title = "Itens"
+    wb.active.append(["Código"])
+    for code in ("0001", "0002"):
+        wb.active.append([code])
+    wb.save(input_file)
+    return str(config_path), str(input_file), str(tmp_path / "saida.xlsx")
+
+
+def _main(config_path, input_file, output, *extra):
+    return cli.main([input_file, "--config", config_path, "--output", output, "--quiet", *extra])
+
+
+def test_invalid_config_or_input_exits_with_error(paths, tmp_path):
+    config_path, input_file, output = paths
+    assert _main(str(tmp_path / "nao_existe.json"), input_file, output) == cli.EXIT_ERROR
+    assert _main(config_path, str(tmp_path / "nao_existe.xlsx"), output) == cli.EXIT_ERROR
+    assert _main(config_path, input_file, output, "--sheet", "Outra") == cli.EXIT_ERROR
+
+
+def test_resume_abort_does_not_start(paths):
+    config_path, input_file, output = paths
+    journal = ResultJournal(ResultJournal.path_for(output), ["row_num", "code", "status"])
+    journal.set_meta(input_hash=calculate_file_hash(input_file))
+    journal.checkpoint(calculate_file_hash(input_file)).record([{"row_num": 2, "status": "Disponível"}])
+    journal.close()
+
+    assert _main(config_path, input_file, output, "--resume", "abort") == cli.EXIT_NOT_STARTED
+
+
+@pytest.mark.parametrize("success, interrupted, code", [
+    (True, False, cli.EXIT_OK), (True, True, cli.EXIT_INTERRUPTED), (False, False, cli.EXIT_ERROR),
+])
+def test_run_outcome_sets_the_exit_code(paths, monkeypatch, success, interrupted, code):
+    def run(engine):
+        engine.interrupted = interrupted
+        return success
+
+    monkeypatch.setattr(ScrapingEngine, "run", run)
+    assert _main(*paths) == code
+
+
+def test_engine_without_output_does_not_start(paths, config):
+    _, input_file, _ = paths
+    logs = queue.Queue()
+    engine = ScrapingEngine(config, os.path.dirname(input_file), login_log_queue=logs)
+    engine.set_input(input_file)
+
+    assert engine.check_output_continuity() is False and not engine.prepare()
+    assert "Nenhum arquivo de saída definido" in logs.get_nowait()
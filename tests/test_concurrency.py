@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+import pytest
+
+import concurrency
+from concurrency import AdaptiveConcurrency, CEILING_WINDOWS
+
+
+@pytest.fixture
+def machine(monkeypatch):
+    """Relógio, CPU e memória livre controlados pelo teste."""
+    state = SimpleNamespace(now=1000.0, cpu=10.0, free_mb=8192)
+    monkeypatch.setattr(concurrency, "time", SimpleNamespace(time=lambda: state.now))
+    monkeypatch.setattr(concurrency.psutil, "cpu_percent", lambda interval=None: state.cpu)
+    monkeypatch.setattr(concurrency.psutil, "virtual_memory",
+                        lambda: SimpleNamespace(available=state.free_mb * 1024 * 1024))
+    return state
+
+
+def _window(controller, machine, current, items=60, latency=1.0, failures=0, seconds=60):
+    """Uma janela de `seconds` com `items` itens concluídos; devolve adjust(current)."""
+    for i in range(items):
+        controller.record(latency, "Tempo Esgotado" if i < failures else "Disponível")
+    machine.now += seconds
+    return controller.adjust(current)
+
+
+def test_additive_increase_when_stable(machine):
+    controller = AdaptiveConcurrency(min_workers=1, max_workers=10, min_samples=10)
+    target, reason = _window(controller, machine, 4)
+    assert target == 5 and reason
+
+
+def test_multiplicative_decrease_on_timeouts(machine):
+    controller = AdaptiveConcurrency(max_workers=20, min_samples=10, max_timeout_rate=0.1, decrease_factor=0.75)
+    assert _window(controller, machine, 8, failures=12)[0] == 6
+    # Pelo menos um a menos, mesmo quando o fator arredonda para o mesmo valor
+    assert _window(controller, machine, 2, failures=12)[0] == 1
+
+
+def test_decrease_on_latency_cpu_and_memory(machine):
+    controller = AdaptiveConcurrency(max_workers=20, min_samples=10, latency_factor=2.0)
+    _window(controller, machine, 8, latency=1.0)
+    assert _window(controller, machine, 9, latency=2.5)[0] == 6
+
+    machine.cpu = 95
+    assert _window(controller, machine, 8)[0] == 6
+    machine.cpu, machine.free_mb = 10, 512
+    assert _window(controller, machine, 8)[0] == 6
+
+
+def test_increase_without_gain_steps_back_and_holds_the_ceiling(machine):
+    controller = AdaptiveConcurrency(max_workers=20, min_samples=10, min_gain=0.02)
+    assert _window(controller, machine, 4, items=60)[0] == 5
+    # O quinto worker não trouxe mais itens/min: volta a 4 e guarda o teto
+    assert _window(controller, machine, 5, items=60)[0] == 4
+    for _ in range(CEILING_WINDOWS - 1):
+        assert _window(controller, machine, 4, items=60) == (4, None)
+    # Teto expirado: volta a tentar crescer
+    assert _window(controller, machine, 4, items=60)[0] == 5
+
+
+def test_too_few_samples_only_clamps(machine):
+    controller = AdaptiveConcurrency(min_workers=2, max_workers=6, min_samples=10)
+    assert _window(controller, machine, 4, items=3) == (4, None)
+    assert _window(controller, machine, 9, items=3)[0] == 6
@@ -0,0 +1,169 @@
+import contextlib
+import os
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import psutil
+
+from driver_pool import BrowserProcessRegistry, DriverPool, terminate_processes
+
+
+class _Driver:
+    def __init__(self, number):
+        self.number = number
+        self.closed = threading.Event()
+
+    def quit(self):
+        self.closed.set()
+
+
+class _Session:
+    """Sessão compartilhada falsa: cada get_driver "restaura" um navegador novo."""
+
+    def __init__(self):
+        self.session = {"cookies": []}
+        self.generation = 0
+        self.created = 0
+        self._lock = threading.Lock()
+
+    def get_driver(self):
+        with self._lock:
+            self.created += 1
+            return _Driver(self.created)
+
+
+def _wait_for(condition, timeout=2):
+    end = time.time() + timeout
+    while not condition() and time.time() < end:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_driver_is_recycled_after_max_pages():
+    pool = DriverPool(_Session(), max_pages=3, max_rss_mb=0, spare_drivers=0, log=lambda message: None)
+    driver = pool.acquire()
+
+    assert pool.page_done(driver) is driver and pool.page_done(driver) is driver
+    replacement = pool.page_done(driver)
+    assert replacement is not driver and pool.recycled == 1
+    assert driver.closed.wait(2)
+    assert pool.pages(replacement) == 0
+
+
+def test_recycling_hands_over_the_warm_spare():
+    session = _Session()
+    pool = DriverPool(session, max_pages=1, max_rss_mb=0, spare_drivers=1, log=lambda message: None)
+    driver = pool.acquire()
+    assert _wait_for(lambda: len(pool._spares) == 1)
+    spare = pool._spares[0][0]
+
+    assert pool.page_done(driver) is spare
+    # O reserva usado é reposto em background
+    assert _wait_for(lambda: len(pool._spares) == 1) and session.created == 3
+
+    spares = [driver for driver, _ in pool._spares]
+    pool.close()
+    assert pool._spares == [] and all(d.closed.is_set() for d in spares)
+
+
+def test_spares_from_an_invalidated_session_are_discarded():
+    session = _Session()
+    pool = DriverPool(session, max_pages=0, max_rss_mb=0, spare_drivers=1, log=lambda message: None)
+    pool.acquire()
+    assert _wait_for(lambda: len(pool._spares) == 1)
+    old_spare = pool._spares[0][0]
+
+    # Sessão renovada: o reserva aberto com os cookies antigos não é entregue
+    session.generation += 1
+    driver = pool.acquire()
+    assert driver is not old_spare and driver.number == 3
+    assert old_spare.closed.wait(2)
+    assert _wait_for(lambda: len(pool._spares) == 1) and pool._spares[0][1] == 1
+    pool.close()
+
+
+def test_disabled_pool_never_recycles_or_keeps_spares():
+    session = _Session()
+    pool = DriverPool(session, max_pages=1, spare_drivers=2, enabled=False, log=lambda message: None)
+    driver = pool.acquire()
+    assert pool.page_done(driver) is driver and pool.page_done(driver) is driver
+    assert session.created == 1 and pool.recycled == 0
+
+
+def _browser():
+    """Processo "chromedriver" com um filho "Chrome", ambos reais."""
+    script = ("import subprocess, sys, time; "
+              "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)']); "
+              "print(flush=True); time.sleep(60)")
+    process = subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE)
+    process.stdout.readline()
+    return process, SimpleNamespace(service=SimpleNamespace(process=SimpleNamespace(pid=process.pid)))
+
+
+def test_registry_terminates_only_registered_browsers():
+    registry = BrowserProcessRegistry()
+    ours, our_driver = _browser()
+    other, other_driver = _browser()
+    forgotten, forgotten_driver = _browser()
+    try:
+        tree = registry.register(our_driver)
+        registry.register(forgotten_driver)
+        registry.forget(forgotten_driver)
+        assert len(tree) == 2
+
+        assert registry.terminate_all(timeout=3) == 2
+        assert ours.wait(timeout=3) is not None
+        assert not any(proc.is_running() for proc in tree)
+        assert other.poll() is None and forgotten.poll() is None
+    finally:
+        for process in (ours, other, forgotten):
+            with contextlib.suppress(psutil.Error):
+                for child in psutil.Process(process.pid).children(recursive=True):
+                    child.kill()
+            process.kill()
+            process.wait()
+
+
+def test_terminate_processes_kills_what_ignores_sigterm():
+    stubborn = subprocess.Popen([sys.executable, "-c", "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); "
+                                                       "print(flush=True); time.sleep(60)"], stdout=subprocess.PIPE)
+    stubborn.stdout.readline()
+    try:
+        assert terminate_processes([psutil.Process(stubborn.pid)], timeout=0.5) == 1
+        assert stubborn.wait(timeout=3) is not None
+    finally:
+        stubborn.kill()
+        stubborn.wait()
+
+
+class _FixedSession:
+    session = None
+    generation = 0
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def get_driver(self):
+        return self.driver
+
+
+def test_rss_counts_processes_started_after_acquire():
+    # O próprio processo do teste faz o papel do chromedriver
+    driver = SimpleNamespace(service=SimpleNamespace(process=SimpleNamespace(pid=os.getpid())))
+    pool = DriverPool(_FixedSession(driver), spare_drivers=0, log=lambda message: None)
+    assert pool.acquire() is driver
+    before = pool.rss(driver)
+
+    # "Renderer" aberto depois da aquisição, com ~200 MB residentes
+    child = subprocess.Popen([sys.executable, "-c", "import time; data = b'x' * (200 * 1024 * 1024); "
+                                                    "print(flush=True); time.sleep(60)"], stdout=subprocess.PIPE)
+    try:
+        child.stdout.readline()
+        time.sleep(0.1)
+        assert pool.rss(driver) - before > 150 * 1024 * 1024
+    finally:
+        child.kill()
+        child.wait()
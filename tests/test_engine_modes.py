@@ -0,0 +1,105 @@
+import os
+import queue
+import sqlite3
+import threading
+from types import SimpleNamespace
+
+import openpyxl
+import pytest
+
+from benchmark import write_input
+from engine import ScrapingEngine
+from extractor import SECTIONS, SECTIONS_OK_KEY, empty_product
+from journal import ResultJournal
+from product_cache import ProductCache
+from simulator import DEFAULT_MODEL, FakeExtractor, FakeSession
+
+# Sem falhas sorteadas: toda linha termina com status definitivo
+MODEL = {**DEFAULT_MODEL, "time_scale": 0.001, "login_failure_rate": 0, "hang_rate": 0, "crash_rate": 0}
+
+
+def _run(config, tmp_path, execution_mode, items=20):
+    config["scraping_settings"].update(num_workers=2, execution_mode=execution_mode, retry_delay=0.01)
+    input_file = write_input(os.path.join(tmp_path, "entrada.xlsx"), items)
+    log_queue = queue.Queue()
+    engine = ScrapingEngine(config, str(tmp_path), login_log_queue=log_queue, scraper_log_queue=log_queue,
+                            session_factory=FakeSession.factory(MODEL), search=FakeExtractor(MODEL))
+    engine.headless = True
+    engine.set_input(input_file)
+    engine.output_file = ScrapingEngine.default_output_for(input_file)
+    assert engine.prepare()
+    success = engine.run()
+    logs = []
+    while not log_queue.empty():
+        logs.append(log_queue.get())
+    return engine, success, logs
+
+
+@pytest.mark.parametrize("execution_mode", ["threads", "processes"])
+def test_engine_processes_every_row(config, tmp_path, execution_mode):
+    engine, success, logs = _run(config, tmp_path, execution_mode)
+
+    assert success
+    assert engine.saved_items_count == 20
+    assert not [line for line in logs if "Erro crítico" in line]
+    assert os.path.exists(engine.output_file)
+
+
+def test_cleanup_drops_the_autoscaler(config, tmp_path):
+    config["scraping_settings"]["autoscale"] = {"enabled": True, "min_workers": 1, "max_workers": 2}
+    engine, success, _ = _run(config, tmp_path, "threads")
+
+    assert success
+    # Um controlador de uma execução anterior não recebe itens da próxima
+    assert engine.autoscaler is None
+
+
+def test_async_manager_stops_during_the_login_backoff():
+    logged = threading.Event()
+    tasks = queue.Queue()
+    tasks.put(("0001", 2, 0))
+    engine = SimpleNamespace(
+        config={"scraping_settings": {}}, stop_event=threading.Event(), threads_lock=threading.Lock(), worker_threads=[],
+        tasks_queue=tasks, shared_session=SimpleNamespace(ensure_session=lambda: None), log=lambda message: "Falha no login" in message and logged.set(),
+        _fallback_lock=threading.Lock(), _fallback_driver=None,
+    )
+    thread = threading.Thread(target=ScrapingEngine._async_manager, args=(engine,), daemon=True)
+    thread.start()
+    assert logged.wait(5)
+
+    # Login falhou: a parada não espera os 30 s da nova tentativa
+    engine.stop_event.set()
+    thread.join(2)
+    assert not thread.is_alive()
+
+
+def test_repeated_codes_are_fetched_once_and_fanned_out(config, tmp_path):
+    codes = ["0000000001", "0000000002", "0000000001", "0000000003", "0000000002", "0000000001", "0000000009", "0000000009"]
+    input_file = str(tmp_path / "entrada.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(["Código", "Nome"])
+    for code in codes:
+        wb.active.append([code, ""])
+    wb.save(input_file)
+
+    config["scraping_settings"].update(num_workers=2, execution_mode="threads", retry_delay=0.01)
+    config["cache_settings"] = {"enabled": True, "path": "cache.sqlite3"}
+    cache = ProductCache(str(tmp_path / "cache.sqlite3"))
+    cache.store({**empty_product("0000000009", "do cache", None), SECTIONS_OK_KEY: list(SECTIONS)})
+    cache.close()
+
+    search = FakeExtractor(MODEL)
+    engine = ScrapingEngine(config, str(tmp_path), session_factory=FakeSession.factory(MODEL), search=search)
+    engine.headless = True
+    engine.set_input(input_file)
+    engine.output_file = ScrapingEngine.default_output_for(input_file)
+    assert engine.prepare() and engine.run()
+
+    # Uma busca por código distinto; o acerto completo do cache nem chega aos workers
+    assert sorted(call[0] for call in search.calls) == ["0000000001", "0000000002", "0000000003"]
+    journal = sqlite3.connect(ResultJournal.path_for(engine.output_file))
+    rows = dict(((row_num, (code, name)) for row_num, code, name in journal.execute("SELECT row_num, code, name FROM results")))
+    journal.close()
+    assert {row_num: code for row_num, (code, _) in rows.items()} == dict(enumerate(codes, start=2))
+    assert rows[8][1] == rows[9][1] == "do cache"
+    assert engine.saved_items_count == len(codes)
@@ -0,0 +1,149 @@
+import json
+
+import pytest
+
+from engine import HEADERS
+from extractor import SCRIPT_TIMEOUT_MARGIN, SECTIONS, SECTIONS_OK_KEY, script_timeout, search_product, sections_for_fields
+from waits import AdaptiveTimeouts
+
+
+class _ScriptDriver:
+    """Driver falso para o modo script: devolve o JSON que o script injetado montaria."""
+
+    def __init__(self, blob):
+        self.blob = blob
+        self.visited = []
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def set_script_timeout(self, seconds):
+        self.script_timeout = seconds
+
+    def execute_async_script(self, script, *args):
+        return json.dumps(self.blob)
+
+
+TAX_CELLS = [
+    "COFINS", "7,6% (BRL 7,60)", "DIFAL ST", "0% (BRL 0,00)", "FECOP", "2% (BRL 2,00)", "ICMI", "BRL 1,00",
+    "ICMS", "18% (BRL 18,00)", "IPI", "5% (BRL 5,00)", "PIS", "1,65% (BRL 1,65)", "ST", "BRL 3,00",
+]
+
+
+def _search(blob):
+    driver = _ScriptDriver(blob)
+    product = search_product(driver, "0001", row_num=2, log_queue=None, extraction_mode="script")
+    assert driver.visited and driver.visited[0].endswith("/en-GB/products/0001")
+    return product
+
+
+def test_script_mode_maps_every_tab():
+    product = _search({
+        "state": "found", "name": "Filtro de ar", "unavailable": False, "errors": {},
+        "pricing": ["BRL 100,00", "-", "BRL 120,00"],
+        "taxes": TAX_CELLS,
+        "info": [["Weight", "1,5 kg"], ["Country of origin", "Sweden"]],
+    })
+
+    assert product["name"] == "Filtro de ar" and product["status"] == "Disponível"
+    assert (product["pricing"], product["discount"], product["pricing_with"]) == ("100,00", "0", "120,00")
+    assert (product["icms_tax"], product["icms_value"], product["st_value"]) == ("18", "18,00", "3,00")
+    assert (product["weight"], product["country_of_origin"]) == ("1,5 kg", "Sweden")
+
+
+def test_script_mode_keeps_other_tabs_when_one_fails():
+    product = _search({
+        "state": "found", "name": "Filtro", "unavailable": False,
+        "pricing": ["BRL 1,00", "5%", "BRL 1,10"], "taxes": None, "info": [["Weight", "2 kg"]],
+        "errors": {"taxes": "Tempo esgotado aguardando a aba 'Taxes'"},
+    })
+    assert product["pricing"] == "1,00" and product["icms_tax"] == "" and product["weight"] == "2 kg"
+    # Só as abas lidas sem erro renovam o cache
+    assert product[SECTIONS_OK_KEY] == ["pricing", "info"]
+
+
+@pytest.mark.parametrize("blob, status", [
+    ({"state": "not_found"}, "Não Encontrado"),
+    ({"state": "timeout"}, "Tempo Esgotado"),
+    ({"state": "found", "name": "Peça", "unavailable": True, "errors": {}}, "Indisponível"),
+    ({"state": "error", "error": "falhou"}, "ERRO GRAVE: falhou"),
+])
+def test_script_mode_special_states(blob, status):
+    assert _search(blob)["status"] == status
+
+
+def test_sections_for_fields_keeps_only_the_needed_tabs():
+    assert sections_for_fields(["code", "name", "status"]) == ()
+    assert sections_for_fields(["pricing_with", "status"]) == ("pricing",)
+    assert sections_for_fields(["weight", "icms_tax", "code"]) == ("taxes", "info")
+    assert sections_for_fields(HEADERS) == SECTIONS
+
+
+def test_script_timeout_covers_every_wait_in_the_script():
+    budgets = {"initial": 30, "pricing": 20, "tab": 10}
+    # inicial + (botão + preço) + 2 x (botão + tabela)
+    assert script_timeout(budgets, SECTIONS) == 30 + (10 + 20) + 2 * (10 + 10) + SCRIPT_TIMEOUT_MARGIN
+    assert script_timeout(budgets, ("taxes",)) == 30 + 10 + 10 + SCRIPT_TIMEOUT_MARGIN
+
+
+def test_script_timeout_follows_fixed_budgets():
+    timeouts = AdaptiveTimeouts(enabled=False)
+    budgets = {name: timeouts.budget(name) for name in ("initial", "pricing", "tab")}
+    assert script_timeout(budgets, SECTIONS) > budgets["initial"] + budgets["pricing"] + 4 * budgets["tab"]
+
+
+class _Element:
+    def __init__(self, text="", panel_id=None, rows=()):
+        self.text = text
+        self.panel_id = panel_id
+        self.rows = rows
+
+    def get_attribute(self, name):
+        return self.panel_id if name == "aria-controls" else None
+
+    def find_elements(self, by, value):
+        return [_Element(rows=[_Element(text) for text in row]) for row in self.rows] if value == "tr" else self.rows
+
+
+class _PanelTimeouts:
+    """Esperas do modo padrão resolvidas na hora, guardando os XPaths pedidos."""
+
+    def __init__(self, panels):
+        self.panels = panels
+        self.xpaths = []
+
+    def wait(self, driver, name, *xpaths):
+        self.xpaths.append(xpaths[0])
+        for label, panel_id in self.panels.items():
+            if f"'{label}'" in xpaths[0]:
+                return 0, _Element(panel_id=panel_id)
+        if xpaths[0].endswith("//table"):
+            return 0, _Element(rows=[["Weight", "2 kg"]])
+        return 0, _Element("Filtro")
+
+
+class _PanelDriver:
+    def get(self, url):
+        pass
+
+    def execute_script(self, script, *args):
+        pass
+
+    def find_elements(self, by, xpath):
+        if "informationTableCell" in xpath:
+            return [_Element(text) for text in TAX_CELLS]
+        return [_Element(text) for text in ("BRL 10,00", "-", "BRL 12,00")]
+
+
+@pytest.mark.parametrize("panels, prefix", [
+    ({"Taxes": "panel-taxes", "Product information": "panel-info"}, {"Taxes": "//*[@id='panel-taxes']", "Product information": "//*[@id='panel-info']"}),
+    ({"Taxes": None, "Product information": None}, {"Taxes": "//div[@role='tabpanel']", "Product information": "//div[@role='tabpanel']"}),
+])
+def test_standard_mode_waits_on_the_active_tab_panel(panels, prefix):
+    timeouts = _PanelTimeouts({"Pricing": None, **panels})
+    product = search_product(_PanelDriver(), "0001", row_num=2, log_queue=None, timeouts=timeouts)
+
+    assert product[SECTIONS_OK_KEY] == ["pricing", "taxes", "info"]
+    assert product["icms_tax"] == "18" and product["weight"] == "2 kg"
+    assert prefix["Taxes"] + "//td[@data-cy='informationTableCell']" in timeouts.xpaths
+    assert prefix["Product information"] + "//table" in timeouts.xpaths
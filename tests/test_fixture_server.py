@@ -0,0 +1,107 @@
+import queue
+import time
+
+import pytest
+import requests
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+import http_extractor
+import login
+from extractor import NOT_FOUND_TEXT
+from fixture_server import SESSION_COOKIE, FixtureShop, product_data
+from http_extractor import HttpExtractor
+from login import SharedSession
+
+
+def _login(shop):
+    """Percorre o fluxo de login da loja falsa com requests."""
+    client = requests.Session()
+    assert "onetrust-accept-btn-handler" in client.get(shop.base_url + "/pt-BR/login").text
+    client.post(shop.base_url + "/sso/email", data={"email": "x"})
+    client.post(shop.base_url + "/sso/password", data={"password": "y"})
+    landing = client.post(shop.base_url + "/sso/kmsi")
+    assert "Welcome <b>Vendas</b>" in landing.text
+    return client
+
+
+def test_products_require_the_login_flow():
+    with FixtureShop(not_found_rate=0, unavailable_rate=0, cannot_add_rate=0) as shop:
+        url = shop.base_url + "/en-GB/products/0001"
+        anonymous = requests.get(url, allow_redirects=False)
+        assert anonymous.status_code == 302 and anonymous.headers["Location"] == "/pt-BR/login"
+
+        page = _login(shop).get(url)
+        assert page.status_code == 200 and product_data("0001")["name"] in page.text
+        assert shop.counts == {"redirect": 1, "login": 1, "found": 1}
+
+
+def test_variants_faults_and_session_expiry():
+    with FixtureShop(not_found_rate=1, session_ttl=0.3) as shop:
+        client = _login(shop)
+        missing = client.get(shop.base_url + "/en-GB/products/0001")
+        assert missing.status_code == 404 and NOT_FOUND_TEXT in missing.text
+        time.sleep(0.4)
+        assert client.get(shop.base_url + "/en-GB/products/0001").url.endswith("/pt-BR/login")
+
+    with FixtureShop(error_rate=1) as shop:
+        assert _login(shop).get(shop.base_url + "/en-GB/products/0001").status_code == 500
+        assert shop.counts["error"] == 1
+
+    with pytest.raises(ValueError):
+        FixtureShop(latencia=1)
+
+
+def test_server_rendered_pages_feed_the_http_engine(monkeypatch):
+    with FixtureShop(ssr=True, not_found_rate=0, unavailable_rate=0, cannot_add_rate=0) as shop:
+        monkeypatch.setattr(http_extractor, "PRODUCT_URL", shop.base_url + "/en-GB/products/{code}")
+        token = _login(shop).cookies[SESSION_COOKIE]
+        extractor = HttpExtractor({"cookies": [{"name": SESSION_COOKIE, "value": token, "domain": "127.0.0.1", "path": "/"}]})
+        try:
+            product = extractor.search_product("0002", row_num=2)
+        finally:
+            extractor.close()
+
+    data = product_data("0002")
+    assert product["name"] == data["name"] and product["discount"] == data["pricing"][1]
+    assert product["icms_tax"] == "18" and product["country_of_origin"] == data["info"][0][1]
+
+
+@pytest.fixture
+def shop(monkeypatch):
+    with FixtureShop() as shop:
+        monkeypatch.setattr(login, "BASE_URL", shop.base_url)
+        monkeypatch.setattr(login, "LOGIN_URL", shop.base_url + "/pt-BR/login")
+        yield shop
+
+
+@pytest.fixture
+def chrome():
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    try:
+        webdriver.Chrome(options=options).quit()
+    except WebDriverException as e:
+        pytest.skip(f"Chrome indisponível: {type(e).__name__}")
+
+
+def test_shared_session_export_and_restore_against_fixture(shop, chrome, config):
+    shared = SharedSession(headless=True, log_queue=queue.Queue(), config=config)
+    drivers = []
+    try:
+        drivers.append(shared.get_driver())
+        assert drivers[-1] and shared.full_logins == 1
+        assert SESSION_COOKIE in {cookie["name"] for cookie in shared.session["cookies"]}
+
+        # Segundo driver: sessão injetada, sem novo login
+        drivers.append(shared.get_driver())
+        assert drivers[-1] and shared.restores == 1 and shared.full_logins == 1
+
+        shared.invalidate(shared.generation)
+        drivers.append(shared.get_driver())
+        assert drivers[-1] and shared.full_logins == 2
+    finally:
+        for driver in drivers:
+            if driver:
+                driver.quit()
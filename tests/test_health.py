@@ -0,0 +1,66 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import health
+from health import WorkerHealth
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    state = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(health, "time", SimpleNamespace(time=lambda: state.now))
+    return state
+
+
+def test_snapshot_tracks_rate_current_product_and_failures(clock):
+    monitor = WorkerHealth(window=60)
+    monitor.event(1, "start")
+    monitor.event(1, "browser", os.getpid())
+    for status in ("Disponível", "Tempo Esgotado", "ERRO GRAVE: x", "Falha Persistente: TimeoutError"):
+        clock.now += 10
+        monitor.item_done(1, 1.0, status)
+    monitor.event(1, "task", "0005", 6)
+    clock.now += 3
+    monitor.event(1, "restart")
+    monitor.event(1, "task", "0006", 7)
+    clock.now += 2
+
+    (row,) = monitor.snapshot()
+    assert row["worker_id"] == 1 and row["status"] == "trabalhando"
+    assert (row["code"], row["row"], row["on_current"]) == ("0006", 7, 2)
+    assert (row["items"], row["timeouts"], row["errors"], row["restarts"]) == (4, 1, 2, 1)
+    # 4 itens em 45 s de vida
+    assert row["items_per_min"] == pytest.approx(4 / 45 * 60)
+    assert row["rss_mb"] > 0 and row["cpu"] is not None
+
+    # Itens fora da janela deixam de contar
+    clock.now += 45
+    assert monitor.snapshot()[0]["items_per_min"] == pytest.approx(2.0)
+
+
+def test_retire_missing_marks_dead_workers_and_drops_them_later(clock):
+    monitor = WorkerHealth(window=60)
+    for worker_id in (1, 2, 3):
+        monitor.event(worker_id, "start")
+    monitor.event(2, "browser", os.getpid())
+    clock.now += 10
+    monitor.event(3, "start")
+
+    monitor.retire_missing({1}, grace=5)
+    statuses = {row["worker_id"]: row["status"] for row in monitor.snapshot()}
+    assert statuses == {1: "login", 2: "finalizado", 3: "finalizado"}
+    assert monitor.browser_pid(2) is None
+
+    # Finalizados saem do painel depois de uma janela
+    clock.now += 61
+    assert [row["worker_id"] for row in monitor.snapshot()] == [1]
+
+
+def test_retire_missing_respects_the_grace_period(clock):
+    monitor = WorkerHealth()
+    monitor.event(7, "start")
+    clock.now += 2
+    monitor.retire_missing(set(), grace=5)
+    assert monitor.snapshot()[0]["status"] == "login"
@@ -0,0 +1,144 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_extractor
+from extractor import NOT_FOUND_TEXT, NO_LONGER_AVAILABLE_TEXT, SECTIONS_OK_KEY
+from fixture_server import DEFAULT_FIXTURE, product_data, render_product
+from http_extractor import HttpExtractor, SessionExpiredError, parse_product_page
+
+TAX_CELLS = [
+    "COFINS", "7,6% (BRL 7,60)", "DIFAL ST", "0% (BRL 0,00)", "FECOP", "2% (BRL 2,00)", "ICMI", "BRL 1,00",
+    "ICMS", "18% (BRL 18,00)", "IPI", "5% (BRL 5,00)", "PIS", "1,65% (BRL 1,65)", "ST", "BRL 3,00",
+]
+
+
+def _table(rows, data_cy=None):
+    cell = f'<td data-cy="{data_cy}">' if data_cy else "<td>"
+    return "<table>" + "".join("<tr>" + "".join(f"{cell}{value}</td>" for value in row) + "</tr>" for row in rows) + "</table>"
+
+
+def _page(body, next_data=None):
+    script = f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data)}</script>' if next_data else ""
+    return f'<html><body><div id="__next"><div>{body}</div></div>{script}</body></html>'
+
+
+PRODUCT_HTML = _page(
+    "<h1>Filtro de ar</h1>"
+    + _table([["BRL 100,00", "10%", "BRL 120,00"]])
+    + _table([TAX_CELLS[i:i + 2] for i in range(0, len(TAX_CELLS), 2)], data_cy="informationTableCell")
+    + _table([["Weight", "1,5 kg"], ["Country of origin", "Sweden"]])
+)
+
+
+def test_parse_server_rendered_product():
+    product = parse_product_page(PRODUCT_HTML, "0001", 2)
+
+    assert product["name"] == "Filtro de ar" and product["status"] == "Disponível" and product["row_num"] == 2
+    assert (product["pricing"], product["discount"], product["pricing_with"]) == ("100,00", "10%", "120,00")
+    assert (product["cofins_tax"], product["cofins_value"]) == ("7,6", "7,60")
+    assert (product["icms_tax"], product["st_value"]) == ("18", "3,00")
+    assert (product["weight"], product["country_of_origin"]) == ("1,5 kg", "Sweden")
+
+
+def test_parse_special_pages():
+    assert parse_product_page(_page(f"<h2>{NOT_FOUND_TEXT}</h2>"), "0002", 3)["status"] == "Não Encontrado"
+    unavailable = parse_product_page(_page(f"<h1>Peça</h1><p>{NO_LONGER_AVAILABLE_TEXT}</p>"), "0003", 4)
+    assert unavailable["status"] == "Indisponível" and unavailable["pricing"] == ""
+
+
+def test_parse_returns_none_when_tabs_need_the_browser():
+    # Só o nome no HTML: as abas são montadas no navegador
+    assert parse_product_page(_page("<h1>Peça</h1><div id='tab-panel'></div>"), "0004") is None
+    assert parse_product_page(_page(""), "0005") is None
+
+
+class _Shop(BaseHTTPRequestHandler):
+    def do_GET(self):
+        code = self.path.rsplit("/", 1)[-1]
+        if self.path == "/pt-BR/login":
+            body, status = "<html>login</html>", 200
+        elif "session=ok" not in self.headers.get("Cookie", ""):
+            self.send_response(302)
+            self.send_header("Location", "/pt-BR/login")
+            self.end_headers()
+            return
+        elif code == "0404":
+            body, status = "", 404
+        else:
+            body, status = PRODUCT_HTML, 200
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def shop_url(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Shop)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr(http_extractor, "PRODUCT_URL", url + "/en-GB/products/{code}")
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_extractor_uses_the_session_cookies(shop_url):
+    extractor = HttpExtractor({"cookies": [{"name": "session", "value": "ok", "domain": "127.0.0.1", "path": "/"}]},
+                              generation=3, log_queue=None)
+    try:
+        assert extractor.session_generation == 3
+        assert extractor.search_product("0001", row_num=2)["pricing"] == "100,00"
+        assert extractor.search_product("0404", row_num=3)["status"] == "Não Encontrado"
+    finally:
+        extractor.close()
+
+
+def test_http_extractor_detects_expired_session(shop_url):
+    extractor = HttpExtractor({"cookies": [{"name": "session", "value": "velho", "domain": "127.0.0.1", "path": "/"}]})
+    try:
+        with pytest.raises(SessionExpiredError):
+            extractor.search_product("0001")
+    finally:
+        extractor.close()
+
+
+def _fixture_page(code, variant="found", ssr=True):
+    return render_product(code, variant, {**DEFAULT_FIXTURE, "ssr": ssr})
+
+
+def test_parse_fixture_pages():
+    data = product_data("0002")
+    product = parse_product_page(_fixture_page("0002"), "0002", 2)
+
+    assert product["name"] == data["name"] and product["pricing_with"] == data["pricing"][2].replace("BRL ", "")
+    assert [product[key] for key in ("country_of_origin", "customs_tariff", "weight", "possibility_to_return")] == [
+        value for _, value in data["info"]]
+    assert product[SECTIONS_OK_KEY] == ["pricing", "taxes", "info"]
+
+    # Sem SSR as tabelas só existem no navegador
+    assert parse_product_page(_fixture_page("0002", ssr=False), "0002") is None
+    assert parse_product_page(_fixture_page("0003", "unavailable"), "0003")["status"] == "Indisponível"
+
+
+def test_next_data_only_reads_the_attribute_list():
+    body = "<h1>Peça</h1>" + _table([["BRL 10,00", "-", "BRL 12,00"]])
+    next_data = {"props": {
+        "menu": [{"label": "Weight", "value": "menu"}],
+        "product": {"attributes": [{"label": "Weight", "value": "2 kg"}, {"label": "Color", "value": "azul"}]},
+    }}
+    product = parse_product_page(_page(body, next_data), "0006")
+    assert product["weight"] == "2 kg" and product[SECTIONS_OK_KEY] == ["pricing", "info"]
+
+    # Pares {label, value} fora da lista de atributos não marcam a aba como lida
+    product = parse_product_page(_page(body, {"props": {"filters": [{"label": "Weight", "value": "menu"}],
+                                                         "product": {"attributes": [{"label": "Color", "value": "azul"}]}}}), "0007")
+    assert product["weight"] == "" and product[SECTIONS_OK_KEY] == ["pricing"]
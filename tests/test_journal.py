@@ -0,0 +1,98 @@
+import openpyxl
+import pytest
+
+from journal import ResultJournal
+
+FIELDS = ["row_num", "code", "name", "status"]
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = ResultJournal(str(tmp_path / "saida.journal.sqlite3"), FIELDS)
+    yield journal
+    journal.close()
+
+
+def test_append_and_record_writes_results_and_status_together(journal):
+    checkpoint = journal.checkpoint("hash")
+    journal.append_and_record([{"row_num": 2, "code": "A", "status": "Disponível"}], checkpoint)
+
+    assert checkpoint.saved_rows() == {2}
+    assert checkpoint.attempts(2) == 1
+    assert journal.conn.execute("SELECT code, status FROM results").fetchall() == [("A", "Disponível")]
+
+
+def test_append_and_record_rolls_back_both_tables(journal):
+    checkpoint = journal.checkpoint("hash")
+
+    def broken(items):
+        raise RuntimeError("falha no checkpoint")
+
+    checkpoint._write_status = broken
+    with pytest.raises(RuntimeError):
+        journal.append_and_record([{"row_num": 2, "code": "A", "status": "Disponível"}], checkpoint)
+
+    assert journal.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 0
+    assert journal.checkpoint("hash").saved_rows() == set()
+
+
+def test_append_replaces_rows(journal):
+    journal.append([{"row_num": 2, "code": "A", "status": "Disponível"}, {"row_num": 3, "code": "B", "status": ""}])
+    journal.append([{"row_num": 3, "code": "B", "status": "Não Encontrado"}, {"code": "sem linha", "status": "Disponível"}])
+
+    assert journal.conn.execute("SELECT row_num, status FROM results ORDER BY row_num").fetchall() == [
+        (2, "Disponível"), (3, "Não Encontrado")]
+    assert journal.get_meta("timestamp") is not None
+
+
+def test_export_keeps_each_result_on_its_input_row(journal, tmp_path):
+    journal.append([{"row_num": 4, "code": "C", "name": "Filtro", "status": "Disponível"},
+                    {"row_num": 2, "code": "A", "status": "Não Encontrado"}])
+    output = str(tmp_path / "saida.xlsx")
+    journal.export_xlsx(output, "Dados", ["Linha", "Código", "Nome", "Status"], [["Origem", "entrada.xlsx"]],
+                        extra_sheets={"Dead Letter": [["Linha", "Código"], [9, "Z"]]})
+
+    workbook = openpyxl.load_workbook(output)
+    rows = list(workbook["Dados"].iter_rows(values_only=True))
+    assert rows[0] == ("Linha", "Código", "Nome", "Status")
+    assert rows[1] == (2, "A", None, "Não Encontrado")
+    assert all(value is None for value in rows[2])
+    assert rows[3] == (4, "C", "Filtro", "Disponível")
+    assert workbook["Metadata"]["A1"].value == "Origem"
+    assert workbook.sheetnames[-1] == "Dead Letter" and workbook["Dead Letter"]["B2"].value == "Z"
+
+
+def test_reset_clears_results_and_metadata(journal):
+    journal.append([{"row_num": 2, "code": "A", "status": "Disponível"}])
+    journal.set_meta(input_file="entrada.xlsx")
+    journal.checkpoint("hash").record([{"row_num": 2, "status": "Disponível"}])
+    journal.reset()
+    assert journal.checkpoint("hash").saved_rows() == set() and journal.get_meta("input_file") is None
+
+
+def test_checkpoint_hole_queries(journal):
+    checkpoint = journal.checkpoint("hash")
+    checkpoint.register_rows(range(2, 8))
+    items = [
+        {"row_num": 2, "code": "A", "status": "Disponível"},
+        {"row_num": 3, "code": "B", "status": "Tempo Esgotado"},
+        {"row_num": 4, "code": "C", "status": ""},
+    ]
+    journal.append(items)
+    checkpoint.record(items)
+    checkpoint.record([{"row_num": 3, "code": "B", "status": "Tempo Esgotado"}])
+
+    assert checkpoint.saved_rows() == {2, 3}
+    assert checkpoint.pending_rows() == {4, 5, 6, 7}
+    # Buraco: tentada e ainda sem status (as nunca tentadas só estão pendentes)
+    assert checkpoint.hole_rows() == {4}
+    assert checkpoint.attempts(3) == 2 and checkpoint.attempts(5) == 0
+    assert checkpoint.rows_with_status(("Tempo Esgotado",)) == [(3, "B", "Tempo Esgotado", 2)]
+    assert checkpoint.rows_with_status(("Tempo Esgotado",), max_attempts=1) == []
+
+
+def test_checkpoint_indexes_results_of_an_older_journal(journal):
+    journal.append([{"row_num": 2, "code": "A", "status": "Disponível"}, {"row_num": 3, "code": "B", "status": ""}])
+    checkpoint = journal.checkpoint("hash")
+    assert checkpoint.saved_rows() == {2}
+    assert checkpoint.hole_rows() == {3}
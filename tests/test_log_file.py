@@ -0,0 +1,45 @@
+import queue
+import threading
+
+import cli
+from log_file import RotatingLog
+
+
+def test_rotating_log_writes_and_rotates(tmp_path):
+    path = tmp_path / "scraper.log"
+    log = RotatingLog(str(path), max_mb=0.001, backups=2)
+    log.write("login", [f"mensagem {i:03d} " + "x" * 40 for i in range(100)])
+    log.close()
+
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == ["scraper.log", "scraper.log.1", "scraper.log.2"]
+    assert "[login] mensagem 099" in path.read_text(encoding="utf-8")
+    assert all(p.stat().st_size <= 1100 for p in tmp_path.iterdir())
+
+
+def test_from_config_can_disable_the_file(tmp_path):
+    assert RotatingLog.from_config({"system": {"log_file": {"enabled": False}}}, str(tmp_path)) is None
+    log = RotatingLog.from_config({"system": {"log_file": {"path": "saida.log"}}}, str(tmp_path))
+    try:
+        assert log.path == str(tmp_path / "saida.log")
+    finally:
+        log.close()
+
+
+class _Recorder:
+    def __init__(self):
+        self.batches = []
+
+    def write(self, channel, messages):
+        self.batches.append((channel, list(messages)))
+
+
+def test_cli_drains_the_log_queue_in_batches(capsys):
+    log_queue, done, recorder = queue.Queue(), threading.Event(), _Recorder()
+    for i in range(50):
+        log_queue.put(f"linha {i}")
+    done.set()
+    cli._print_logs(log_queue, done, quiet=False, log_file=recorder)
+
+    assert recorder.batches == [("motor", [f"linha {i}" for i in range(50)])]
+    assert capsys.readouterr().out.splitlines() == [f"linha {i}" for i in range(50)]
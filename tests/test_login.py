@@ -0,0 +1,158 @@
+import queue
+import threading
+import time
+
+import pytest
+
+import login
+from login import SharedSession
+
+
+class _FakeService:
+    """AtlasCopcoLogin sem navegador: sessões exportadas valem até serem revogadas."""
+    revoked = set()
+    exported = 0
+    login_seconds = 0.0
+
+    def __init__(self, headless=False, log_queue=None, config=None):
+        self.config = config
+
+    def login(self):
+        time.sleep(self.login_seconds)
+        return object()
+
+    def export_session(self):
+        _FakeService.exported += 1
+        return {"cookies": [{"name": "session", "value": str(_FakeService.exported)}]}
+
+    def restore_session(self, session):
+        return None if session["cookies"][0]["value"] in self.revoked else object()
+
+    def logout(self):
+        pass
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(login, "AtlasCopcoLogin", _FakeService)
+    monkeypatch.setattr(_FakeService, "revoked", set())
+    monkeypatch.setattr(_FakeService, "exported", 0)
+    monkeypatch.setattr(_FakeService, "login_seconds", 0.0)
+    return _FakeService
+
+
+def test_concurrent_workers_share_one_login(service):
+    service.login_seconds = 0.05
+    shared = SharedSession(headless=True)
+    drivers = []
+    threads = [threading.Thread(target=lambda: drivers.append(shared.get_driver())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(drivers) == 8 and all(drivers)
+    # Um único login completo; os demais drivers restauram a sessão exportada
+    assert shared.full_logins == 1 and shared.restores == 7
+
+
+def test_rejected_session_triggers_a_new_login(service):
+    shared = SharedSession(headless=True)
+    assert shared.get_driver() and shared.full_logins == 1
+    assert shared.get_driver() and shared.restores == 1
+
+    service.revoked.add("1")
+    assert shared.get_driver() and shared.full_logins == 2
+    assert shared.session["cookies"][0]["value"] == "2"
+
+    shared.invalidate()
+    assert shared.session is None
+    assert shared.get_driver() and shared.full_logins == 3
+
+
+def test_stale_invalidation_keeps_the_renewed_session(service):
+    shared = SharedSession(headless=True)
+    assert shared.ensure_session()["cookies"][0]["value"] == "1"
+    seen = shared.generation
+
+    # Dois workers notam a mesma sessão expirada: só o primeiro invalida
+    shared.invalidate(seen)
+    assert shared.ensure_session()["cookies"][0]["value"] == "2"
+    shared.invalidate(seen)
+    assert shared.session is not None and shared.full_logins == 2
+
+
+class _CdpDriver:
+    def __init__(self, fail=False):
+        self.commands = []
+        self.fail = fail
+
+    def execute_cdp_cmd(self, command, params):
+        if self.fail:
+            raise RuntimeError("sem DevTools")
+        self.commands.append((command, params))
+
+
+def _policy_login(policy, driver):
+    config = {"system": {"chrome_options": {"resource_blocking": policy}}}
+    service = login.AtlasCopcoLogin(headless=True, log_queue=queue.Queue(), config=config)
+    service.driver = driver
+    return service
+
+
+def test_resource_policy_blocks_the_selected_categories():
+    driver = _CdpDriver()
+    _policy_login({"enabled": True, "block": ["images", "trackers"], "extra_patterns": ["*.pdf"]}, driver).apply_resource_policy()
+
+    assert driver.commands[0] == ("Network.enable", {})
+    command, params = driver.commands[1]
+    assert command == "Network.setBlockedURLs"
+    assert params["urls"] == login.BLOCKED_RESOURCE_PATTERNS["images"] + login.BLOCKED_RESOURCE_PATTERNS["trackers"] + ["*.pdf"]
+    assert "*.woff2" not in params["urls"]
+
+
+def test_resource_policy_is_optional_and_never_breaks_the_driver():
+    driver = _CdpDriver()
+    _policy_login({"enabled": False, "block": ["images"]}, driver).apply_resource_policy()
+    _policy_login({"enabled": True, "block": ["desconhecida"]}, driver).apply_resource_policy()
+    assert driver.commands == []
+
+    service = _policy_login({"enabled": True, "block": ["fonts"]}, _CdpDriver(fail=True))
+    service.apply_resource_policy()
+    assert "bloqueio de recursos" in service.log_queue.get_nowait()
+
+
+def test_logins_use_the_config_given_to_the_session(service, monkeypatch):
+    configs = []
+    monkeypatch.setattr(service, "login", lambda self: configs.append(self.config) or object())
+    monkeypatch.setattr(service, "restore_session", lambda self, session: configs.append(self.config) or object())
+    config = {"credentials": {"username": "outro", "password": "x"}}
+
+    shared = SharedSession(headless=True, config=config)
+    assert shared.get_driver() and shared.get_driver()
+    assert configs == [config, config]
+
+
+class _BrokenDriver:
+    """Driver cuja navegação falha logo no início do login."""
+
+    def __init__(self):
+        self.quit_calls = 0
+
+    def get(self, url):
+        raise RuntimeError("sem rede")
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+def test_failed_login_quits_and_forgets_the_driver(monkeypatch):
+    driver = _BrokenDriver()
+    registered = []
+    monkeypatch.setattr(login.BROWSER_PROCESSES, "register", registered.append)
+    monkeypatch.setattr(login.BROWSER_PROCESSES, "forget", registered.remove)
+    monkeypatch.setattr(login.AtlasCopcoLogin, "_configure_driver", lambda self: login.BROWSER_PROCESSES.register(driver) or driver)
+
+    service = login.AtlasCopcoLogin(headless=True, log_queue=queue.Queue(), config={})
+    assert service.login() is None
+    assert driver.quit_calls == 1 and registered == [] and service.driver is None
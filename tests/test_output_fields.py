@@ -0,0 +1,24 @@
+import pytest
+
+from engine import FIELD_PRESETS, HEADERS, ConfigError, output_fields
+
+
+def test_preset_wins_over_output_columns():
+    config = {"excel_settings": {"output_columns": ["Peso"]}}
+    assert output_fields(config, "price_only") == (FIELD_PRESETS["price_only"], [])
+    with pytest.raises(ConfigError):
+        output_fields(config, "inexistente")
+
+
+def test_output_columns_accept_labels_keys_and_mojibake():
+    config = {"excel_settings": {"output_columns": ["CÃ³digo", "PreÃ§o", "status", "Peso", "Coluna nova"]}}
+    assert output_fields(config) == (["code", "pricing", "status", "weight"], ["Coluna nova"])
+
+
+def test_without_columns_every_field_is_wanted():
+    assert output_fields({}) == (list(HEADERS), [])
+
+
+def test_project_config_maps_every_column(config):
+    fields, unknown = output_fields(config)
+    assert unknown == [] and "pricing" in fields and "possibility_to_return" in fields
@@ -0,0 +1,51 @@
+import ast
+import inspect
+import queue
+import threading
+import textwrap
+
+import engine
+from driver_pool import DriverPool
+from extractor import search_product
+from login import SharedSession
+from process_pool import _WorkerContext
+from simulator import DEFAULT_MODEL, FakeExtractor, FakeSession
+
+
+def _engine_attributes_used_by_worker():
+    tree = ast.parse(textwrap.dedent(inspect.getsource(engine.ScraperWorker)))
+    return {
+        node.attr for node in ast.walk(tree)
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Attribute)
+        and node.value.attr == "engine" and isinstance(node.value.value, ast.Name) and node.value.value.id == "self"
+    }
+
+
+def _context(config, **overrides):
+    """_WorkerContext com filas locais no lugar das de multiprocessing."""
+    arguments = {}
+    for name in list(inspect.signature(_WorkerContext).parameters):
+        if name.endswith("queue"):
+            arguments[name] = queue.Queue()
+        elif name.endswith("event"):
+            arguments[name] = threading.Event()
+        else:
+            arguments[name] = None
+    if "session_factory" in arguments:
+        arguments.update(session_factory=SharedSession, search=search_product)
+    arguments.update(config=config, base_path=".", headless=True)
+    arguments.update(overrides)
+    return _WorkerContext(**arguments)
+
+
+def test_worker_context_exposes_everything_the_worker_uses(config):
+    context = _context(config)
+    missing = {name for name in _engine_attributes_used_by_worker() if not hasattr(context, name)}
+    assert not missing, f"_WorkerContext sem: {sorted(missing)}"
+
+
+def test_worker_process_pool_keeps_no_spares(config):
+    config.setdefault("system", {})["browser_recycling"] = {"spare_drivers": 2}
+    context = _context(config, session_factory=FakeSession.factory(DEFAULT_MODEL), search=FakeExtractor(DEFAULT_MODEL))
+    assert context.driver_pool.spare_target == 0
+    assert DriverPool.from_config(context.shared_session, config).spare_target == 2
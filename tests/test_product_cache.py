@@ -0,0 +1,130 @@
+import sqlite3
+import threading
+from types import SimpleNamespace
+
+import product_cache
+from extractor import SECTIONS, SECTIONS_OK_KEY, empty_product, status_result
+from product_cache import ProductCache
+
+
+def _product(code="0001", name="Produto", row_num=2, **fields):
+    product = empty_product(code, name, row_num)
+    product.update(fields)
+    return product
+
+
+def test_store_stamps_only_sections_read_without_error(tmp_path):
+    cache = ProductCache(str(tmp_path / "cache.sqlite"))
+    product = _product(pricing="100,00", **{SECTIONS_OK_KEY: ["pricing", "info"]})
+    cache.store(product, SECTIONS)
+
+    cached, stale = cache.lookup("0001")
+    assert stale == {"taxes"}
+    assert SECTIONS_OK_KEY not in cached
+    assert cached["pricing"] == "100,00"
+
+
+def test_store_without_marker_stamps_requested_sections(tmp_path):
+    cache = ProductCache(str(tmp_path / "cache.sqlite"))
+    cache.store(_product(), ("pricing",))
+
+    _, stale = cache.lookup("0001")
+    assert stale == {"taxes", "info"}
+
+
+def test_merge_keeps_fresh_marker(tmp_path):
+    cached = _product(pricing="90,00", weight="1 kg")
+    fresh = _product(pricing="100,00", **{SECTIONS_OK_KEY: []})
+    merged = ProductCache.merge(cached, fresh, ("pricing",))
+    assert merged["weight"] == "1 kg"
+    assert merged[SECTIONS_OK_KEY] == []
+
+
+def test_sections_expire_by_their_own_ttl(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(product_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    cache = ProductCache(str(tmp_path / "cache.sqlite"), ttl_hours={"pricing": 1, "taxes": 24, "info": 720})
+    cache.store(_product(pricing="100,00", weight="1 kg"))
+
+    assert cache.lookup("0001")[1] == set()
+    now[0] += 2 * 3600
+    product, stale = cache.lookup("0001")
+    assert stale == {"pricing"} and product["weight"] == "1 kg"
+    now[0] += 24 * 3600
+    assert cache.lookup("0001")[1] == {"pricing", "taxes"}
+    now[0] += 720 * 3600
+    assert cache.lookup("0001") == (None, set(SECTIONS))
+    assert (cache.hits, cache.partial_hits, cache.misses) == (1, 2, 1)
+
+
+def test_not_found_uses_its_own_ttl(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(product_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    cache = ProductCache(str(tmp_path / "cache.sqlite"), ttl_hours={"not_found": 48})
+    cache.store(status_result("0002", "Não Encontrado", 3))
+
+    product, stale = cache.lookup("0002", row_num=9)
+    assert product["status"] == "Não Encontrado" and product["row_num"] == 9 and stale == set()
+    now[0] += 49 * 3600
+    assert cache.lookup("0002") == (None, set(SECTIONS))
+
+
+def test_transient_statuses_are_not_cached(tmp_path):
+    cache = ProductCache(str(tmp_path / "cache.sqlite"))
+    cache.store(status_result("0003", "Tempo Esgotado", 4))
+    assert cache.lookup("0003") == (None, set(SECTIONS))
+
+
+def test_merge_takes_only_the_refreshed_sections():
+    cached = _product(pricing="90,00", icms_tax="18%", weight="1 kg")
+    fresh = _product(name="Produto novo", pricing="100,00", row_num=7)
+    merged = ProductCache.merge(cached, fresh, ("pricing",))
+    assert (merged["pricing"], merged["icms_tax"], merged["weight"]) == ("100,00", "18%", "1 kg")
+    assert merged["name"] == "Produto novo" and merged["row_num"] == 7
+
+    # Um resultado que não é "Disponível" substitui o cache inteiro
+    gone = status_result("0001", "Não Encontrado", 7)
+    assert ProductCache.merge(cached, gone, ("pricing",)) is gone
+
+
+def test_eviction_keeps_recently_used_codes(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(product_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    cache = ProductCache(str(tmp_path / "cache.sqlite"), max_entries=10)
+    for i in range(10):
+        now[0] += 1
+        cache.store(_product(code=f"{i:04d}"))
+    now[0] += 1
+    cache.lookup("0000")
+    now[0] += 1
+    cache.store(_product(code="0010"))
+
+    assert cache.lookup("0000", count=False)[0] is not None
+    assert cache.lookup("0001", count=False)[0] is None
+
+
+def test_counters_are_exact_under_concurrent_lookups(tmp_path):
+    cache = ProductCache(str(tmp_path / "cache.sqlite"))
+    cache.store(_product(code="0001"))
+    threads = [threading.Thread(target=lambda: [cache.lookup(code) for code in ("0001", "0002") * 100]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert (cache.hits, cache.misses) == (800, 800)
+
+
+def test_access_stamps_are_written_on_close(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(product_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    path = str(tmp_path / "cache.sqlite")
+    cache = ProductCache(path)
+    cache.store(_product(code="0001"))
+    now[0] += 60
+    cache.lookup("0001")
+    # A consulta não escreve no banco a cada produto
+    assert not sqlite3.connect(path).execute("SELECT 1 FROM products WHERE last_access = ?", (now[0],)).fetchone()
+
+    cache.close()
+    assert sqlite3.connect(path).execute("SELECT last_access FROM products").fetchone()[0] == now[0]
@@ -0,0 +1,81 @@
+import queue
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import retry
+from engine import ScraperWorker, ScrapingEngine
+from journal import ResultJournal
+from retry import DEAD_LETTER_STATUS, RetryPolicy
+
+
+def test_delay_doubles_with_jitter_and_respects_the_cap(monkeypatch):
+    policy = RetryPolicy(max_retries=3, retry_delay=5, max_delay=30)
+    monkeypatch.setattr(retry.random, "uniform", lambda low, high: high)
+    assert [policy.delay(n) for n in range(5)] == [5, 10, 20, 30, 30]
+    monkeypatch.setattr(retry.random, "uniform", lambda low, high: low)
+    assert [policy.delay(n) for n in range(5)] == [2.5, 5, 10, 15, 15]
+
+
+def test_attempt_cap_and_transient_statuses():
+    policy = RetryPolicy.from_config({"scraping_settings": {"max_retries": 2, "retry_delay": 1, "max_retry_delay": 4}})
+    assert (policy.max_retries, policy.retry_delay, policy.max_delay) == (2, 1, 4)
+    assert not policy.exhausted(2) and policy.exhausted(3)
+    assert RetryPolicy.is_transient("Tempo Esgotado") and RetryPolicy.is_transient("ERRO GRAVE: falhou")
+    assert not RetryPolicy.is_transient("Não Encontrado") and not RetryPolicy.is_transient(None)
+
+
+def _worker(max_retries):
+    engine = SimpleNamespace(config={"scraping_settings": {"max_retries": max_retries}}, tasks_queue=queue.Queue(),
+                             results_queue=queue.Queue(), log=lambda message: None)
+    return ScraperWorker(1, True, engine, threading.Event()), engine
+
+
+def test_failed_task_is_requeued_until_the_cap():
+    worker, engine = _worker(max_retries=1)
+    engine.tasks_queue.put(("0001", 2, 0))
+    engine.tasks_queue.get()
+
+    worker._retry_or_dead_letter(("0001", 2, 0), TimeoutError())
+    assert engine.tasks_queue.get_nowait() == ("0001", 2, 1) and engine.results_queue.empty()
+
+    worker._retry_or_dead_letter(("0001", 2, 1), TimeoutError())
+    assert engine.tasks_queue.empty()
+    assert engine.results_queue.get_nowait()["status"] == f"{DEAD_LETTER_STATUS}: TimeoutError"
+    # Cada get teve o seu task_done: join não fica preso
+    engine.tasks_queue.join()
+
+
+@pytest.fixture
+def engine(config, tmp_path):
+    config["scraping_settings"].update(max_retries=2, retry_pass_workers=None)
+    engine = ScrapingEngine(config, str(tmp_path))
+    engine.journal = ResultJournal(str(tmp_path / "saida.journal.sqlite3"), ["row_num", "code", "status"])
+    engine.checkpoint = engine.journal.checkpoint("hash")
+    yield engine
+    engine.journal.close()
+
+
+def _record(engine, *items):
+    items = [{"row_num": row, "code": code, "status": status} for row, code, status in items]
+    engine.journal.append(items)
+    engine.checkpoint.record(items)
+
+
+def test_retry_pass_requeues_transient_failures_once_with_fewer_workers(engine):
+    engine.num_workers, engine.autoscaler = 6, object()
+    _record(engine, (2, "A", "Disponível"), (3, "B", "Tempo Esgotado"), (4, "C", "ERRO GRAVE: x"),
+            (5, "D", f"{DEAD_LETTER_STATUS}: TimeoutError"))
+    # Já tentada além de max_retries: não entra na repescagem
+    for _ in range(3):
+        _record(engine, (6, "E", "Tempo Esgotado"))
+
+    assert engine._queue_retry_pass() == 2
+    assert sorted(engine.tasks_queue.get_nowait() for _ in range(2)) == [("B", 3, 0), ("C", 4, 0)]
+    assert engine.num_workers == 3 and engine.autoscaler is None and engine.retry_pass_active
+
+
+def test_dead_letters_list_persistent_and_transient_failures(engine):
+    _record(engine, (2, "A", "Disponível"), (3, "B", "Tempo Esgotado"), (5, "D", f"{DEAD_LETTER_STATUS}: TimeoutError"))
+    assert [(row, code) for row, code, _, _ in engine.dead_letters()] == [(3, "B"), (5, "D")]
@@ -0,0 +1,51 @@
+import random
+
+from rowset import RowRangeSet, RowCodeIndex
+
+
+def test_string_round_trip():
+    rows = RowRangeSet([2, 3, 4, 5, 7, 9, 10, 500])
+    assert rows.to_string() == "v1:2-5,7,9-10,500"
+    restored = RowRangeSet.from_string(rows.to_string())
+    assert restored.ranges() == rows.ranges()
+    assert len(restored) == len(rows) == 8
+
+
+def test_random_sets_survive_chunked_serialization():
+    draw = random.Random(7)
+    rows = RowRangeSet()
+    expected = set()
+    for _ in range(5000):
+        row = draw.randint(2, 20000)
+        if draw.random() < 0.2:
+            rows.discard(row)
+            expected.discard(row)
+        else:
+            rows.add(row)
+            expected.add(row)
+    assert set(rows) == expected and len(rows) == len(expected)
+
+    chunks = rows.to_chunks(max_chars=200)
+    assert len(chunks) > 1 and all(len(chunk) <= 200 for chunk in chunks)
+    assert set(RowRangeSet.from_string("".join(chunks))) == expected
+
+
+def test_from_string_reads_legacy_lists_and_skips_garbage():
+    assert list(RowRangeSet.from_string("2,3, 4,x,10-12")) == [2, 3, 4, 10, 11, 12]
+    assert not RowRangeSet.from_string(None)
+
+
+def test_discard_splits_a_range():
+    rows = RowRangeSet(range(2, 11))
+    rows.discard(6)
+    assert rows.ranges() == [(2, 5), (7, 10)]
+    assert 6 not in rows and 7 in rows
+
+
+def test_row_code_index_lookup():
+    index = RowCodeIndex()
+    for row, code in ((2, "A"), (3, "B"), (5, "A")):
+        index.append(row, code)
+    assert index.get(5) == "A" and index.get(4) is None
+    assert index.distinct_codes == 2
+    assert list(index) == [(2, "A"), (3, "B"), (5, "A")]
@@ -0,0 +1,62 @@
+import csv
+import json
+
+from timing import SpanRecorder, span
+
+
+def test_summary_reports_percentiles_per_phase():
+    recorder = SpanRecorder()
+    for i in range(1, 101):
+        recorder.record("pricing", i / 100, worker_id=1, code=f"{i:04d}")
+    recorder.record("save", 2.0)
+
+    stats = recorder.summary()
+    assert stats["pricing"]["count"] == 100 and round(stats["pricing"]["total"], 6) == 50.5
+    assert (stats["pricing"]["p50"], stats["pricing"]["p95"], stats["pricing"]["p99"]) == (0.51, 0.96, 1.0)
+    assert stats["save"] == {"count": 1, "total": 2.0, "p50": 2.0, "p95": 2.0, "p99": 2.0}
+    # Fase que mais consumiu tempo primeiro
+    assert recorder.summary_lines()[0].startswith("pricing: 100x")
+
+
+def test_spans_are_written_as_jsonl_or_csv(tmp_path):
+    for fmt in ("jsonl", "csv"):
+        path = tmp_path / f"saida.timings.{fmt}"
+        recorder = SpanRecorder(str(path), fmt)
+        with span(recorder, "driver.get", worker_id=2, code="0001"):
+            pass
+        try:
+            with recorder.span("taxes", worker_id=2, code="0001"):
+                raise TimeoutError
+        except TimeoutError:
+            pass
+        recorder.close()
+
+        if fmt == "jsonl":
+            rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+            assert [(r["phase"], r["worker"], r["code"], r["ok"]) for r in rows] == [
+                ("driver.get", 2, "0001", True), ("taxes", 2, "0001", False)]
+        else:
+            rows = list(csv.reader(path.open(encoding="utf-8")))
+            assert rows[0] == ["phase", "worker", "code", "start", "duration", "ok"]
+            assert [(r[0], r[5]) for r in rows[1:]] == [("driver.get", "1"), ("taxes", "0")]
+
+
+def test_forwarded_spans_are_not_kept_locally():
+    forwarded = []
+    recorder = SpanRecorder(forward=forwarded.append)
+    recorder.record("item", 0.5, worker_id=3, code="0002", started=10.0)
+    assert forwarded == [("item", 3, "0002", 10.0, 0.5, True)] and recorder.summary() == {}
+    # Sem gravador, span() não mede nada
+    with span(None, "item"):
+        pass
+
+
+def test_timing_is_opt_in(tmp_path):
+    output = str(tmp_path / "saida.xlsx")
+    assert SpanRecorder.from_config({}, output) is None
+
+    recorder = SpanRecorder.from_config({"system": {"timing": {"enabled": True, "format": "csv"}}}, output)
+    try:
+        assert recorder.path == str(tmp_path / "saida.timings.csv")
+    finally:
+        recorder.close()
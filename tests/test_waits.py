@@ -0,0 +1,38 @@
+from waits import AdaptiveTimeouts, DEFAULT_WAIT_BUDGETS
+
+
+def test_fixed_budget_until_enough_samples():
+    timeouts = AdaptiveTimeouts(min_samples=5)
+    for _ in range(4):
+        timeouts.record("tab", 0.5)
+    assert timeouts.budget("tab") == DEFAULT_WAIT_BUDGETS["tab"]
+    timeouts.record("tab", 0.5)
+    assert timeouts.budget("tab") == 2  # 3 x 0,5 s fica abaixo do mínimo
+
+
+def test_budget_is_factor_times_p95_within_limits():
+    timeouts = AdaptiveTimeouts(budgets={"pricing": 15}, factor=3.0, min_seconds=2, min_samples=20)
+    for i in range(100):
+        timeouts.record("pricing", 1.0 + i / 100)  # p95 = 1,95 s
+    assert timeouts.budget("pricing") == 3.0 * 1.95
+
+    # Esperas estouradas entram com o prazo inteiro e fazem o prazo subir até o teto
+    for _ in range(100):
+        timeouts.record("pricing", 15, timed_out=True)
+    assert timeouts.budget("pricing") == 15
+
+
+def test_window_forgets_old_samples():
+    timeouts = AdaptiveTimeouts(min_samples=1, window=10)
+    for _ in range(10):
+        timeouts.record("initial", 3.0)
+    for _ in range(10):
+        timeouts.record("initial", 1.0)
+    assert timeouts.budget("initial") == 3.0
+
+
+def test_disabled_keeps_fixed_budgets():
+    timeouts = AdaptiveTimeouts(budgets={"tab": 7}, enabled=False, min_samples=1)
+    timeouts.record("tab", 0.1)
+    assert timeouts.budget("tab") == 7
+    assert timeouts.stats()["tab"]["count"] == 1
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+from engine import ScrapingEngine
+
+
+class _Worker:
+    """Worker falso: o "login" termina quando o teste libera `gate`."""
+
+    def __init__(self, worker_id, succeed=True):
+        self.worker_id = worker_id
+        self.succeed = succeed
+        self.login_event = threading.Event()
+        self.gate = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        self.gate.wait(5)
+        if not self.succeed:
+            return
+        self.login_event.set()
+        self._stop.wait(5)
+
+    def start(self):
+        self._thread.start()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def stop(self):
+        self._stop.set()
+
+    def stopped(self):
+        return self._stop.is_set()
+
+
+@pytest.fixture
+def engine(config, tmp_path):
+    config["scraping_settings"]["login_batch_size"] = 2
+    config["scraping_settings"].setdefault("autoscale", {})["enabled"] = False
+    engine = ScrapingEngine(config, str(tmp_path))
+    engine.created = []
+    engine.lock_free = []
+
+    def create_worker(worker_id, headless_mode):
+        # O manager não pode segurar threads_lock enquanto cria (e loga) workers
+        free = engine.threads_lock.acquire(blocking=False)
+        if free:
+            engine.threads_lock.release()
+        engine.lock_free.append(free)
+        worker = _Worker(worker_id, succeed=engine.logins_succeed)
+        engine.created.append(worker)
+        return worker
+
+    engine.logins_succeed = True
+    engine._create_worker = create_worker
+    yield engine
+    engine.stop_event.set()
+    for worker in engine.created:
+        worker.gate.set()
+        worker.stop()
+
+
+def _start_manager(engine):
+    manager = threading.Thread(target=engine._worker_manager, args=(True,), daemon=True)
+    manager.start()
+    return manager
+
+
+def _wait_for(condition, timeout=3):
+    end = time.time() + timeout
+    while not condition() and time.time() < end:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_logins_run_as_a_pipeline_without_the_lock(engine):
+    engine.num_workers = 4
+    manager = _start_manager(engine)
+
+    assert _wait_for(lambda: len(engine.created) == 2)
+    time.sleep(0.7)
+    # Só login_batch_size logins em andamento
+    assert len(engine.created) == 2
+
+    # Um login termina: o próximo worker começa sem esperar o lote inteiro
+    engine.created[0].gate.set()
+    assert _wait_for(lambda: len(engine.created) == 3)
+    assert not engine.created[1].login_event.is_set()
+    for worker in engine.created[1:]:
+        worker.gate.set()
+    assert _wait_for(lambda: len(engine.created) == 4)
+    assert all(engine.lock_free)
+
+    engine.stop_event.set()
+    manager.join(3)
+    assert not manager.is_alive() and all(worker.stopped() for worker in engine.created)
+
+
+def test_failed_logins_back_off_new_starts(engine):
+    engine.logins_succeed = False
+    engine.num_workers = 1
+    attempts = []
+    engine.retry_policy.delay = lambda attempt: attempts.append(attempt) or 1.5
+    _start_manager(engine)
+
+    assert _wait_for(lambda: len(engine.created) == 1)
+    engine.created[0].gate.set()
+    time.sleep(1)
+    # O worker morreu sem entrar: o próximo só começa depois da espera da política
+    assert len(engine.created) == 1 and attempts == [0]
+    assert _wait_for(lambda: len(engine.created) == 2)
+
+    # Falhas seguidas aumentam a espera (tentativa 1, 2, ...)
+    engine.created[1].gate.set()
+    assert _wait_for(lambda: attempts == [0, 1])
@@ -0,0 +1,116 @@
+import contextlib
+import csv
+import json
+import os
+import threading
+import time
+from array import array
+from typing import Optional
+
+# Desligado por padrão: cada item gera vários spans gravados em disco
+DEFAULT_TIMING = {"enabled": False, "format": "jsonl"}
+
+SPAN_FIELDS = ("phase", "worker", "code", "start", "duration", "ok")
+
+
+class SpanRecorder:
+    """
+    Spans de tempo por fase (driver.get, esperas das abas, login, reinício
+    de navegador, gravação do checkpoint...), cada um marcado com worker e
+    código do produto. São gravados em JSONL ou CSV ao lado da saída e
+    resumidos por fase (p50/p95/p99) no fim da execução.
+
+    Com `forward`, os spans não são gravados aqui: seguem como tupla para
+    outro gravador (processos worker -> processo principal).
+    """
+
+    def __init__(self, path: Optional[str] = None, fmt: str = "jsonl", forward=None):
+        self.path = path
+        self.fmt = fmt
+        self._forward = forward
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._file = None
+        self._csv = None
+        if path and not forward:
+            new_file = not os.path.exists(path)
+            self._file = open(path, "a", encoding="utf-8", newline="")
+            if fmt == "csv":
+                self._csv = csv.writer(self._file)
+                if new_file:
+                    self._csv.writerow(SPAN_FIELDS)
+
+    @classmethod
+    def from_config(cls, config: dict, output_file: str) -> Optional["SpanRecorder"]:
+        """Gravador de system.timing, em <saída>.timings.jsonl/.csv, ou None se desativado."""
+        settings = {**DEFAULT_TIMING, **config.get("system", {}).get("timing", {})}
+        if not settings["enabled"]:
+            return None
+        fmt = "csv" if settings["format"] == "csv" else "jsonl"
+        return cls(os.path.splitext(output_file)[0] + f".timings.{fmt}", fmt)
+
+    def record(self, phase: str, duration: float, worker_id=None, code=None, started: Optional[float] = None, ok: bool = True):
+        if started is None:
+            started = time.time() - duration
+        self.record_span((phase, worker_id, code, started, duration, ok))
+
+    def record_span(self, span: tuple):
+        """Registra um span já montado na ordem de SPAN_FIELDS."""
+        if self._forward:
+            self._forward(span)
+            return
+        phase, worker_id, code, started, duration, ok = span
+        with self._lock:
+            self._durations.setdefault(phase, array("d")).append(duration)
+            if self._csv:
+                self._csv.writerow((phase, worker_id, code, round(started, 3), round(duration, 4), int(ok)))
+            elif self._file:
+                self._file.write(json.dumps({"phase": phase, "worker": worker_id, "code": code, "start": round(started, 3),
+                                             "duration": round(duration, 4), "ok": ok}, ensure_ascii=False) + "\n")
+
+    @contextlib.contextmanager
+    def span(self, phase: str, worker_id=None, code=None):
+        started, clock = time.time(), time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(phase, time.perf_counter() - clock, worker_id, code, started, ok)
+
+    def summary(self) -> dict:
+        """Por fase: quantidade, tempo total e p50/p95/p99 (s)."""
+        with self._lock:
+            phases = {phase: sorted(durations) for phase, durations in self._durations.items()}
+        return {
+            phase: {
+                "count": len(values),
+                "total": sum(values),
+                "p50": percentile(values, 0.50),
+                "p95": percentile(values, 0.95),
+                "p99": percentile(values, 0.99),
+            }
+            for phase, values in phases.items()
+        }
+
+    def summary_lines(self) -> list:
+        """Uma linha por fase, da que mais consumiu tempo para a que menos consumiu."""
+        stats = sorted(self.summary().items(), key=lambda item: item[1]["total"], reverse=True)
+        return [f"{phase}: {s['count']}x, p50 {s['p50']:.3f}s, p95 {s['p95']:.3f}s, p99 {s['p99']:.3f}s, total {s['total']:.0f}s"
+                for phase, s in stats]
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = self._csv = None
+
+
+def span(recorder: Optional[SpanRecorder], phase: str, worker_id=None, code=None):
+    """recorder.span(...) ou, sem gravador, um contexto que não mede nada."""
+    return recorder.span(phase, worker_id, code) if recorder else contextlib.nullcontext()
+
+
+def percentile(ordered, fraction: float) -> float:
+    """Percentil por posição (sem interpolação) de uma sequência já ordenada e não vazia."""
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
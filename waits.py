@@ -0,0 +1,156 @@
+import threading
+import time
+
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import JavascriptException, TimeoutException
+
+from timing import percentile
+
+# Prazos fixos (s) de cada espera do extractor; também o teto dos prazos adaptativos
+DEFAULT_WAIT_BUDGETS = {"initial": 10, "pricing": 15, "tab": 10}
+DEFAULT_ADAPTIVE_TIMEOUTS = {"enabled": True, "factor": 3.0, "min_seconds": 2, "min_samples": 20, "window": 200}
+
+# Intervalo da consulta curta usada quando o MutationObserver não está disponível
+SHORT_POLL = 0.05
+
+# Resolve assim que um dos XPaths existir: confere na hora e a cada lote de
+# mutações do DOM, sem intervalo fixo de consulta.
+# Argumentos: lista de XPaths, prazo em ms e o callback do Selenium.
+# Devolve [índice, elemento] ou [-1, null] no fim do prazo.
+OBSERVE_SCRIPT = """
+const [xpaths, timeout] = arguments;
+const done = arguments[arguments.length - 1];
+const find = () => {
+    for (let i = 0; i < xpaths.length; i++) {
+        const node = document.evaluate(xpaths[i], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        if (node) return [i, node];
+    }
+    return null;
+};
+let finished = false;
+const finish = hit => {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    done(hit || [-1, null]);
+};
+const observer = new MutationObserver(() => { const hit = find(); if (hit) finish(hit); });
+const timer = setTimeout(() => finish(find()), timeout);
+const hit = find();
+if (hit) finish(hit);
+else observer.observe(document, {childList: true, subtree: true, characterData: true, attributes: true});
+"""
+
+
+def wait_for_any(driver, xpaths, timeout: float):
+    """
+    Espera até um dos XPaths existir na página, reagindo às mudanças do DOM
+    (MutationObserver) em vez da consulta de 500 ms do WebDriverWait.
+    Retorna (índice do XPath, elemento, segundos esperados) ou levanta
+    TimeoutException no fim do prazo.
+    """
+    started = time.monotonic()
+    try:
+        index, element = driver.execute_async_script(OBSERVE_SCRIPT, list(xpaths), int(timeout * 1000))
+    except JavascriptException:
+        # Página sem MutationObserver/XPath via script: consulta curta
+        def _find(d):
+            for i, xpath in enumerate(xpaths):
+                found = d.find_elements(By.XPATH, xpath)
+                if found:
+                    return i, found[0]
+            return False
+        index, element = WebDriverWait(driver, timeout, poll_frequency=SHORT_POLL).until(_find)
+    if index < 0:
+        raise TimeoutException(f"Nenhum elemento encontrado em {timeout:.1f}s: {' | '.join(xpaths)}")
+    return index, element, time.monotonic() - started
+
+
+class AdaptiveTimeouts:
+    """
+    Prazos das esperas do extractor ("initial", "pricing", "tab") ajustados à
+    latência observada: `factor` x o p95 dos últimos `window` tempos de cada
+    espera, entre `min_seconds` e o prazo fixo. Até juntar `min_samples`
+    amostras vale o prazo fixo. Esperas que estouram entram com o prazo
+    inteiro, então uma página que ficou lenta faz o prazo voltar a subir.
+
+    Também acumula o tempo gasto por espera (stats()).
+    """
+
+    def __init__(self, budgets=None, enabled: bool = True, factor: float = 3.0, min_seconds: float = 2,
+                 min_samples: int = 20, window: int = 200):
+        self.budgets = {**DEFAULT_WAIT_BUDGETS, **(budgets or {})}
+        self.enabled = enabled
+        self.factor = factor
+        self.min_seconds = min_seconds
+        self.min_samples = min_samples
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {name: [] for name in self.budgets}
+        self._totals = {name: [0, 0.0, 0] for name in self.budgets}  # esperas, segundos, estouros
+
+    @classmethod
+    def from_config(cls, config: dict) -> "AdaptiveTimeouts":
+        settings = config.get("scraping_settings", {})
+        adaptive = {**DEFAULT_ADAPTIVE_TIMEOUTS, **settings.get("adaptive_timeouts", {})}
+        return cls(budgets=settings.get("wait_timeouts"), **adaptive)
+
+    def budget(self, name: str) -> float:
+        """Prazo atual (s) da espera `name`."""
+        ceiling = self.budgets[name]
+        with self._lock:
+            samples = list(self._samples[name])
+        if not self.enabled or len(samples) < self.min_samples:
+            return ceiling
+        return min(ceiling, max(self.min_seconds, self.factor * percentile(sorted(samples), 0.95)))
+
+    def record(self, name: str, seconds: float, timed_out: bool = False):
+        with self._lock:
+            samples = self._samples[name]
+            samples.append(seconds)
+            if len(samples) > self.window:
+                del samples[0]
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] += int(timed_out)
+
+    def wait(self, driver, name: str, *xpaths):
+        """wait_for_any com o prazo atual de `name`, registrando o tempo gasto."""
+        timeout = self.budget(name)
+        started = time.monotonic()
+        try:
+            index, element, elapsed = wait_for_any(driver, xpaths, timeout)
+        except TimeoutException:
+            self.record(name, time.monotonic() - started, timed_out=True)
+            raise
+        self.record(name, elapsed)
+        return index, element
+
+    def stats(self) -> dict:
+        """Por espera: quantidade, tempo total/p50/p95 (s), estouros e prazo atual."""
+        result = {}
+        for name in self.budgets:
+            with self._lock:
+                samples = list(self._samples[name])
+                count, total, timeouts = self._totals[name]
+            result[name] = {
+                "count": count,
+                "total": total,
+                "p50": percentile(sorted(samples), 0.5) if samples else None,
+                "p95": percentile(sorted(samples), 0.95) if samples else None,
+                "timeouts": timeouts,
+                "budget": self.budget(name),
+            }
+        return result
+
+    def summary(self) -> str:
+        parts = []
+        for name, stat in self.stats().items():
+            if stat["count"]:
+                parts.append(f"{name}: {stat['count']}x, p50 {stat['p50']:.2f}s, p95 {stat['p95']:.2f}s, "
+                             f"{stat['timeouts']} estouro(s), prazo {stat['budget']:.1f}s")
+        return "; ".join(parts)
+